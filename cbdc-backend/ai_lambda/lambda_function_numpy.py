@@ -0,0 +1,66 @@
+"""
+TensorFlow-free variant of lambda_function.py.
+
+Loads the compact .npz artifact exported by train_model.py (dense weights
+plus the StandardScaler parameters) instead of the Keras SavedModel, so a
+cold start imports only NumPy. The request batch is parsed into one
+(n, 4) array in a single pass and scored with one forward pass; features
+are scaled exactly as in training.
+
+Request and response bodies are the same as lambda_function.py.
+"""
+import json
+import os
+from itertools import chain
+
+import numpy as np
+
+try:
+    # In the Lambda image fraud_model.py is copied next to this file (see Dockerfile.numpy)
+    from fraud_model import FEATURES, FraudModel
+except ImportError:
+    from app.services.fraud_model import FEATURES, FraudModel
+
+MODEL_PATH = os.environ.get(
+    "FRAUD_MODEL_PATH", os.path.join(os.environ.get("LAMBDA_TASK_ROOT", "."), "fraud_model.npz")
+)
+model = FraudModel.load(MODEL_PATH)
+
+
+def _response(status_code: int, body: dict) -> dict:
+    return {"statusCode": status_code, "body": json.dumps(body)}
+
+
+def parse_features(transactions: list) -> np.ndarray:
+    """
+    (n, len(FEATURES)) float64 array of the transactions' features, missing ones as 0.
+    """
+    values = chain.from_iterable((tx.get(name, 0) for name in FEATURES) for tx in transactions)
+    return np.fromiter(values, dtype=np.float64, count=len(transactions) * len(FEATURES)).reshape(-1, len(FEATURES))
+
+
+def lambda_handler(event, context):
+    """
+    Lambda function handler to predict transaction fraud.
+    """
+    try:
+        body = json.loads(event.get("body") or "{}")
+    except ValueError:
+        return _response(400, {"error": "Request body is not valid JSON."})
+    transactions = body.get("transactions") if isinstance(body, dict) else None
+    if transactions is None:
+        return _response(400, {"error": "Missing 'transactions' key in request body."})
+    if not transactions:
+        return _response(400, {"error": "Transaction list cannot be empty."})
+
+    try:
+        features = parse_features(transactions)
+    except (AttributeError, TypeError, ValueError):
+        return _response(400, {"error": "Each transaction must be an object with numeric features."})
+
+    try:
+        scores = model.predict(features)
+    except Exception as e:
+        print(f"Error: {e}")
+        return _response(500, {"error": str(e)})
+    return _response(200, {"fraud_scores": scores.tolist()})
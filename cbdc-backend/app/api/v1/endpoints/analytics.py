@@ -0,0 +1,90 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+from datetime import date, datetime, timedelta, timezone
+from typing import Any, List, Optional, Tuple
+
+from app import schemas
+from app.crud import crud_rollup
+from app.db.session import get_async_read_db
+
+router = APIRouter()
+
+# Widest ranges served, so every response is bounded by the range rather than the traffic
+MAX_DAYS = 366
+MAX_HOURS = 31 * 24
+
+
+def _day_range(start: Optional[date], end: Optional[date]) -> Tuple[date, date]:
+    end = end or datetime.now(timezone.utc).date()
+    start = start or end - timedelta(days=29)
+    if start > end:
+        raise HTTPException(status_code=400, detail="start must not be after end")
+    if (end - start).days >= MAX_DAYS:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_DAYS} days per request")
+    return start, end
+
+
+@router.get("/accounts/{account}/volume", response_model=schemas.AccountVolume)
+async def read_account_volume(
+    account: str,
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    db: AsyncSession = Depends(get_async_read_db),
+) -> Any:
+    """
+    Sent and received counts and amounts of an account, per UTC day in
+    [start, end] (default: the last 30 days) and in total.
+
+    Served from the daily rollups, so the cost depends on the number of days only.
+    """
+    start, end = _day_range(start, end)
+    days = await crud_rollup.get_account_days_async(db, account=account, start=start, end=end)
+    return schemas.AccountVolume(
+        account=account,
+        start=start,
+        end=end,
+        sent_count=sum(day.sent_count for day in days),
+        sent_amount=sum(day.sent_amount for day in days),
+        received_count=sum(day.received_count for day in days),
+        received_amount=sum(day.received_amount for day in days),
+        days=[schemas.AccountDay.from_orm(day) for day in days],
+    )
+
+
+@router.get("/accounts/{account}/counterparties", response_model=List[schemas.CounterpartyVolume])
+async def read_top_counterparties(
+    account: str,
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    limit: int = Query(10, ge=1, le=100),
+    db: AsyncSession = Depends(get_async_read_db),
+) -> Any:
+    """
+    The account's top counterparties by amount sent and received over UTC
+    days in [start, end] (default: the last 30 days).
+    """
+    start, end = _day_range(start, end)
+    return await crud_rollup.get_top_counterparties_async(db, account=account, start=start, end=end, limit=limit)
+
+
+@router.get("/corridors/hourly", response_model=List[schemas.CorridorHour])
+async def read_corridor_volume(
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    from_currency: Optional[str] = None,
+    to_currency: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_read_db),
+) -> Any:
+    """
+    Settled mBridge payments per currency corridor and UTC hour in [start, end)
+    (default: the last 24 hours), optionally for one source or target currency.
+    """
+    end = end or datetime.now(timezone.utc)
+    start = start or end - timedelta(hours=24)
+    if start >= end:
+        raise HTTPException(status_code=400, detail="start must be before end")
+    if end - start > timedelta(hours=MAX_HOURS):
+        raise HTTPException(status_code=400, detail=f"At most {MAX_HOURS} hours per request")
+    return await crud_rollup.get_corridor_hours_async(
+        db, start=start, end=end, from_currency=from_currency, to_currency=to_currency
+    )
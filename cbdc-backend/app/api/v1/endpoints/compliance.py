@@ -1,50 +1,137 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response
 from fastapi.responses import FileResponse
-from sqlalchemy.orm import Session
-from typing import Any, List
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Any, List, Optional
 import os
 
-from app.crud import crud_transaction
+from app import schemas
+from app.crud import crud_report, crud_transaction
 from app.services import compliance
-from app.db.session import get_db
+from app.db.session import get_async_db, get_async_read_db
 
 router = APIRouter()
 
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    tags = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in tags or any(tag.removeprefix("W/") == etag for tag in tags)
+
 @router.get("/report/{tx_id}", response_class=FileResponse)
-def generate_compliance_report(
+async def generate_compliance_report(
     *,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_read_db),
     tx_id: str,
+    if_none_match: Optional[str] = Header(None),
 ) -> Any:
     """
     Generate a PDF compliance report for a specific transaction.
+
+    Reports are rendered off the event loop and cached by content; the
+    response carries an ETag so clients can revalidate with If-None-Match.
     """
-    transaction = crud_transaction.get_by_tx_id(db=db, tx_id=tx_id)
+    transaction = await crud_transaction.get_by_tx_id_async(db=db, tx_id=tx_id)
     if not transaction:
         raise HTTPException(status_code=404, detail="Transaction not found")
-        
-    report_path = compliance.generate_aml_report(transaction=transaction)
-    
+
+    # The ETag is the content hash, so revalidation never needs the PDF itself
+    etag = f'"{compliance.report_digest(compliance.report_fields(transaction))}"'
+    if _etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers={"ETag": etag})
+
+    report_path, _ = await compliance.report_renderer.render(transaction)
+
     return FileResponse(
         path=report_path, 
         media_type='application/pdf', 
-        filename=f"report_{tx_id}.pdf"
+        filename=f"report_{tx_id}.pdf",
+        headers={"ETag": etag},
     )
 
-@router.get("/reports", response_model=List[str])
-def list_compliance_reports() -> Any:
+@router.get("/reports", response_model=List[schemas.ReportCatalogEntry])
+async def list_compliance_reports(
+    response: Response,
+    db: AsyncSession = Depends(get_async_read_db),
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = None,
+    tx_id: Optional[str] = None,
+    job_id: Optional[str] = None,
+) -> Any:
+    """
+    List generated compliance reports (PDFs) from the report catalog, newest first.
+
+    When more entries may follow, the cursor for the next page is returned
+    in the X-Next-Cursor header.
+    """
+    try:
+        entries = await crud_report.get_catalog_page_async(db, limit=limit, cursor=cursor, tx_id=tx_id, job_id=job_id)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if len(entries) == limit:
+        response.headers["X-Next-Cursor"] = crud_report.encode_catalog_cursor(entries[-1])
+    return entries
+
+@router.post("/report-jobs", response_model=schemas.ReportJob, status_code=202)
+async def create_report_job(
+    *,
+    db: AsyncSession = Depends(get_async_db),
+    job_in: schemas.ReportJobCreate,
+) -> Any:
+    """
+    Submit a bulk AML report covering every transaction of `account`
+    (sent or received) between `start` and `end`; all fields are optional.
+
+    The job renders in the background; poll GET /report-jobs/{job_id} until
+    its status is "completed", then fetch /report-jobs/{job_id}/download.
     """
-    List all available compliance reports (PDFs).
+    job = await crud_report.create_job_async(db, obj_in=job_in)
+    compliance.report_renderer.submit_job(job.job_id)
+    return job
+
+@router.get("/report-jobs/{job_id}", response_model=schemas.ReportJob)
+async def read_report_job(
+    *,
+    db: AsyncSession = Depends(get_async_read_db),
+    job_id: str,
+) -> Any:
     """
-    reports_dir = "temp_reports"
-    if not os.path.exists(reports_dir):
-        return []
-    return [f for f in os.listdir(reports_dir) if f.endswith('.pdf')]
+    Get the status of a bulk report job.
+    """
+    job = await crud_report.get_job_async(db, job_id=job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Report job not found")
+    return job
+
+@router.get("/report-jobs/{job_id}/download", response_class=FileResponse)
+async def download_report_job(
+    *,
+    db: AsyncSession = Depends(get_async_read_db),
+    job_id: str,
+) -> Any:
+    """
+    Download the PDF of a completed bulk report job.
+    """
+    job = await crud_report.get_job_async(db, job_id=job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Report job not found")
+    if job.status != "completed":
+        raise HTTPException(status_code=409, detail=f"Report job is {job.status}")
+    if not os.path.exists(job.path):
+        raise HTTPException(status_code=410, detail="Report file is no longer available")
+    return FileResponse(
+        path=job.path,
+        media_type='application/pdf',
+        filename=f"report_job_{job_id}.pdf",
+    )
 
 @router.get("/aml-status/{account}")
 def check_aml_status(account: str) -> Any:
     """
-    Mock endpoint to check AML/KYC status for an account.
+    Screen an account against the sanctions/watchlist index.
+
+    `aml_status` is "match" (exact name match), "potential_match" (fuzzy
+    match only), "clear" or "unscreened" (no watchlist loaded), with the
+    matching watchlist entries. KYC status is not checked yet.
     """
-    # In a real system, this would query a compliance database or service
-    return {"account": account, "aml_status": "clear", "kyc_status": "verified"} 
\ No newline at end of file
+    screening = compliance.watchlist_screener.screen(account)
+    return {"account": account, **screening, "kyc_status": "verified"}
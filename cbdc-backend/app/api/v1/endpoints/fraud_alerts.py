@@ -1,7 +1,14 @@
-from fastapi import APIRouter, WebSocket, HTTPException
-from typing import Any
+from fastapi import APIRouter, Depends, WebSocket, HTTPException
+import asyncio
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Any, Optional
 from pydantic import BaseModel
+from app.crud import crud_transaction
+from app.core import metrics
+from app.db.session import get_async_read_db
 from app.services import fraud_detection
+from app.services.alert_broker import alert_broker
+from app.services.feature_store import feature_store
 
 router = APIRouter()
 
@@ -10,36 +17,86 @@ class FraudCheckRequest(BaseModel):
     sender: str
     receiver: str
     amount: float
+    device_id: Optional[str] = None
+    is_foreign: bool = False
 
 @router.post("/check")
-def check_fraud(request: FraudCheckRequest) -> Any:
+async def check_fraud(request: FraudCheckRequest) -> Any:
     """
     Score a transaction for fraud risk.
     """
-    # In a real system, pass all fields to the model/Lambda
-    result = fraud_detection.get_fraud_score(request.tx_id)
+    tx_per_hour, device_id_freq = feature_store.features(request.sender, request.device_id)
+    result = await fraud_detection.fraud_batcher.score(
+        request.tx_id,
+        amount=request.amount,
+        tx_per_hour=tx_per_hour,
+        device_id_freq=device_id_freq,
+        is_foreign=request.is_foreign,
+    )
     return result
 
+@router.get("/batcher/metrics")
+def get_batcher_metrics() -> Any:
+    """
+    Batch-size and queue-wait histograms of the fraud score micro-batcher.
+    """
+    return metrics.snapshot(prefix="fraud_batch")
+
 @router.get("/{tx_id}")
-async def get_fraud_alert(tx_id: str) -> Any:
+async def get_fraud_alert(tx_id: str, db: AsyncSession = Depends(get_async_read_db)) -> Any:
     """
     Get fraud alert for a specific transaction by calling the fraud detection service.
     """
-    alert_data = fraud_detection.get_fraud_score(tx_id)
+    transaction = await crud_transaction.get_by_tx_id_async(db=db, tx_id=tx_id)
+    if not transaction:
+        raise HTTPException(status_code=404, detail="Transaction not found")
+    tx_per_hour, device_id_freq = feature_store.features(transaction.sender)
+    alert_data = await fraud_detection.fraud_batcher.score(
+        tx_id, amount=transaction.amount, tx_per_hour=tx_per_hour, device_id_freq=device_id_freq
+    )
     return alert_data
 
+@router.get("/stream/metrics")
+def get_stream_metrics() -> Any:
+    """
+    Subscriber count and publish/deliver/drop counters of the real-time alert stream.
+    """
+    return metrics.snapshot(prefix="alert_")
+
 @router.websocket("/ws")
-async def websocket_endpoint(websocket: WebSocket):
+async def websocket_endpoint(
+    websocket: WebSocket,
+    account: Optional[str] = None,
+    min_score: float = 0.0,
+):
     """
     WebSocket endpoint for real-time fraud alerts.
+
+    Streams every transaction flagged by the scoring path, optionally only
+    those involving `account` or scored at least `min_score`. Clients that
+    fall behind lose alerts or are disconnected (close code 1013) according
+    to ALERT_SLOW_CONSUMER_POLICY.
     """
     await websocket.accept()
-    # In the future, this will be driven by a message queue or a pub/sub system
     await websocket.send_json({"message": "Connected to fraud alert WebSocket"})
-    # Example of pushing a mock alert
-    import asyncio
-    import json
-    while True:
-        await asyncio.sleep(10)
-        alert = fraud_detection.get_fraud_score("live-tx-123")
-        await websocket.send_text(json.dumps(alert)) 
\ No newline at end of file
+    subscription = alert_broker.subscribe(account=account, min_score=min_score)
+
+    async def send_alerts() -> None:
+        while True:
+            message = await subscription.queue.get()
+            if message is None:
+                await websocket.close(code=1013, reason=subscription.close_reason)
+                return
+            await websocket.send_text(message)
+
+    async def wait_for_disconnect() -> None:
+        while (await websocket.receive())["type"] != "websocket.disconnect":
+            pass
+
+    tasks = [asyncio.ensure_future(send_alerts()), asyncio.ensure_future(wait_for_disconnect())]
+    try:
+        await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        for task in tasks:
+            task.cancel()
+        alert_broker.unsubscribe(subscription)
@@ -1,33 +1,92 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from typing import Any, List
-import subprocess
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy.engine import Row
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, sessionmaker
+from datetime import datetime
+from typing import Any, AsyncIterator, List, Optional, Sequence, Tuple
+import asyncio
+import json
+import logging
+import orjson
 from app import schemas
 from app.crud import crud_transaction
-from app.db.session import get_db
-from app.db.mongo_client import get_mongo_db
+from app.db.session import async_read_sessionmaker, get_async_db, get_read_db
+from app.db.mongo_client import fraud_log_writer
 from app.services import fraud_detection
+from app.services.alert_broker import alert_broker
+from app.services.feature_store import feature_store
+from app.core import metrics
+from app.core.tracing import span
+from app.services.ledger_gateway import invalidate_accounts, ledger_cache, ledger_gateway
+from app.services.transfer_scheduler import transfer_scheduler
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
+def _fraud_features(transaction_in: schemas.TransactionCreate) -> tuple:
+    """
+    Model inputs in training order: amount, tx_per_hour, device_id_freq, is_foreign.
+    """
+    tx_per_hour, device_id_freq = feature_store.features(transaction_in.sender, transaction_in.device_id)
+    return transaction_in.amount, tx_per_hour, device_id_freq, int(transaction_in.is_foreign)
+
+
+def _fraud_log(transaction_in: schemas.TransactionCreate, fraud_score: float) -> dict:
+    return {
+        "sender": transaction_in.sender,
+        "receiver": transaction_in.receiver,
+        "amount": transaction_in.amount,
+        "fraud_score": fraud_score,
+        "status": "flagged"
+    }
+
+
+def _json_response(content: Any, headers: Optional[dict] = None) -> Response:
+    return Response(orjson.dumps(content), media_type="application/json", headers=headers)
+
+
+def _row_dicts(rows: Sequence[Row]) -> List[dict]:
+    """
+    ROW_COLUMNS rows as dicts in the schemas.Transaction shape.
+    """
+    return [dict(zip(crud_transaction.ROW_COLUMNS, row)) for row in rows]
+
 
 @router.get("/", response_model=List[schemas.Transaction])
 def read_transactions(
-    db: Session = Depends(get_db),
-    skip: int = 0,
-    limit: int = 100,
+    db: Session = Depends(get_read_db),
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = None,
+    sender: Optional[str] = None,
+    receiver: Optional[str] = None,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
 ) -> Any:
     """
-    Retrieve all transactions with pagination.
+    Retrieve transactions newest first with cursor-based pagination.
+
+    When more rows may follow, the cursor for the next page is returned in
+    the X-Next-Cursor header.
     """
-    transactions = crud_transaction.get_multi(db, skip=skip, limit=limit)
-    return transactions
+    # Plain column rows encoded straight to JSON bytes: the response has the
+    # schemas.Transaction shape without ORM hydration or per-row validation
+    try:
+        rows = crud_transaction.get_page_rows(
+            db, limit=limit, cursor=cursor, sender=sender, receiver=receiver, start=start, end=end
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    headers = {"X-Next-Cursor": crud_transaction.encode_cursor(rows[-1])} if len(rows) == limit else None
+    return _json_response(_row_dicts(rows), headers)
 
 
 @router.get("/{tx_id}", response_model=schemas.Transaction)
 def read_transaction(
     *,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     tx_id: str,
 ) -> Any:
     """
@@ -40,101 +99,273 @@ def read_transaction(
 
 
 @router.post("/", response_model=schemas.Transaction)
-def create_transaction(
+async def create_transaction(
     *,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     transaction_in: schemas.TransactionCreate,
-    mongo_db = Depends(get_mongo_db),
 ) -> Any:
     """
     Create a new transaction with fraud detection, Fabric settlement, and logging.
     """
-    # 1. Call fraud detection (simulate Lambda)
-    fraud_result = fraud_detection.get_fraud_score("pending-tx")
+    # Each stage is timed as pipeline_stage_duration_seconds{pipeline="create_transaction"}
+    # 1. Score with the in-process fraud model, micro-batched with concurrent requests
+    with span("create_transaction", "fraud_score"):
+        fraud_result = await fraud_detection.fraud_batcher.score("pending-tx", *_fraud_features(transaction_in))
     fraud_score = fraud_result.get("fraud_score", 0)
 
-    # 2. If fraud_score > 0.8, log to MongoDB and return flagged
+    # 2. If fraud_score > 0.8, alert subscribers, log to MongoDB and return flagged.
+    # The log is buffered and written behind in batches, off the response path.
     if fraud_score > 0.8:
-        mongo_db.fraud_logs.insert_one({
-            "sender": transaction_in.sender,
-            "receiver": transaction_in.receiver,
-            "amount": transaction_in.amount,
-            "fraud_score": fraud_score,
-            "status": "flagged"
-        })
+        with span("create_transaction", "fraud_log"):
+            fraud_log = _fraud_log(transaction_in, fraud_score)
+            alert_broker.publish(fraud_log)
+            fraud_log_writer.write(fraud_log)
         raise HTTPException(status_code=400, detail={"status": "flagged", "fraud_score": fraud_score})
 
-    # 3. Call Fabric SDK via subprocess
+    # 3. Submit to Fabric through the transfer scheduler, ordered behind earlier
+    # transfers on the same accounts
     try:
-        result = subprocess.check_output([
-            "node", "app/fabric-sdk.js", "Transfer", transaction_in.sender, transaction_in.receiver, str(transaction_in.amount)
-        ])
+        with span("create_transaction", "ledger"):
+            await transfer_scheduler.submit(transaction_in.sender, transaction_in.receiver, transaction_in.amount)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Fabric SDK error: {str(e)}")
+    invalidate_accounts(transaction_in.sender, transaction_in.receiver)
 
-    # 4. Log to RDS (ORM)
-    transaction = crud_transaction.create(db=db, obj_in=transaction_in)
+    # 4. Log to RDS (ORM); the insert, commit and server defaults are one round trip
+    with span("create_transaction", "rds_commit"):
+        transaction = await crud_transaction.create_async(db=db, obj_in=transaction_in)
+    feature_store.record(transaction_in.sender, transaction_in.device_id)
 
     return transaction
 
 
+@router.post("/batch", response_model=schemas.TransactionBatchResult)
+async def create_transactions_batch(
+    *,
+    db: AsyncSession = Depends(get_async_db),
+    batch_in: schemas.TransactionBatchCreate,
+) -> Any:
+    """
+    Create many transactions at once.
+
+    The whole batch is scored for fraud in one call, accepted transfers are
+    settled on Fabric concurrently and written to RDS with a single bulk insert.
+    Each item gets its own status (accepted, flagged or failed); one bad
+    transfer does not fail the batch.
+    """
+    items = batch_in.transactions
+    results: List[schemas.TransactionBatchItem] = [None] * len(items)
+
+    # 1. Score the whole batch in one call
+    with span("create_transactions_batch", "fraud_score"):
+        fraud_results = fraud_detection.get_fraud_scores(
+            ["pending-tx"] * len(items),
+            [_fraud_features(transaction_in) for transaction_in in items],
+        )
+
+    # 2. Flagged transfers are published to alert subscribers and logged to MongoDB
+    # through the write-behind buffer
+    to_settle = []
+    for index, (transaction_in, fraud_result) in enumerate(zip(items, fraud_results)):
+        fraud_score = fraud_result.get("fraud_score", 0)
+        if fraud_score > 0.8:
+            results[index] = schemas.TransactionBatchItem(index=index, status="flagged", fraud_score=fraud_score)
+            fraud_log = _fraud_log(transaction_in, fraud_score)
+            alert_broker.publish(fraud_log)
+            fraud_log_writer.write(fraud_log)
+        else:
+            to_settle.append(index)
+
+    # 3. Settle the rest on Fabric; the scheduler runs transfers on disjoint
+    # accounts concurrently and orders the ones that share an account
+    with span("create_transactions_batch", "ledger"):
+        outcomes = await asyncio.gather(
+            *(
+                transfer_scheduler.submit(items[index].sender, items[index].receiver, items[index].amount)
+                for index in to_settle
+            ),
+            return_exceptions=True,
+        )
+    invalidate_accounts(*{account for index in to_settle for account in (items[index].sender, items[index].receiver)})
+    settled = []
+    for index, outcome in zip(to_settle, outcomes):
+        if isinstance(outcome, Exception):
+            results[index] = schemas.TransactionBatchItem(
+                index=index, status="failed", fraud_score=fraud_results[index].get("fraud_score", 0),
+                error=f"Fabric SDK error: {str(outcome)}",
+            )
+        else:
+            settled.append(index)
+
+    # 4. Log every settled transfer to RDS in one set-based insert
+    if settled:
+        try:
+            with span("create_transactions_batch", "rds_commit"):
+                rows = await crud_transaction.create_bulk_async(db=db, objs_in=[items[index] for index in settled])
+        except SQLAlchemyError as e:
+            logger.exception("Bulk insert of %d settled transfers failed", len(settled))
+            rows = [None] * len(settled)
+            error = f"Database error: {e.__class__.__name__}"
+        for index, row in zip(settled, rows):
+            fraud_score = fraud_results[index].get("fraud_score", 0)
+            if row is None:
+                results[index] = schemas.TransactionBatchItem(index=index, status="failed", fraud_score=fraud_score, error=error)
+            else:
+                results[index] = schemas.TransactionBatchItem(index=index, status="accepted", fraud_score=fraud_score, transaction=row)
+                feature_store.record(items[index].sender, items[index].device_id)
+
+    return schemas.TransactionBatchResult(
+        accepted=sum(result.status == "accepted" for result in results),
+        flagged=sum(result.status == "flagged" for result in results),
+        failed=sum(result.status == "failed" for result in results),
+        results=results,
+    )
+
+
+@router.get("/cache/metrics")
+def get_cache_metrics() -> Any:
+    """
+    Hit, miss, coalesced and eviction counters of the ledger read cache.
+    """
+    return metrics.snapshot(prefix="cache_")
+
+
+@router.get("/scheduler/metrics")
+def get_scheduler_metrics() -> Any:
+    """
+    Conflict, coalescing, queue depth and wait-time metrics of the transfer
+    scheduler, with the accounts that are queued the most and wait the longest.
+    """
+    return {**metrics.snapshot(prefix="transfer_"), **transfer_scheduler.account_stats()}
+
+
 @router.get("/balance/{account}")
-def get_balance(account: str) -> Any:
+async def get_balance(account: str) -> Any:
     """
-    Query the balance of an account from the blockchain.
+    Query the balance of an account from the blockchain (cached briefly).
     """
     try:
-        result = subprocess.check_output([
-            "node", "app/fabric-sdk.js", "QueryBalance", account
-        ])
-        return {"account": account, "balance": float(result.decode().strip())}
+        result = await ledger_cache.get_or_load(
+            ("QueryBalance", account), lambda: ledger_gateway.acall("QueryBalance", account)
+        )
+        return {"account": account, "balance": float(result.strip())}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Fabric SDK error: {str(e)}")
 
 
+# Records fetched per round trip when streaming a history
+HISTORY_STREAM_PAGE_SIZE = 500
+
+
+async def _history_page(
+    account: str, source: str, limit: int, cursor: Optional[str], sessions: sessionmaker
+) -> Tuple[List[dict], Optional[str]]:
+    """
+    One page of an account's history and the cursor for the next page (None at the end).
+
+    Mirror pages are read through `sessions`, the request's read session factory.
+
+    Mirror pages hold exactly `limit` rows unless the history is exhausted.
+    Ledger pages come from one chaincode page scan of `limit` keys and may hold fewer.
+    """
+    if source == "mirror":
+        async with sessions() as db:
+            rows = await crud_transaction.get_account_history_rows_async(db, account=account, limit=limit, cursor=cursor)
+        next_cursor = crud_transaction.encode_cursor(rows[-1]) if len(rows) == limit else None
+        return _row_dicts(rows), next_cursor
+    page = json.loads(await ledger_gateway.acall("QueryHistoryPage", account, str(limit), cursor or ""))
+    return page["records"], page["bookmark"] or None
+
+
+async def _stream_history(
+    account: str,
+    source: str,
+    first_page: List[dict],
+    cursor: Optional[str],
+    remaining: Optional[int],
+    sessions: sessionmaker,
+) -> AsyncIterator[bytes]:
+    """
+    Yield the history as NDJSON, one page in memory at a time.
+    """
+    page = first_page
+    while True:
+        if remaining is not None:
+            page = page[:remaining]
+            remaining -= len(page)
+        if page:
+            # Encoded like the paged responses (_json_response), one record per line
+            yield b"".join(orjson.dumps(record, option=orjson.OPT_APPEND_NEWLINE) for record in page)
+        if cursor is None or remaining == 0:
+            return
+        try:
+            page, cursor = await _history_page(account, source, HISTORY_STREAM_PAGE_SIZE, cursor, sessions)
+        except Exception:
+            # Headers are already sent; end the stream and leave the error in the logs
+            logger.exception("History stream for %s aborted", account)
+            return
+
+
 @router.get("/history/{account}")
-def get_history(account: str) -> Any:
+async def get_history(
+    request: Request,
+    account: str,
+    source: str = Query("mirror", regex="^(mirror|ledger)$"),
+    stream: bool = False,
+    limit: Optional[int] = Query(None, ge=1),
+    cursor: Optional[str] = None,
+) -> Any:
     """
-    Query the transaction history of an account from the blockchain.
+    Query the transaction history of an account.
+
+    Served from the indexed RDS mirror by default; `source=ledger` pages
+    through the chaincode instead. Without `stream`, returns one page of at
+    most `limit` (default 100, max 1000) records plus `next_cursor`.
+    With `stream=true`, returns every record after `cursor` (up to `limit`
+    if given) as NDJSON, fetched and sent page by page so memory stays flat.
     """
-    import subprocess
-    import json
+    sessions = async_read_sessionmaker(request)
+    page_size = HISTORY_STREAM_PAGE_SIZE if stream else min(limit or 100, 1000)
+    if stream and limit is not None:
+        page_size = min(page_size, limit)
+    # Fetch the first page up front so bad cursors and ledger errors still get a proper status
     try:
-        result = subprocess.check_output([
-            "node", "app/fabric-sdk.js", "QueryHistory", account
-        ])
-        # The chaincode should return a JSON array of transactions
-        return {"account": account, "history": json.loads(result.decode().strip())}
+        history, next_cursor = await _history_page(account, source, page_size, cursor, sessions)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Fabric SDK error: {str(e)}")
 
+    if stream:
+        return StreamingResponse(
+            _stream_history(account, source, history, next_cursor, limit, sessions),
+            media_type="application/x-ndjson",
+        )
+    return _json_response({"account": account, "history": history, "next_cursor": next_cursor})
+
 
 @router.post("/init-ledger")
-def init_ledger() -> Any:
+async def init_ledger() -> Any:
     """
     Initialize the ledger with default accounts via the blockchain.
     """
-    import subprocess
     try:
-        result = subprocess.check_output([
-            "node", "app/fabric-sdk.js", "InitLedger"
-        ])
-        return {"status": "success", "result": result.decode().strip()}
+        result = await ledger_gateway.acall("InitLedger")
+        ledger_cache.clear()
+        return {"status": "success", "result": result.strip()}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Fabric SDK error: {str(e)}")
 
 
 @router.get("/account/{account}")
-def get_account(account: str) -> Any:
+async def get_account(account: str) -> Any:
     """
-    Get full account details from the blockchain.
+    Get full account details from the blockchain (cached briefly).
     """
-    import subprocess
-    import json
     try:
-        result = subprocess.check_output([
-            "node", "app/fabric-sdk.js", "QueryAccount", account
-        ])
-        return json.loads(result.decode().strip())
+        result = await ledger_cache.get_or_load(
+            ("QueryAccount", account), lambda: ledger_gateway.acall("QueryAccount", account)
+        )
+        return json.loads(result.strip())
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Fabric SDK error: {str(e)}") 
\ No newline at end of file
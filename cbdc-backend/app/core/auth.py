@@ -1,35 +1,219 @@
 from fastapi import Depends, HTTPException, status, Security
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from jose import jwt
+from jose import jwk, jwt
+from jose.backends.base import Key
+import hashlib
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
 import requests
+
 from app.core.config import settings
+from app.services.cache import CACHE_ENTRIES, CACHE_REQUESTS
+
+logger = logging.getLogger(__name__)
 
 bearer_scheme = HTTPBearer()
 
-# Cache JWKS for performance
-_jwks = None
-def get_jwks():
-    global _jwks
-    if _jwks is None:
-        resp = requests.get(settings.COGNITO_JWKS_URL)
-        _jwks = resp.json()["keys"]
-    return _jwks
+COGNITO_ISSUER = f"https://cognito-idp.{settings.COGNITO_REGION}.amazonaws.com/{settings.COGNITO_USERPOOL_ID}"
+
+
+def fetch_jwks(url: str, timeout: float) -> dict:
+    """
+    Download a JWKS document. `file://` URLs are read from disk (local development and benchmarks).
+    """
+    if url.startswith("file://"):
+        with open(url[len("file://"):]) as f:
+            return json.load(f)
+    resp = requests.get(url, timeout=timeout)
+    resp.raise_for_status()
+    return resp.json()
+
+
+class JWKSCache:
+    """
+    Signing keys from the identity provider's JWKS, constructed once and indexed by kid.
+
+    A background thread refetches the JWKS every `refresh_interval` seconds so
+    rotated keys are picked up without a restart. A token whose kid is unknown
+    triggers an early refresh, rate limited to one per `min_refresh_interval`.
+    """
+
+    def __init__(self, url: str, refresh_interval: float, min_refresh_interval: float, timeout: float):
+        self.url = url
+        self.refresh_interval = refresh_interval
+        self.min_refresh_interval = min_refresh_interval
+        self.timeout = timeout
+        self._keys: Dict[str, Key] = {}
+        self._last_refresh = 0.0
+        self._refresh_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def load(self, jwks: dict) -> None:
+        """
+        Replace the key set with the keys in `jwks`.
+        """
+        keys = {}
+        for key in jwks.get("keys", []):
+            if key.get("use", "sig") != "sig" or "kid" not in key:
+                continue
+            try:
+                keys[key["kid"]] = jwk.construct(key, key.get("alg", "RS256"))
+            except Exception:
+                logger.warning("Skipping unusable JWKS key %s", key.get("kid"))
+        removed = self._keys.keys() - keys.keys()
+        # Swap the whole dict so readers never see a partial update
+        self._keys = keys
+        if removed:
+            # Claims verified with a revoked key must not outlive it
+            claims_cache.clear()
+
+    def refresh(self) -> bool:
+        """
+        Fetch and load the JWKS now. Returns False (keeping the old keys) on failure.
+        """
+        with self._refresh_lock:
+            return self._refresh_locked()
+
+    def _refresh_locked(self) -> bool:
+        self._last_refresh = time.monotonic()
+        try:
+            self.load(fetch_jwks(self.url, self.timeout))
+        except Exception as e:
+            logger.warning("Could not refresh JWKS from %s: %s", self.url, e)
+            return False
+        return True
+
+    def _may_refresh(self) -> bool:
+        return time.monotonic() - self._last_refresh >= self.min_refresh_interval
+
+    def get_key(self, kid: str) -> Optional[Key]:
+        key = self._keys.get(kid)
+        if key is None and self._may_refresh():
+            # Possibly a freshly rotated key; refresh once, inline. Callers that
+            # queued behind another refresh just re-check the new key set.
+            with self._refresh_lock:
+                if self._may_refresh():
+                    self._refresh_locked()
+            key = self._keys.get(kid)
+        return key
+
+    def start(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stopped.clear()
+        self._thread = threading.Thread(target=self._refresh_loop, daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stopped.set()
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.timeout + 1)
+            self._thread = None
+
+    def _refresh_loop(self) -> None:
+        while not self._stopped.is_set():
+            if not self.refresh() and not self._keys:
+                # Nothing loaded yet; retry sooner than the regular interval
+                self._wakeup.wait(self.min_refresh_interval)
+            else:
+                self._wakeup.wait(self.refresh_interval)
+            self._wakeup.clear()
+
+
+class ClaimsCache:
+    """
+    Bounded LRU of verified token claims keyed by a hash of the token.
+
+    Entries are only served until the token's `exp`; tokens without an exp are not cached.
+    """
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[bytes, Tuple[float, dict]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = CACHE_REQUESTS.labels("jwt_claims", "hit")
+        self._misses = CACHE_REQUESTS.labels("jwt_claims", "miss")
+        self._size = CACHE_ENTRIES.labels("jwt_claims")
+
+    @staticmethod
+    def _key(token: str) -> bytes:
+        return hashlib.sha256(token.encode()).digest()
+
+    def get(self, token: str) -> Optional[dict]:
+        key = self._key(token)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[0] > time.time():
+                    self._entries.move_to_end(key)
+                    self._hits.inc()
+                    return entry[1]
+                del self._entries[key]
+        self._misses.inc()
+        return None
+
+    def put(self, token: str, claims: dict) -> None:
+        exp = claims.get("exp")
+        if not isinstance(exp, (int, float)):
+            return
+        key = self._key(token)
+        with self._lock:
+            self._entries[key] = (float(exp), claims)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            self._size.set(len(self._entries))
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._size.set(0)
+
+
+claims_cache = ClaimsCache(max_entries=settings.JWT_CLAIMS_CACHE_MAX_ENTRIES)
+
+jwks_cache = JWKSCache(
+    url=settings.COGNITO_JWKS_URL,
+    refresh_interval=settings.JWKS_REFRESH_INTERVAL,
+    min_refresh_interval=settings.JWKS_MIN_REFRESH_INTERVAL,
+    timeout=settings.JWKS_FETCH_TIMEOUT,
+)
+
+
+def verify_token(token: str) -> dict:
+    """
+    Verify a Cognito access/ID token and return its claims.
+
+    Raises on an invalid token. Tokens seen before are answered from the claims cache.
+    """
+    claims = claims_cache.get(token)
+    if claims is not None:
+        return dict(claims)
+    header = jwt.get_unverified_header(token)
+    key = jwks_cache.get_key(header.get("kid", ""))
+    if key is None:
+        raise ValueError("Unknown signing key")
+    claims = jwt.decode(
+        token,
+        key,
+        algorithms=["RS256"],
+        audience=settings.COGNITO_APP_CLIENT_ID,
+        issuer=COGNITO_ISSUER,
+    )
+    claims_cache.put(token, claims)
+    return dict(claims)
+
 
 def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(bearer_scheme)):
-    token = credentials.credentials
-    jwks = get_jwks()
     try:
-        header = jwt.get_unverified_header(token)
-        key = next(k for k in jwks if k["kid"] == header["kid"])
-        public_key = jwt.construct_rsa_public_key(key)
-        payload = jwt.decode(
-            token,
-            public_key,
-            algorithms=["RS256"],
-            audience=settings.COGNITO_APP_CLIENT_ID,
-            issuer=f"https://cognito-idp.{settings.COGNITO_REGION}.amazonaws.com/{settings.COGNITO_USERPOOL_ID}"
-        )
-        return payload
+        return verify_token(credentials.credentials)
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -1,4 +1,5 @@
 from pydantic import BaseSettings
+from typing import Optional
 
 class Settings(BaseSettings):
     API_V1_STR: str = "/api/v1"
@@ -11,10 +12,46 @@ class Settings(BaseSettings):
     POSTGRES_PASSWORD: str = "postgres"
     POSTGRES_DB: str = "app"
     DATABASE_URL: str = f"postgresql://{POSTGRES_USER}:{POSTGRES_PASSWORD}@{POSTGRES_SERVER}/{POSTGRES_DB}"
+    ASYNC_DATABASE_URL: str = f"postgresql+asyncpg://{POSTGRES_USER}:{POSTGRES_PASSWORD}@{POSTGRES_SERVER}/{POSTGRES_DB}"
+
+    # Read replica for GET endpoints (see app/db/session.py); reads use the primary when unset
+    DATABASE_READ_URL: Optional[str] = None
+    ASYNC_DATABASE_READ_URL: Optional[str] = None
+    # Connection pools per engine (primary, replica); connections are recycled after
+    # DB_POOL_RECYCLE seconds and checkouts give up after DB_POOL_TIMEOUT
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 20
+    DB_READ_POOL_SIZE: int = 20
+    DB_READ_MAX_OVERFLOW: int = 20
+    DB_POOL_TIMEOUT: float = 30.0
+    DB_POOL_RECYCLE: int = 1800
+    # Replica lag guard: the replica is skipped while its lag exceeds REPLICA_MAX_LAG_SECONDS,
+    # and a client's reads stay on the primary for REPLICA_READ_AFTER_WRITE_SECONDS after it writes
+    REPLICA_MAX_LAG_SECONDS: float = 5.0
+    REPLICA_LAG_CHECK_INTERVAL: float = 5.0
+    REPLICA_READ_AFTER_WRITE_SECONDS: float = 5.0
+
+    # Monthly range partitions of `transactions` (PostgreSQL, see app/db/partitions.py):
+    # partitions are created this many months ahead (at startup, then every
+    # TRANSACTION_PARTITION_CHECK_INTERVAL seconds), and partitions older than the
+    # retention window are exported to Parquet under TRANSACTION_ARCHIVE_DIR and detached
+    TRANSACTION_PARTITIONS_AHEAD: int = 2
+    TRANSACTION_PARTITION_CHECK_INTERVAL: float = 3600.0
+    TRANSACTION_RETENTION_MONTHS: int = 12
+    TRANSACTION_ARCHIVE_DIR: str = "transaction_archive"
 
     MONGO_URI: str = "mongodb://localhost:27017/"
     MONGO_DB_NAME: str = "fintrust"
 
+    # Write-behind buffer for fraud logs: flush at this many documents or after
+    # this many seconds; beyond FRAUD_LOG_MAX_BUFFER, or when a flush fails,
+    # documents are appended to the spill file and replayed later
+    FRAUD_LOG_BATCH_SIZE: int = 500
+    FRAUD_LOG_FLUSH_INTERVAL: float = 1.0
+    FRAUD_LOG_MAX_BUFFER: int = 10000
+    FRAUD_LOG_WRITE_TIMEOUT: float = 5.0
+    FRAUD_LOG_SPILL_PATH: str = "fraud_logs.spill.jsonl"
+
     # AWS Credentials
     AWS_REGION: str = "us-east-1"
     # It's highly recommended to use IAM roles for AWS authentication in production
@@ -27,6 +64,73 @@ class Settings(BaseSettings):
     COGNITO_USERPOOL_ID: str = "your_userpool_id"
     COGNITO_APP_CLIENT_ID: str = "your_app_client_id"
     COGNITO_JWKS_URL: str = f"https://cognito-idp.{COGNITO_REGION}.amazonaws.com/{COGNITO_USERPOOL_ID}/.well-known/jwks.json"
+    # Background JWKS refresh; an unknown kid triggers an early refresh at most this often
+    JWKS_REFRESH_INTERVAL: float = 3600.0
+    JWKS_MIN_REFRESH_INTERVAL: float = 30.0
+    JWKS_FETCH_TIMEOUT: float = 5.0
+    # Verified token claims kept until their exp
+    JWT_CLAIMS_CACHE_MAX_ENTRIES: int = 10000
+
+    # NumPy fraud model artifact exported by train_model.py
+    FRAUD_MODEL_PATH: str = "fraud_model.npz"
+
+    # Fraud score micro-batching: flush at this many requests or after this wait
+    FRAUD_BATCH_MAX_SIZE: int = 256
+    FRAUD_BATCH_MAX_WAIT_MS: float = 2.0
+    FRAUD_BATCH_MAX_QUEUE_DEPTH: int = 10000
+
+    # Velocity feature store: sliding window length and accounts kept in memory
+    FEATURE_STORE_WINDOW_MINUTES: int = 60
+    FEATURE_STORE_MAX_ACCOUNTS: int = 100000
+
+    # Maximum number of transfers accepted by POST /transactions/batch
+    TRANSACTION_BATCH_MAX_SIZE: int = 5000
+
+    # Fabric gateway worker pool
+    # Set to "python -m app.services.fake_ledger" to run against an in-memory ledger
+    LEDGER_WORKER_COMMAND: str = "node app/fabric-sdk.js --worker"
+    LEDGER_POOL_SIZE: int = 4
+    LEDGER_CALL_TIMEOUT: float = 30.0
+    LEDGER_HEALTH_CHECK_INTERVAL: float = 15.0
+
+    # Transfer scheduler: ledger Transfers in flight at once, and whether queued
+    # transfers between the same two accounts are merged into one submission
+    TRANSFER_MAX_PARALLEL: int = 64
+    TRANSFER_COALESCE: bool = False
+
+    # Read-through cache for balance/account ledger queries
+    LEDGER_CACHE_MAX_ENTRIES: int = 10000
+    LEDGER_CACHE_TTL_SECONDS: float = 5.0
+
+    # AML report rendering: worker processes and on-disk cache size limit
+    REPORTS_DIR: str = "temp_reports"
+    REPORT_RENDER_WORKERS: int = 2
+    REPORT_CACHE_MAX_BYTES: int = 512 * 1024 * 1024
+    # Rows fetched per round trip when rendering a bulk report job
+    REPORT_JOB_CHUNK_SIZE: int = 1000
+
+    # Sanctions/watchlist screening: CSV with entry_id, list and name columns (empty
+    # disables screening), checked for changes every WATCHLIST_RELOAD_INTERVAL seconds.
+    # Fuzzy matches need this trigram similarity; results are memoized per account name
+    WATCHLIST_PATH: str = ""
+    WATCHLIST_RELOAD_INTERVAL: float = 60.0
+    WATCHLIST_FUZZY_THRESHOLD: float = 0.8
+    WATCHLIST_MAX_MATCHES: int = 10
+    WATCHLIST_CACHE_MAX_ENTRIES: int = 100000
+
+    # Real-time fraud alerts: per-subscriber queue and what to do when it is full
+    # (drop_oldest, drop_newest or disconnect)
+    ALERT_SUBSCRIBER_QUEUE_SIZE: int = 100
+    ALERT_SLOW_CONSUMER_POLICY: str = "drop_oldest"
+
+    # Slow-request profiler: sample thread stacks every SLOW_REQUEST_SAMPLE_INTERVAL_MS
+    # and keep the stacks of requests slower than the threshold; disabled when unset
+    SLOW_REQUEST_THRESHOLD_MS: Optional[float] = None
+    SLOW_REQUEST_SAMPLE_INTERVAL_MS: float = 5.0
+    SLOW_REQUEST_MAX_PROFILES: int = 50
+
+    # mBridge: JSON FX table ({"base", "rates", "pairs"}); the built-in table is used when unset
+    FX_RATES_PATH: Optional[str] = None
 
     class Config:
         case_sensitive = True
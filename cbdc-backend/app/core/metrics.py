@@ -0,0 +1,192 @@
+"""
+Minimal in-process metrics: counters, gauges and histograms with optional labels.
+
+Metrics register themselves in REGISTRY on creation; `snapshot()` returns
+their current values as plain data for the metrics endpoints and
+`render_prometheus()` in the Prometheus text exposition format for /metrics.
+"""
+import bisect
+import threading
+from typing import Dict, List, Optional, Sequence, Tuple
+
+REGISTRY: List["_Metric"] = []
+
+# Latency buckets in seconds, from 100us to 10s
+LATENCY_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(
+        self,
+        name: str,
+        description: str,
+        labelnames: Sequence[str] = (),
+        registry: Optional[List["_Metric"]] = REGISTRY,
+    ):
+        self.name = name
+        self.description = description
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[Tuple[str, ...], "_Metric"] = {}
+        self._lock = threading.Lock()
+        self._reset()
+        if registry is not None:
+            registry.append(self)
+
+    def labels(self, *values: str) -> "_Metric":
+        """
+        Return the child metric for one combination of label values.
+        """
+        key = tuple(str(value) for value in values)
+        child = self._children.get(key)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(key, self._child())
+        return child
+
+    def _child(self) -> "_Metric":
+        return type(self)(self.name, self.description, registry=None)
+
+    def _reset(self) -> None:
+        raise NotImplementedError
+
+    def _value(self):
+        raise NotImplementedError
+
+    def samples(self) -> List[Tuple[Dict[str, str], object]]:
+        """
+        (labels, value) pairs for this metric, or for each labelled child.
+        """
+        if not self.labelnames:
+            return [({}, self._value())]
+        return [
+            (dict(zip(self.labelnames, key)), child._value())
+            for key, child in list(self._children.items())
+        ]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def _reset(self) -> None:
+        self.value = 0.0
+
+    def inc(self, amount: float = 1.0) -> None:
+        with self._lock:
+            self.value += amount
+
+    def _value(self) -> float:
+        return self.value
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def _reset(self) -> None:
+        self.value = 0.0
+
+    def set(self, value: float) -> None:
+        self.value = value
+
+    def inc(self, amount: float = 1.0) -> None:
+        with self._lock:
+            self.value += amount
+
+    def dec(self, amount: float = 1.0) -> None:
+        with self._lock:
+            self.value -= amount
+
+    def _value(self) -> float:
+        return self.value
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        description: str,
+        buckets: Sequence[float] = LATENCY_BUCKETS,
+        labelnames: Sequence[str] = (),
+        registry: Optional[List[_Metric]] = REGISTRY,
+    ):
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, description, labelnames, registry)
+
+    def _child(self) -> "Histogram":
+        return Histogram(self.name, self.description, self.buckets, registry=None)
+
+    def _reset(self) -> None:
+        # One slot per bucket plus +Inf
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+            self.count += 1
+
+    def _value(self) -> dict:
+        with self._lock:
+            counts, total, count = list(self.counts), self.sum, self.count
+        cumulative, running = {}, 0
+        for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+            running += bucket_count
+            cumulative["+Inf" if bound == float("inf") else repr(bound)] = running
+        return {"buckets": cumulative, "sum": total, "count": count}
+
+
+def snapshot(prefix: str = "") -> dict:
+    """
+    Current values of every registered metric whose name starts with `prefix`.
+    """
+    result = {}
+    for metric in REGISTRY:
+        if not metric.name.startswith(prefix):
+            continue
+        samples = metric.samples()
+        if metric.labelnames:
+            result[metric.name] = [{"labels": labels, "value": value} for labels, value in samples]
+        else:
+            result[metric.name] = samples[0][1]
+    return result
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in labels.items()) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value))
+
+
+def render_prometheus() -> str:
+    """
+    Every registered metric in the Prometheus text exposition format (version 0.0.4).
+    """
+    lines = []
+    for metric in REGISTRY:
+        lines.append(f"# HELP {metric.name} {_escape(metric.description)}")
+        lines.append(f"# TYPE {metric.name} {metric.kind}")
+        for labels, value in metric.samples():
+            if metric.kind != "histogram":
+                lines.append(f"{metric.name}{_format_labels(labels)} {_format_value(value)}")
+                continue
+            for bound, count in value["buckets"].items():
+                lines.append(f"{metric.name}_bucket{_format_labels({**labels, 'le': bound})} {count}")
+            lines.append(f"{metric.name}_sum{_format_labels(labels)} {_format_value(value['sum'])}")
+            lines.append(f"{metric.name}_count{_format_labels(labels)} {value['count']}")
+    return "\n".join(lines) + "\n"
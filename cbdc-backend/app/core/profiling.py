@@ -0,0 +1,131 @@
+"""
+Sampling profiler for slow requests.
+
+While at least one request is in flight, a background thread samples the
+stacks of the event loop thread and of every thread running app code
+(threadpool handlers, ledger gateway readers) every `interval` seconds into
+a short ring buffer; library-only threads such as driver monitors are
+skipped. When a request finishes slower than `threshold`, the samples taken
+during it are aggregated into collapsed stacks ("file:function;file:function
+count", flamegraph input) and kept.
+
+Requests share the event loop, so a slow request's profile also contains
+whatever ran concurrently; an idle loop shows up as the selector wait.
+Nothing runs when the profiler is not configured.
+"""
+import logging
+import os
+import sys
+import threading
+import time
+from collections import Counter, deque
+from typing import Deque, List, Optional, Tuple
+
+from app.core.config import settings
+from app.core.metrics import Counter as MetricCounter
+
+logger = logging.getLogger(__name__)
+
+SLOW_REQUESTS = MetricCounter("slow_requests_total", "Requests slower than the profiler threshold")
+
+# Frames kept per sampled stack, innermost last
+MAX_STACK_DEPTH = 64
+# Collapsed stacks kept per slow-request profile
+TOP_STACKS = 20
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__))) + os.sep
+
+
+def _collapse(frame) -> Tuple[str, bool]:
+    """
+    The collapsed stack of `frame`, and whether any of it is app code.
+    """
+    parts, in_app = [], False
+    while frame is not None and len(parts) < MAX_STACK_DEPTH:
+        code = frame.f_code
+        in_app = in_app or code.co_filename.startswith(APP_DIR)
+        parts.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+        frame = frame.f_back
+    return ";".join(reversed(parts)), in_app
+
+
+class SlowRequestProfiler:
+    def __init__(self, threshold: float, interval: float, max_profiles: int):
+        self.threshold = threshold
+        self.interval = interval
+        self.profiles: Deque[dict] = deque(maxlen=max_profiles)
+        # (monotonic time, collapsed stack) of recent samples, about a minute's worth
+        self._samples: Deque[Tuple[float, str]] = deque(maxlen=max(1000, int(60 / interval) * 8))
+        self._in_flight = 0
+        self._loop_thread: Optional[int] = None
+        self._lock = threading.Lock()
+        self._active = threading.Event()
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stopped.clear()
+        self._thread = threading.Thread(target=self._run, name="slow-request-profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stopped.set()
+        self._active.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def begin(self) -> float:
+        with self._lock:
+            self._in_flight += 1
+            self._loop_thread = threading.get_ident()
+            self._active.set()
+        return time.monotonic()
+
+    def end(self, started: float, method: str, path: str, elapsed: float) -> None:
+        with self._lock:
+            self._in_flight -= 1
+            if not self._in_flight:
+                self._active.clear()
+        if elapsed < self.threshold:
+            return
+        SLOW_REQUESTS.inc()
+        finished = time.monotonic()
+        stacks = Counter(stack for at, stack in list(self._samples) if started <= at <= finished)
+        profile = {
+            "method": method,
+            "path": path,
+            "duration_ms": round(elapsed * 1000, 3),
+            "finished_at": time.time(),
+            "samples": sum(stacks.values()),
+            "stacks": [{"stack": stack, "count": count} for stack, count in stacks.most_common(TOP_STACKS)],
+        }
+        self.profiles.append(profile)
+        logger.warning("Slow request %s %s took %.1f ms (%d samples)", method, path, elapsed * 1000, profile["samples"])
+
+    def recent(self) -> List[dict]:
+        return list(self.profiles)
+
+    def _run(self) -> None:
+        own = threading.get_ident()
+        while not self._stopped.is_set():
+            self._active.wait()
+            now = time.monotonic()
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own:
+                    continue
+                stack, in_app = _collapse(frame)
+                if in_app or thread_id == self._loop_thread:
+                    self._samples.append((now, stack))
+            self._stopped.wait(self.interval)
+
+
+slow_request_profiler: Optional[SlowRequestProfiler] = None
+if settings.SLOW_REQUEST_THRESHOLD_MS is not None:
+    slow_request_profiler = SlowRequestProfiler(
+        threshold=settings.SLOW_REQUEST_THRESHOLD_MS / 1000,
+        interval=settings.SLOW_REQUEST_SAMPLE_INTERVAL_MS / 1000,
+        max_profiles=settings.SLOW_REQUEST_MAX_PROFILES,
+    )
@@ -0,0 +1,108 @@
+"""
+Request-level and per-stage latency instrumentation.
+
+`RequestMetricsMiddleware` records every HTTP request by route template;
+`span(pipeline, stage)` times one stage of a request pipeline:
+
+    with span("create_transaction", "ledger"):
+        await transfer_scheduler.submit(...)
+
+A span costs two perf_counter calls and one histogram observation (about
+1us, up to 2-3us on a small shared vCPU; see benchmarks/bench_spans.py).
+The labelled children are resolved once per (pipeline, stage) and cached.
+Stages deliberately have no in-flight gauge: its two locked updates would
+double the cost; http_requests_in_flight covers concurrency.
+"""
+import time
+from typing import Dict, Tuple
+
+from app.core.metrics import Counter, Gauge, Histogram
+
+HTTP_REQUESTS = Counter("http_requests_total", "HTTP requests handled", labelnames=("method", "route", "status"))
+HTTP_LATENCY = Histogram("http_request_duration_seconds", "HTTP request latency", labelnames=("method", "route"))
+HTTP_IN_FLIGHT = Gauge("http_requests_in_flight", "HTTP requests being handled")
+HTTP_ERRORS = Counter(
+    "http_request_errors_total", "HTTP requests that raised or returned a 5xx status", labelnames=("method", "route")
+)
+
+STAGE_LATENCY = Histogram("pipeline_stage_duration_seconds", "Latency of one pipeline stage", labelnames=("pipeline", "stage"))
+STAGE_ERRORS = Counter("pipeline_stage_errors_total", "Pipeline stages that raised", labelnames=("pipeline", "stage"))
+
+_stage_metrics: Dict[Tuple[str, str], Tuple[Histogram, Counter]] = {}
+
+
+class _Span:
+    __slots__ = ("_latency", "_errors", "_started")
+
+    def __init__(self, metrics: Tuple[Histogram, Counter]):
+        self._latency, self._errors = metrics
+
+    def __enter__(self) -> "_Span":
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, traceback) -> None:
+        self._latency.observe(time.perf_counter() - self._started)
+        if exc_type is not None:
+            self._errors.inc()
+
+
+def span(pipeline: str, stage: str) -> _Span:
+    """
+    Context manager timing one stage of `pipeline`; exceptions are counted and re-raised.
+    """
+    metrics = _stage_metrics.get((pipeline, stage))
+    if metrics is None:
+        metrics = _stage_metrics[(pipeline, stage)] = (
+            STAGE_LATENCY.labels(pipeline, stage),
+            STAGE_ERRORS.labels(pipeline, stage),
+        )
+    return _Span(metrics)
+
+
+class RequestMetricsMiddleware:
+    """
+    ASGI middleware recording count, latency, in-flight and errors per route.
+
+    Requests are labelled by route template (/transactions/{tx_id}), not the
+    raw path, so label cardinality stays bounded. WebSocket and lifespan
+    traffic is passed through untouched.
+    """
+
+    def __init__(self, app, profiler=None):
+        self.app = app
+        self.profiler = profiler
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+
+        async def send_wrapper(message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        HTTP_IN_FLIGHT.inc()
+        profile = self.profiler.begin() if self.profiler is not None else None
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - started
+            HTTP_IN_FLIGHT.dec()
+            method, route = scope["method"], _route_label(scope)
+            HTTP_LATENCY.labels(method, route).observe(elapsed)
+            HTTP_REQUESTS.labels(method, route, status).inc()
+            if status >= 500:
+                HTTP_ERRORS.labels(method, route).inc()
+            if profile is not None:
+                self.profiler.end(profile, method, scope["path"], elapsed)
+
+
+def _route_label(scope) -> str:
+    # Set by FastAPI's router on the shared scope once a route matched
+    return getattr(scope.get("route"), "path", "unmatched")
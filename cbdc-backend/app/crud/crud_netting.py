@@ -0,0 +1,104 @@
+from datetime import datetime, timezone
+from typing import Sequence, Tuple
+
+from sqlalchemy import func, insert, select, union, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import Select
+
+from app.models.netting import NettingPayment, NettingWindow
+
+def _open_window_query() -> Select:
+    return select(NettingWindow).where(NettingWindow.is_open.is_(True))
+
+
+def open_window(db: Session) -> NettingWindow:
+    """
+    The open settlement window, creating the first one on an empty table.
+    """
+    window = db.execute(_open_window_query()).scalars().first()
+    while window is None:
+        db.add(NettingWindow(is_open=True))
+        try:
+            db.commit()
+        except IntegrityError:
+            # Another process opened it first
+            db.rollback()
+        window = db.execute(_open_window_query()).scalars().first()
+    return window
+
+
+def _lock_open_window(db: Session, *, exclusive: bool) -> NettingWindow:
+    """
+    The open window, locked until the caller commits: shared by queueing
+    payments, exclusive for closing, so a window never closes under a
+    payment being queued in it.
+
+    PostgreSQL locks the window row (FOR SHARE / FOR UPDATE). A lock that
+    waited for a close finds the row closed and the next window is locked
+    instead. SQLite has no row locks; a no-op UPDATE starts the write
+    transaction, which holds the database lock, before the window is read.
+    """
+    while True:
+        open_window(db)
+        if db.bind.dialect.name == "sqlite":
+            db.execute(update(NettingWindow).where(NettingWindow.is_open.is_(True)).values(is_open=True))
+        window = db.execute(_open_window_query().with_for_update(read=not exclusive)).scalars().first()
+        if window is not None:
+            return window
+
+
+def add_payments(db: Session, payments: Sequence[dict]) -> int:
+    """
+    Queue payments ({"tx_id", "sender", "receiver", "from_currency",
+    "to_currency", "amount"}) in the open window and commit. Returns the window_id.
+    """
+    window_id = _lock_open_window(db, exclusive=False).id
+    db.execute(insert(NettingPayment.__table__), [{"window_id": window_id, **payment} for payment in payments])
+    db.commit()
+    return window_id
+
+
+def close_window(db: Session) -> NettingWindow:
+    """
+    Close the open window and open the next one, without committing. Returns
+    the closed window, still locked: the caller reads its payments and
+    commits once it is settled, or rolls back to leave it open.
+    """
+    window = _lock_open_window(db, exclusive=True)
+    window.is_open = None
+    window.closed_at = datetime.now(timezone.utc)
+    # The closed row must give up is_open before the next window claims it
+    db.flush()
+    db.add(NettingWindow(is_open=True))
+    db.flush()
+    return window
+
+
+def window_groups_query(window_id: int) -> Select:
+    """
+    Payments of window `window_id` summed per (sender, receiver,
+    from_currency, to_currency): the group's total amount and payment count.
+    """
+    columns = (NettingPayment.sender, NettingPayment.receiver, NettingPayment.from_currency, NettingPayment.to_currency)
+    return (
+        select(*columns, func.sum(NettingPayment.amount), func.count())
+        .where(NettingPayment.window_id == window_id)
+        .group_by(*columns)
+        .order_by(*columns)
+    )
+
+
+def window_counts(db: Session, window_id: int) -> Tuple[int, int]:
+    """
+    Payments and distinct participants queued in window `window_id`.
+    """
+    payments = db.execute(
+        select(func.count()).select_from(NettingPayment).where(NettingPayment.window_id == window_id)
+    ).scalar()
+    parties = union(
+        select(NettingPayment.sender.label("name")).where(NettingPayment.window_id == window_id),
+        select(NettingPayment.receiver).where(NettingPayment.window_id == window_id),
+    ).subquery()
+    participants = db.execute(select(func.count()).select_from(parties)).scalar()
+    return payments, participants
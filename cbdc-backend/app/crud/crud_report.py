@@ -0,0 +1,123 @@
+from sqlalchemy import delete, or_, select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import Select
+from typing import List, Optional, Sequence, Tuple
+
+from app.crud.crud_transaction import decode_cursor, encode_keyset
+from app.models.report import ReportCatalog, ReportJob
+from app.models.transaction import Transaction
+from app.schemas.report import ReportJobCreate
+
+
+async def create_job_async(db: AsyncSession, *, obj_in: ReportJobCreate) -> ReportJob:
+    db_obj = ReportJob(account=obj_in.account, start=obj_in.start, end=obj_in.end, status="pending")
+    db.add(db_obj)
+    await db.commit()
+    return db_obj
+
+
+async def get_job_async(db: AsyncSession, *, job_id: str) -> Optional[ReportJob]:
+    result = await db.execute(select(ReportJob).where(ReportJob.job_id == job_id))
+    return result.scalars().first()
+
+
+def get_job(db: Session, *, job_id: str) -> Optional[ReportJob]:
+    return db.query(ReportJob).filter(ReportJob.job_id == job_id).first()
+
+
+def job_transactions_query(job: ReportJob) -> Select:
+    """
+    Transactions covered by `job`, oldest first, as plain rows rather than ORM objects.
+    """
+    query = select(Transaction.timestamp, Transaction.tx_id, Transaction.sender, Transaction.receiver, Transaction.amount)
+    if job.account is not None:
+        query = query.where(or_(Transaction.sender == job.account, Transaction.receiver == job.account))
+    if job.start is not None:
+        query = query.where(Transaction.timestamp >= job.start)
+    if job.end is not None:
+        query = query.where(Transaction.timestamp < job.end)
+    return query.order_by(Transaction.timestamp, Transaction.id)
+
+
+def _catalog_entry(path: str, size_bytes: int, tx_id: Optional[str], job_id: Optional[str]) -> ReportCatalog:
+    return ReportCatalog(path=path, size_bytes=size_bytes, tx_id=tx_id, job_id=job_id)
+
+
+def add_catalog_entry(
+    db: Session, *, path: str, size_bytes: int, tx_id: Optional[str] = None, job_id: Optional[str] = None
+) -> None:
+    db.execute(delete(ReportCatalog).where(ReportCatalog.path == path))
+    db.add(_catalog_entry(path, size_bytes, tx_id, job_id))
+    db.commit()
+
+
+async def add_catalog_entry_async(
+    db: AsyncSession, *, path: str, size_bytes: int, tx_id: Optional[str] = None, job_id: Optional[str] = None
+) -> None:
+    """
+    Record a report file, replacing any earlier entry for the same path.
+    """
+    await db.execute(delete(ReportCatalog).where(ReportCatalog.path == path))
+    db.add(_catalog_entry(path, size_bytes, tx_id, job_id))
+    await db.commit()
+
+
+def remove_catalog_entries(db: Session, *, paths: Sequence[str]) -> None:
+    if paths:
+        db.execute(delete(ReportCatalog).where(ReportCatalog.path.in_(list(paths))))
+        db.commit()
+
+
+async def remove_catalog_entries_async(db: AsyncSession, *, paths: Sequence[str]) -> None:
+    if paths:
+        await db.execute(delete(ReportCatalog).where(ReportCatalog.path.in_(list(paths))))
+        await db.commit()
+
+
+def _stale_reports_query(tx_id: str, keep: str) -> Select:
+    return select(ReportCatalog.path, ReportCatalog.size_bytes).where(
+        ReportCatalog.tx_id == tx_id, ReportCatalog.path != keep
+    )
+
+
+def get_stale_reports(db: Session, *, tx_id: str, keep: str) -> List[Tuple[str, int]]:
+    return [tuple(row) for row in db.execute(_stale_reports_query(tx_id, keep))]
+
+
+async def get_stale_reports_async(db: AsyncSession, *, tx_id: str, keep: str) -> List[Tuple[str, int]]:
+    """
+    (path, size) of the catalogued reports of transaction `tx_id` other than
+    `keep`: earlier renders made from different content.
+    """
+    result = await db.execute(_stale_reports_query(tx_id, keep))
+    return [tuple(row) for row in result]
+
+
+def catalog_page_query(
+    *,
+    limit: int,
+    cursor: Optional[str] = None,
+    tx_id: Optional[str] = None,
+    job_id: Optional[str] = None,
+) -> Select:
+    """
+    One page of the report catalog, newest first, using the same keyset cursors as transactions.
+    """
+    query = select(ReportCatalog)
+    if tx_id is not None:
+        query = query.where(ReportCatalog.tx_id == tx_id)
+    if job_id is not None:
+        query = query.where(ReportCatalog.job_id == job_id)
+    if cursor is not None:
+        query = query.where(tuple_(ReportCatalog.created_at, ReportCatalog.id) < tuple_(*decode_cursor(cursor)))
+    return query.order_by(ReportCatalog.created_at.desc(), ReportCatalog.id.desc()).limit(limit)
+
+
+async def get_catalog_page_async(db: AsyncSession, **filters) -> List[ReportCatalog]:
+    result = await db.execute(catalog_page_query(**filters))
+    return result.scalars().all()
+
+
+def encode_catalog_cursor(entry: ReportCatalog) -> str:
+    return encode_keyset(entry.created_at, entry.id)
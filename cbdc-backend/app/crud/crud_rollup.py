@@ -0,0 +1,250 @@
+from collections import defaultdict
+from datetime import date, datetime, timezone
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from sqlalchemy import delete, func, literal_column, select, text, union_all
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.engine import Row
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import Select
+
+from app.models.rollup import AccountDailyRollup, CorridorHourlyRollup, CounterpartyDailyRollup
+from app.models.transaction import ArchivedTransaction, Transaction
+
+# Rows per upsert statement; keeps bind parameters under the PostgreSQL limit of 32767
+UPSERT_CHUNK_SIZE = 4000
+
+_INSERTS = {"postgresql": postgresql.insert, "sqlite": sqlite.insert}
+
+
+def _upsert_statements(dialect: str, model, values: List[dict], keys: Sequence[str]) -> list:
+    """
+    INSERT ... ON CONFLICT (keys) DO UPDATE statements adding `values` onto existing rollup rows.
+
+    Rows are sorted by key so concurrent upserts lock rollup rows in the same order.
+    """
+    insert = _INSERTS.get(dialect)
+    if insert is None:
+        raise NotImplementedError(f"Rollup upserts are not implemented for {dialect}")
+    table = model.__table__
+    values = sorted(values, key=lambda row: tuple(row[key] for key in keys))
+    statements = []
+    for start in range(0, len(values), UPSERT_CHUNK_SIZE):
+        statement = insert(table).values(values[start:start + UPSERT_CHUNK_SIZE])
+        additive = [name for name in values[0] if name not in keys]
+        statements.append(
+            statement.on_conflict_do_update(
+                index_elements=list(keys),
+                set_={name: table.c[name] + statement.excluded[name] for name in additive},
+            )
+        )
+    return statements
+
+
+def _utc_day(timestamp: datetime) -> date:
+    # Naive timestamps (SQLite) are UTC already
+    if timestamp.tzinfo is not None:
+        timestamp = timestamp.astimezone(timezone.utc)
+    return timestamp.date()
+
+
+def transaction_statements(dialect: str, rows: Iterable) -> list:
+    """
+    Upserts adding committed-to-be transactions (anything with sender,
+    receiver, amount and timestamp) onto the account and counterparty rollups.
+    """
+    accounts: Dict[Tuple[str, date], List[float]] = defaultdict(lambda: [0, 0.0, 0, 0.0])
+    counterparties: Dict[Tuple[str, date, str], List[float]] = defaultdict(lambda: [0, 0.0])
+    for row in rows:
+        day = _utc_day(row.timestamp)
+        sent, received = accounts[(row.sender, day)], accounts[(row.receiver, day)]
+        sent[0] += 1
+        sent[1] += row.amount
+        received[2] += 1
+        received[3] += row.amount
+        for account, counterparty in ((row.sender, row.receiver), (row.receiver, row.sender)):
+            volume = counterparties[(account, day, counterparty)]
+            volume[0] += 1
+            volume[1] += row.amount
+    if not accounts:
+        return []
+    account_values = [
+        {"account": account, "day": day, "sent_count": v[0], "sent_amount": v[1], "received_count": v[2], "received_amount": v[3]}
+        for (account, day), v in accounts.items()
+    ]
+    counterparty_values = [
+        {"account": account, "day": day, "counterparty": counterparty, "count": v[0], "amount": v[1]}
+        for (account, day, counterparty), v in counterparties.items()
+    ]
+    return _upsert_statements(dialect, AccountDailyRollup, account_values, ("account", "day")) + _upsert_statements(
+        dialect, CounterpartyDailyRollup, counterparty_values, ("account", "day", "counterparty")
+    )
+
+
+def apply_transactions(db: Session, rows: Iterable) -> None:
+    """
+    Add flushed, uncommitted transactions to the rollups; committed together with them.
+    """
+    for statement in transaction_statements(db.bind.dialect.name, rows):
+        db.execute(statement)
+
+
+async def apply_transactions_async(db: AsyncSession, rows: Iterable) -> None:
+    for statement in transaction_statements(db.bind.dialect.name, rows):
+        await db.execute(statement)
+
+
+def record_corridors(db: Session, volumes: Sequence[dict], at: Optional[datetime] = None) -> None:
+    """
+    Add settled mBridge volumes ({"from_currency", "to_currency", "count",
+    "amount", "settled_amount"}) to the hour of `at` (default now) and commit.
+    """
+    if not volumes:
+        return
+    hour = (at or datetime.now(timezone.utc)).astimezone(timezone.utc).replace(minute=0, second=0, microsecond=0)
+    values = [
+        {
+            "from_currency": volume["from_currency"],
+            "to_currency": volume["to_currency"],
+            "hour": hour,
+            "count": volume["count"],
+            "amount": volume["amount"],
+            "settled_amount": volume["settled_amount"],
+        }
+        for volume in volumes
+    ]
+    for statement in _upsert_statements(
+        db.bind.dialect.name, CorridorHourlyRollup, values, ("from_currency", "to_currency", "hour")
+    ):
+        db.execute(statement)
+    db.commit()
+
+
+def backfill(db: Session) -> Dict[str, int]:
+    """
+    Rebuild the account and counterparty rollups from the transactions table
+    with set-based INSERT ... SELECT statements, in one database transaction.
+
+    Once partitions have been archived (app/db/partitions.py), their rows are
+    gone from `transactions`, so only days from the oldest live month on are
+    rebuilt and the archived months keep their rollups.
+
+    On PostgreSQL the rollup tables are locked for the rebuild, so transfers
+    committing meanwhile wait and are added on top exactly once, and archiving
+    waits until the rebuild commits. Corridor rollups are not rebuilt: mBridge
+    payments are not stored as rows. Returns the number of rollup rows in
+    each table afterwards.
+    """
+    table = Transaction.__table__
+    if db.bind.dialect.name == "postgresql":
+        db.execute(text("SET LOCAL TIME ZONE 'UTC'"))
+        db.execute(text("LOCK TABLE accountdailyrollups, counterpartydailyrollups IN EXCLUSIVE MODE"))
+        db.execute(text("LOCK TABLE archivedtransactions IN SHARE MODE"))
+    since = None
+    if db.execute(select(ArchivedTransaction.id).limit(1)).first() is not None:
+        oldest = db.execute(select(func.min(table.c.timestamp))).scalar()
+        if oldest is None:
+            db.commit()
+            return _rollup_counts(db)
+        since = _utc_day(oldest).replace(day=1)
+    for model in (AccountDailyRollup, CounterpartyDailyRollup):
+        statement = delete(model)
+        db.execute(statement if since is None else statement.where(model.day >= since))
+
+    day = func.date(table.c.timestamp)
+    count, amount = func.count(), func.sum(table.c.amount)
+
+    sides = union_all(
+        select(table.c.sender.label("account"), day.label("day"), count.label("sent_count"), amount.label("sent_amount"),
+               literal_column("0").label("received_count"), literal_column("0.0").label("received_amount"))
+        .group_by(table.c.sender, day),
+        select(table.c.receiver, day, literal_column("0"), literal_column("0.0"), count, amount).group_by(table.c.receiver, day),
+    ).subquery()
+    columns = ["account", "day", "sent_count", "sent_amount", "received_count", "received_amount"]
+    db.execute(
+        AccountDailyRollup.__table__.insert().from_select(
+            columns,
+            select(sides.c.account, sides.c.day, *(func.sum(sides.c[name]) for name in columns[2:]))
+            .group_by(sides.c.account, sides.c.day),
+        )
+    )
+
+    pairs = union_all(
+        select(table.c.sender.label("account"), day.label("day"), table.c.receiver.label("counterparty"),
+               count.label("count"), amount.label("amount"))
+        .group_by(table.c.sender, day, table.c.receiver),
+        select(table.c.receiver, day, table.c.sender, count, amount).group_by(table.c.receiver, day, table.c.sender),
+    ).subquery()
+    db.execute(
+        CounterpartyDailyRollup.__table__.insert().from_select(
+            ["account", "day", "counterparty", "count", "amount"],
+            select(pairs.c.account, pairs.c.day, pairs.c.counterparty, func.sum(pairs.c["count"]), func.sum(pairs.c.amount))
+            .group_by(pairs.c.account, pairs.c.day, pairs.c.counterparty),
+        )
+    )
+    db.commit()
+    return _rollup_counts(db)
+
+
+def _rollup_counts(db: Session) -> Dict[str, int]:
+    return {
+        "accountdailyrollups": db.execute(select(func.count()).select_from(AccountDailyRollup)).scalar(),
+        "counterpartydailyrollups": db.execute(select(func.count()).select_from(CounterpartyDailyRollup)).scalar(),
+    }
+
+
+def account_days_query(*, account: str, start: date, end: date) -> Select:
+    """
+    The account's daily rollups for days in [start, end], oldest first.
+    """
+    return (
+        select(AccountDailyRollup)
+        .where(AccountDailyRollup.account == account, AccountDailyRollup.day >= start, AccountDailyRollup.day <= end)
+        .order_by(AccountDailyRollup.day)
+    )
+
+
+def top_counterparties_query(*, account: str, start: date, end: date, limit: int) -> Select:
+    """
+    The account's counterparties by total amount over days in [start, end].
+    """
+    rollup = CounterpartyDailyRollup
+    total = func.sum(rollup.amount).label("amount")
+    return (
+        select(rollup.counterparty, func.sum(rollup.count).label("count"), total)
+        .where(rollup.account == account, rollup.day >= start, rollup.day <= end)
+        .group_by(rollup.counterparty)
+        .order_by(total.desc(), rollup.counterparty)
+        .limit(limit)
+    )
+
+
+def corridor_hours_query(
+    *, start: datetime, end: datetime, from_currency: Optional[str] = None, to_currency: Optional[str] = None
+) -> Select:
+    """
+    Corridor rollups for hours in [start, end), oldest first.
+    """
+    rollup = CorridorHourlyRollup
+    query = select(rollup).where(rollup.hour >= start, rollup.hour < end)
+    if from_currency is not None:
+        query = query.where(rollup.from_currency == from_currency)
+    if to_currency is not None:
+        query = query.where(rollup.to_currency == to_currency)
+    return query.order_by(rollup.hour, rollup.from_currency, rollup.to_currency)
+
+
+async def get_account_days_async(db: AsyncSession, **filters) -> List[AccountDailyRollup]:
+    result = await db.execute(account_days_query(**filters))
+    return result.scalars().all()
+
+
+async def get_top_counterparties_async(db: AsyncSession, **filters) -> List[Row]:
+    result = await db.execute(top_counterparties_query(**filters))
+    return result.all()
+
+
+async def get_corridor_hours_async(db: AsyncSession, **filters) -> List[CorridorHourlyRollup]:
+    result = await db.execute(corridor_hours_query(**filters))
+    return result.scalars().all()
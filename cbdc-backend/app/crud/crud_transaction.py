@@ -1,16 +1,164 @@
-from sqlalchemy.orm import Session
-from typing import List, Optional
+from sqlalchemy import insert, select, tuple_, union
+from sqlalchemy.engine import Row
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, aliased
+from sqlalchemy.sql import Select
+from datetime import datetime
+from typing import List, Optional, Sequence, Tuple, Union
+import asyncio
+import base64
 
-from app.models.transaction import Transaction
+from app.crud import crud_rollup
+from app.models.transaction import ArchivedTransaction, Transaction, generate_uuid
 from app.schemas.transaction import TransactionCreate
 
 
 def get_by_tx_id(db: Session, *, tx_id: str) -> Optional[Transaction]:
-    return db.query(Transaction).filter(Transaction.tx_id == tx_id).first()
+    """
+    The transaction with `tx_id`, from the live table or else the Parquet
+    archive of its detached partition (see app/db/partitions.py).
+    """
+    transaction = db.query(Transaction).filter(Transaction.tx_id == tx_id).first()
+    if transaction is not None:
+        return transaction
+    entry = db.query(ArchivedTransaction).filter(ArchivedTransaction.tx_id == tx_id).first()
+    return read_archived(entry) if entry is not None else None
 
 
-def get_multi(db: Session, *, skip: int = 0, limit: int = 100) -> List[Transaction]:
-    return db.query(Transaction).offset(skip).limit(limit).all()
+def read_archived(entry: ArchivedTransaction) -> Optional[Transaction]:
+    """
+    Read an archived transaction from the single row group holding it. The
+    result is a transient Transaction, not attached to any session.
+    """
+    try:
+        import pyarrow.compute as pc
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise RuntimeError("Reading archived transactions requires pyarrow (pip install pyarrow)")
+    group = pq.ParquetFile(entry.path).read_row_group(entry.row_group)
+    rows = group.filter(pc.equal(group["tx_id"], entry.tx_id)).to_pylist()
+    return Transaction(**rows[0]) if rows else None
+
+
+def encode_keyset(timestamp: datetime, id_: int) -> str:
+    """
+    Opaque cursor for a (timestamp, id) keyset position.
+    """
+    raw = f"{timestamp.isoformat()}|{id_}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def encode_cursor(transaction: Union[Transaction, Row]) -> str:
+    """
+    Opaque keyset cursor pointing just after `transaction` (an ORM object or
+    a ROW_COLUMNS row) in (timestamp, id) DESC order.
+    """
+    return encode_keyset(transaction.timestamp, transaction.id)
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """
+    Inverse of encode_keyset; raises ValueError on a malformed cursor.
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        timestamp, id_ = raw.rsplit("|", 1)
+        return datetime.fromisoformat(timestamp), int(id_)
+    except Exception:
+        raise ValueError("Invalid cursor")
+
+
+def _newest_first(query: Select, table, cursor: Optional[str]) -> Select:
+    if cursor is not None:
+        query = query.where(tuple_(table.c.timestamp, table.c.id) < tuple_(*decode_cursor(cursor)))
+    return query.order_by(table.c.timestamp.desc(), table.c.id.desc())
+
+
+# Columns of a transaction as the API returns it (schemas.Transaction field order)
+ROW_COLUMNS = ("sender", "receiver", "amount", "id", "tx_id", "timestamp")
+
+
+def page_query(
+    *,
+    limit: int,
+    cursor: Optional[str] = None,
+    sender: Optional[str] = None,
+    receiver: Optional[str] = None,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    rows: bool = False,
+) -> Select:
+    """
+    One page of transactions, newest first, resuming after `cursor`.
+
+    Filters map onto the composite (sender|receiver, timestamp, id) indexes,
+    so each page is an index range scan however deep it is. With `rows`,
+    selects the ROW_COLUMNS as plain tuples instead of ORM entities.
+    """
+    table = Transaction.__table__
+    query = select(*(table.c[name] for name in ROW_COLUMNS)) if rows else select(Transaction)
+    if sender is not None:
+        query = query.where(table.c.sender == sender)
+    if receiver is not None:
+        query = query.where(table.c.receiver == receiver)
+    if start is not None:
+        query = query.where(table.c.timestamp >= start)
+    if end is not None:
+        query = query.where(table.c.timestamp < end)
+    return _newest_first(query, table, cursor).limit(limit)
+
+
+def account_history_query(*, account: str, limit: int, cursor: Optional[str] = None, rows: bool = False) -> Select:
+    """
+    Transactions sent or received by `account`, newest first.
+
+    Runs as two index range scans (by sender and by receiver) merged with
+    UNION rather than an OR, so each side stops after `limit` rows. With
+    `rows`, selects the ROW_COLUMNS as plain tuples instead of ORM entities.
+    """
+    table = Transaction.__table__
+    sides = [
+        _newest_first(select(table).where(column == account), table, cursor).limit(limit).subquery()
+        for column in (table.c.sender, table.c.receiver)
+    ]
+    merged = union(*(select(side) for side in sides)).subquery()
+    query = select(*(merged.c[name] for name in ROW_COLUMNS)) if rows else select(aliased(Transaction, merged))
+    return query.order_by(merged.c.timestamp.desc(), merged.c.id.desc()).limit(limit)
+
+
+def training_rows_query(after: Optional[Tuple[datetime, int]] = None) -> Select:
+    """
+    Columns the fraud model is trained on, oldest first, resuming after the
+    (timestamp, id) keyset position `after`. Served by the (timestamp, id) index.
+    """
+    table = Transaction.__table__
+    query = select(table.c.tx_id, table.c.sender, table.c.amount, table.c.timestamp, table.c.id)
+    if after is not None:
+        query = query.where(tuple_(table.c.timestamp, table.c.id) > tuple_(*after))
+    return query.order_by(table.c.timestamp, table.c.id)
+
+
+def get_page(db: Session, **filters) -> List[Transaction]:
+    return db.execute(page_query(**filters)).scalars().all()
+
+
+def get_page_rows(db: Session, **filters) -> List[Row]:
+    """
+    Like get_page, but plain ROW_COLUMNS rows: no identity map, no ORM objects.
+    """
+    return db.execute(page_query(rows=True, **filters)).all()
+
+
+async def get_account_history_async(db: AsyncSession, *, account: str, limit: int, cursor: Optional[str] = None) -> List[Transaction]:
+    result = await db.execute(account_history_query(account=account, limit=limit, cursor=cursor))
+    return result.scalars().all()
+
+
+async def get_account_history_rows_async(
+    db: AsyncSession, *, account: str, limit: int, cursor: Optional[str] = None
+) -> List[Row]:
+    result = await db.execute(account_history_query(account=account, limit=limit, cursor=cursor, rows=True))
+    return result.all()
 
 
 def create(db: Session, *, obj_in: TransactionCreate) -> Transaction:
@@ -20,6 +168,68 @@ def create(db: Session, *, obj_in: TransactionCreate) -> Transaction:
         amount=obj_in.amount,
     )
     db.add(db_obj)
+    # Flushed first so the rollups see the server-side timestamp; both commit together
+    db.flush()
+    crud_rollup.apply_transactions(db, [db_obj])
     db.commit()
     db.refresh(db_obj)
-    return db_obj 
\ No newline at end of file
+    return db_obj
+
+
+async def get_by_tx_id_async(db: AsyncSession, *, tx_id: str) -> Optional[Transaction]:
+    result = await db.execute(select(Transaction).where(Transaction.tx_id == tx_id).limit(1))
+    transaction = result.scalars().first()
+    if transaction is not None:
+        return transaction
+    result = await db.execute(select(ArchivedTransaction).where(ArchivedTransaction.tx_id == tx_id))
+    entry = result.scalars().first()
+    if entry is None:
+        return None
+    # The Parquet read is blocking file I/O and decompression
+    return await asyncio.get_running_loop().run_in_executor(None, read_archived, entry)
+
+
+async def create_async(db: AsyncSession, *, obj_in: TransactionCreate) -> Transaction:
+    db_obj = Transaction(
+        sender=obj_in.sender,
+        receiver=obj_in.receiver,
+        amount=obj_in.amount,
+    )
+    db.add(db_obj)
+    # Server defaults come back with the INSERT (eager_defaults), so no refresh round trip;
+    # the rollups are updated in the same database transaction
+    await db.flush()
+    await crud_rollup.apply_transactions_async(db, [db_obj])
+    await db.commit()
+    return db_obj
+
+
+# Rows per INSERT statement; keeps bind parameters under the PostgreSQL limit of 32767
+BULK_INSERT_CHUNK_SIZE = 6000
+
+
+async def create_bulk_async(db: AsyncSession, *, objs_in: Sequence[TransactionCreate]) -> List[Row]:
+    """
+    Insert many transactions with set-based multi-row INSERT ... RETURNING
+    statements in a single database transaction.
+
+    Returns plain rows (not ORM objects) in the same order as `objs_in`.
+    """
+    values = [
+        {"tx_id": generate_uuid(), "sender": obj_in.sender, "receiver": obj_in.receiver, "amount": obj_in.amount}
+        for obj_in in objs_in
+    ]
+    table = Transaction.__table__
+    rows_by_tx_id = {}
+    for start in range(0, len(values), BULK_INSERT_CHUNK_SIZE):
+        chunk = values[start:start + BULK_INSERT_CHUNK_SIZE]
+        if db.bind.dialect.implicit_returning:
+            result = await db.execute(insert(table).values(chunk).returning(*table.c))
+        else:
+            # Dialects without RETURNING (SQLite): executemany, then read the chunk back
+            await db.execute(insert(table), chunk)
+            result = await db.execute(select(table).where(table.c.tx_id.in_([row["tx_id"] for row in chunk])))
+        rows_by_tx_id.update((row.tx_id, row) for row in result)
+    await crud_rollup.apply_transactions_async(db, rows_by_tx_id.values())
+    await db.commit()
+    return [rows_by_tx_id[row["tx_id"]] for row in values]
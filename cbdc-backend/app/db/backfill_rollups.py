@@ -0,0 +1,22 @@
+import logging
+from app.crud import crud_rollup
+from app.db.session import SessionLocal
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+def backfill_rollups() -> None:
+    """
+    Rebuild the account and counterparty rollups from existing transactions.
+    Safe to run while the API is serving; see crud_rollup.backfill.
+    """
+    logger.info("Rebuilding volume rollups from the transactions table...")
+    db = SessionLocal()
+    try:
+        written = crud_rollup.backfill(db)
+    finally:
+        db.close()
+    logger.info("Rollups rebuilt: %s", written)
+
+if __name__ == "__main__":
+    backfill_rollups()
@@ -1,13 +1,23 @@
 import logging
+from sqlalchemy import inspect
+from app.db import partitions
 from app.db.session import engine
 from app.db.base import Base
-from app.models.transaction import Transaction  # Make sure all models are imported here
+from app.models.transaction import ArchivedTransaction, Transaction  # Make sure all models are imported here
+from app.models.netting import NettingPayment, NettingWindow
+from app.models.report import ReportCatalog, ReportJob
+from app.models.rollup import AccountDailyRollup, CorridorHourlyRollup, CounterpartyDailyRollup
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 def init_db() -> None:
     logger.info("Creating all tables in database...")
+    if engine.dialect.name == "postgresql" and not inspect(engine).has_table(Transaction.__tablename__):
+        # Partitioned by month on PostgreSQL; create_all then skips the table
+        with engine.begin() as connection:
+            partitions.create_partitioned_table(connection)
+            partitions.ensure_partitions(connection)
     Base.metadata.create_all(bind=engine)
     logger.info("Tables created successfully.")
 
@@ -1,5 +1,20 @@
-from pymongo import MongoClient
+import asyncio
+import itertools
+import logging
+import os
+import threading
+import time
+from datetime import datetime, timezone
+from typing import List, Optional, TextIO
+
+from bson import ObjectId, json_util
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import ASCENDING, DESCENDING, IndexModel, MongoClient
+from pymongo.errors import BulkWriteError
 from app.core.config import settings
+from app.core.metrics import Counter, Gauge
+
+logger = logging.getLogger(__name__)
 
 class MongoDB:
     def __init__(self):
@@ -12,7 +27,19 @@ class MongoDB:
     def close(self):
         self.client.close()
 
+class AsyncMongoDB:
+    def __init__(self):
+        self.client = AsyncIOMotorClient(settings.MONGO_URI)
+        self.db = self.client[settings.MONGO_DB_NAME]
+
+    def get_db(self):
+        return self.db
+
+    def close(self):
+        self.client.close()
+
 mongodb = MongoDB()
+async_mongodb = AsyncMongoDB()
 
 def get_mongo_db():
     """
@@ -20,6 +47,239 @@ def get_mongo_db():
     """
     return mongodb.get_db()
 
+def get_async_mongo_db():
+    """
+    FastAPI dependency that provides a Motor (asyncio) database instance.
+    """
+    return async_mongodb.get_db()
+
+FRAUD_LOGS_WRITTEN = Counter("fraud_log_written_total", "Fraud log documents written to MongoDB")
+FRAUD_LOGS_SPILLED = Counter("fraud_log_spilled_total", "Fraud log documents appended to the spill file")
+FRAUD_LOGS_DROPPED = Counter("fraud_log_dropped_total", "Fraud log documents lost because the spill file could not be written")
+FRAUD_LOGS_BUFFERED = Gauge("fraud_log_buffered", "Fraud log documents waiting to be flushed")
+
+# Indexes backing the analyst queries on fraud_logs
+FRAUD_LOG_INDEXES = [
+    IndexModel([("sender", ASCENDING)]),
+    IndexModel([("fraud_score", DESCENDING)]),
+    IndexModel([("created_at", DESCENDING)]),
+]
+
+
+class FraudLogWriter:
+    """
+    Write-behind buffer for fraud_logs.
+
+    `write()` only appends to an in-memory buffer; a background task flushes it
+    with one unordered insert_many every `batch_size` documents or
+    `flush_interval` seconds. Documents get their _id up front, so a batch that
+    is retried after a timeout is deduplicated by MongoDB instead of inserted
+    twice.
+
+    When Mongo is slow or down, batches that fail to flush within
+    `write_timeout`, and anything beyond `max_buffer`, are appended to a local
+    JSON-lines spill file and replayed once writes succeed again. Spills run
+    in the default executor from the background task, never on the caller's
+    path; if the spill file cannot be written either, the documents are
+    dropped and counted in fraud_log_dropped_total.
+    """
+
+    def __init__(
+        self,
+        get_db,
+        batch_size: int,
+        flush_interval: float,
+        max_buffer: int,
+        write_timeout: float,
+        spill_path: str,
+    ):
+        self._get_db = get_db
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_buffer = max_buffer
+        self.write_timeout = write_timeout
+        self.spill_path = spill_path
+        self._buffer: List[dict] = []
+        # Backlog beyond max_buffer, waiting for the background task to spill it
+        self._overflow: List[dict] = []
+        self._spill_lock = threading.Lock()
+        # Monotonic time of the last failed insert; replays back off after a failure
+        self._failed_at: Optional[float] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def _replay_path(self) -> str:
+        return self.spill_path + ".replay"
+
+    def write(self, document: dict) -> None:
+        """
+        Queue a fraud log document. Never blocks on MongoDB.
+        """
+        document.setdefault("_id", ObjectId())
+        document.setdefault("created_at", datetime.now(timezone.utc))
+        self._buffer.append(document)
+        if len(self._buffer) >= self.max_buffer:
+            # The flusher cannot keep up; have the backlog moved to disk rather than grow without bound
+            self._overflow.extend(self._take(len(self._buffer)))
+            if self._task is None or self._task.done():
+                self._spill_contained(self._take_overflow())
+            else:
+                self._wakeup.set()
+        elif len(self._buffer) >= self.batch_size and self._wakeup is not None:
+            self._wakeup.set()
+        FRAUD_LOGS_BUFFERED.set(len(self._buffer))
+
+    async def start(self) -> None:
+        if self._task is not None and not self._task.done():
+            return
+        self._wakeup = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """
+        Stop the flusher and write out everything still buffered (spilling it if Mongo is unavailable).
+        """
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self._spill_async(self._take_overflow())
+        while self._buffer:
+            if not await self._flush(self._take(self.batch_size)):
+                # Mongo is unavailable; do not wait out a timeout per batch
+                await self._spill_async(self._take(len(self._buffer)))
+
+    async def ensure_indexes(self) -> None:
+        await self._get_db().fraud_logs.create_indexes(FRAUD_LOG_INDEXES)
+
+    def _take(self, count: int) -> List[dict]:
+        batch, self._buffer = self._buffer[:count], self._buffer[count:]
+        FRAUD_LOGS_BUFFERED.set(len(self._buffer))
+        return batch
+
+    def _take_overflow(self) -> List[dict]:
+        overflow, self._overflow = self._overflow, []
+        return overflow
+
+    async def _insert(self, documents: List[dict]) -> None:
+        try:
+            await asyncio.wait_for(
+                self._get_db().fraud_logs.insert_many(documents, ordered=False), self.write_timeout
+            )
+        except BulkWriteError as e:
+            # Duplicate _ids are documents a timed-out attempt already wrote
+            if any(error.get("code") != 11000 for error in e.details.get("writeErrors", [])):
+                self._failed_at = time.monotonic()
+                raise
+        except Exception:
+            self._failed_at = time.monotonic()
+            raise
+        self._failed_at = None
+        FRAUD_LOGS_WRITTEN.inc(len(documents))
+
+    async def _flush(self, batch: List[dict]) -> bool:
+        if not batch:
+            return True
+        try:
+            await self._insert(batch)
+            return True
+        except Exception as e:
+            logger.warning("Spilling %d fraud logs after failed flush: %r", len(batch), e)
+            await self._spill_async(batch)
+            return False
+
+    def _spill(self, documents: List[dict]) -> None:
+        # A spill cancelled with stop() keeps running in its thread; appends must not interleave
+        with self._spill_lock, open(self.spill_path, "a") as f:
+            f.writelines(json_util.dumps(document) + "\n" for document in documents)
+            f.flush()
+            os.fsync(f.fileno())
+        FRAUD_LOGS_SPILLED.inc(len(documents))
+
+    def _spill_contained(self, documents: List[dict]) -> None:
+        if not documents:
+            return
+        try:
+            self._spill(documents)
+        except Exception:
+            logger.exception("Dropped %d fraud logs: could not write the spill file %s", len(documents), self.spill_path)
+            FRAUD_LOGS_DROPPED.inc(len(documents))
+
+    async def _spill_async(self, documents: List[dict]) -> None:
+        if documents:
+            await asyncio.get_running_loop().run_in_executor(None, self._spill_contained, documents)
+
+    def _open_replay(self) -> Optional[TextIO]:
+        if not os.path.exists(self._replay_path):
+            # Not while a spill is appending: its documents would land in the file being replayed
+            with self._spill_lock:
+                if not os.path.exists(self.spill_path):
+                    return None
+                # New spills go to a fresh file while this one is replayed
+                os.replace(self.spill_path, self._replay_path)
+        return open(self._replay_path)
+
+    def _read_replay_batch(self, f: TextIO) -> List[dict]:
+        return [json_util.loads(line) for line in itertools.islice(f, self.batch_size)]
+
+    async def _replay_spill(self) -> None:
+        """
+        Move spilled documents back into MongoDB. Stops at the first failure and retries next time.
+
+        The file is read in an executor, a batch at a time; only the inserts run on the event loop.
+        """
+        loop = asyncio.get_running_loop()
+        f = await loop.run_in_executor(None, self._open_replay)
+        if f is None:
+            return
+        try:
+            while True:
+                batch = await loop.run_in_executor(None, self._read_replay_batch, f)
+                if not batch:
+                    break
+                await self._insert(batch)
+        finally:
+            await loop.run_in_executor(None, f.close)
+        await loop.run_in_executor(None, os.remove, self._replay_path)
+        logger.info("Replayed spilled fraud logs from %s", self.spill_path)
+
+    async def _run(self) -> None:
+        try:
+            # Bounded, so a hung MongoDB cannot keep the flusher from starting
+            await asyncio.wait_for(self.ensure_indexes(), self.write_timeout)
+        except Exception as e:
+            logger.warning("Could not create fraud_logs indexes: %r", e)
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            await self._spill_async(self._take_overflow())
+            healthy = True
+            while self._buffer and healthy:
+                healthy = await self._flush(self._take(self.batch_size))
+            # After a failure, probe with the spill replay at most once per write_timeout
+            if healthy and (self._failed_at is None or time.monotonic() - self._failed_at >= self.write_timeout):
+                try:
+                    await self._replay_spill()
+                except Exception as e:
+                    logger.warning("Fraud log spill replay deferred: %r", e)
+
+
+fraud_log_writer = FraudLogWriter(
+    get_db=get_async_mongo_db,
+    batch_size=settings.FRAUD_LOG_BATCH_SIZE,
+    flush_interval=settings.FRAUD_LOG_FLUSH_INTERVAL,
+    max_buffer=settings.FRAUD_LOG_MAX_BUFFER,
+    write_timeout=settings.FRAUD_LOG_WRITE_TIMEOUT,
+    spill_path=settings.FRAUD_LOG_SPILL_PATH,
+)
+
 # You can also register startup and shutdown events in your main.py to handle the connection lifecycle
 # @app.on_event("startup")
 # async def startup_db_client():
@@ -0,0 +1,378 @@
+"""
+Monthly range partitions of the `transactions` table and their cold archive (PostgreSQL).
+
+`transactions` is partitioned by RANGE (timestamp) into one partition per UTC
+month, named transactions_yYYYYmMM. Queries bounded by time prune to the
+partitions they need, and old months leave the hot table by detaching a
+partition rather than deleting rows.
+
+    python -m app.db.partitions migrate     # convert an existing plain table
+    python -m app.db.partitions ensure      # create the coming months' partitions
+    python -m app.db.partitions archive [--drop]
+
+`ensure` also runs at API startup and then every
+TRANSACTION_PARTITION_CHECK_INTERVAL seconds in the API. Run `archive` daily
+from cron.
+`archive` exports every partition older than TRANSACTION_RETENTION_MONTHS to
+a zstd-compressed Parquet file in TRANSACTION_ARCHIVE_DIR. The export runs
+in timestamp order, one row group per ARCHIVE_ROW_GROUP_SIZE rows. `archive`
+also records each tx_id's file and row group in `archivedtransactions`, then
+detaches the partition. With --drop the detached table is dropped too;
+without it the table stays for inspection as a standalone table. Lookups by
+tx_id fall back to the archive (crud_transaction.get_by_tx_id), reading a
+single row group. Archived rows no longer appear in listings or histories;
+the volume rollups keep them.
+
+The ORM model is unchanged. On PostgreSQL the unique constraints include the
+partition key: primary key (id, timestamp), and a non-unique tx_id index.
+tx_ids are generated UUIDs, so this costs no uniqueness in practice. Other
+databases (SQLite for local runs) keep the plain table.
+"""
+import argparse
+import asyncio
+import logging
+import os
+import re
+from datetime import date, datetime, timezone
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection, Engine
+
+from app.core.config import settings
+from app.db.session import engine as default_engine
+
+logger = logging.getLogger(__name__)
+
+TABLE = "transactions"
+COLUMNS = ("id", "tx_id", "sender", "receiver", "amount", "timestamp")
+
+# Rows per Parquet row group: the unit read back for an archived lookup
+ARCHIVE_ROW_GROUP_SIZE = 50_000
+
+_PARTITION_NAME = re.compile(rf"^{TABLE}_y(\d{{4}})m(\d{{2}})$")
+
+# Indexes of the model (app/models/transaction.py); created on the parent, so every partition gets them
+_CREATE_PARENT = f"""
+CREATE TABLE {TABLE} (
+    id INTEGER GENERATED BY DEFAULT AS IDENTITY,
+    tx_id VARCHAR,
+    sender VARCHAR NOT NULL,
+    receiver VARCHAR NOT NULL,
+    amount FLOAT NOT NULL,
+    timestamp TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT now(),
+    PRIMARY KEY (id, timestamp)
+) PARTITION BY RANGE (timestamp)
+"""
+_PARENT_INDEXES = (
+    f"CREATE INDEX ix_{TABLE}_tx_id ON {TABLE} (tx_id)",
+    f"CREATE INDEX ix_{TABLE}_timestamp_id ON {TABLE} (timestamp, id)",
+    f"CREATE INDEX ix_{TABLE}_sender_timestamp_id ON {TABLE} (sender, timestamp, id)",
+    f"CREATE INDEX ix_{TABLE}_receiver_timestamp_id ON {TABLE} (receiver, timestamp, id)",
+)
+
+
+def _require_postgresql(connection: Connection) -> None:
+    if connection.dialect.name != "postgresql":
+        raise NotImplementedError(f"Table partitioning requires PostgreSQL, not {connection.dialect.name}")
+
+
+def _add_months(month: date, months: int) -> date:
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def _month_of(moment: datetime) -> date:
+    moment = moment.astimezone(timezone.utc)
+    return date(moment.year, moment.month, 1)
+
+
+def partition_name(month: date) -> str:
+    return f"{TABLE}_y{month.year:04d}m{month.month:02d}"
+
+
+def is_partitioned(connection: Connection) -> bool:
+    return bool(
+        connection.execute(
+            text(
+                "SELECT 1 FROM pg_partitioned_table p JOIN pg_class c ON c.oid = p.partrelid "
+                "WHERE c.relname = :table AND pg_table_is_visible(c.oid)"
+            ),
+            {"table": TABLE},
+        ).scalar()
+    )
+
+
+def partitions(connection: Connection) -> Dict[date, str]:
+    """
+    The attached monthly partitions by first day of month, oldest first.
+    """
+    names = connection.execute(
+        text(
+            "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+            "JOIN pg_class p ON p.oid = i.inhparent WHERE p.relname = :table AND pg_table_is_visible(p.oid)"
+        ),
+        {"table": TABLE},
+    ).scalars()
+    months = {}
+    for name in names:
+        match = _PARTITION_NAME.match(name)
+        if match:
+            months[date(int(match.group(1)), int(match.group(2)), 1)] = name
+    return dict(sorted(months.items()))
+
+
+def create_partitioned_table(connection: Connection) -> None:
+    _require_postgresql(connection)
+    connection.execute(text(_CREATE_PARENT))
+    for statement in _PARENT_INDEXES:
+        connection.execute(text(statement))
+
+
+def create_partition(connection: Connection, month: date) -> str:
+    name = partition_name(month)
+    connection.execute(
+        text(
+            f"CREATE TABLE IF NOT EXISTS {name} PARTITION OF {TABLE} "
+            f"FOR VALUES FROM ('{month.isoformat()} 00:00:00+00') TO ('{_add_months(month, 1).isoformat()} 00:00:00+00')"
+        )
+    )
+    return name
+
+
+def ensure_partitions(
+    connection: Connection, months_ahead: Optional[int] = None, now: Optional[datetime] = None
+) -> List[str]:
+    """
+    Create the partitions from the current UTC month to `months_ahead` months
+    after it. Returns the names of all partitions in that range.
+    """
+    _require_postgresql(connection)
+    months_ahead = settings.TRANSACTION_PARTITIONS_AHEAD if months_ahead is None else months_ahead
+    current = _month_of(now or datetime.now(timezone.utc))
+    return [create_partition(connection, _add_months(current, offset)) for offset in range(months_ahead + 1)]
+
+
+def migrate(connection: Connection, months_ahead: Optional[int] = None) -> Optional[str]:
+    """
+    Convert a plain `transactions` table into the partitioned one, in the caller's
+    database transaction. Writers to the table wait for the copy.
+
+    The old table, its indexes and its id sequence are renamed with an
+    `_unpartitioned` suffix and kept, to be dropped once the copy is checked.
+    Returns the old table's new name, or None if `transactions` is partitioned already.
+    """
+    _require_postgresql(connection)
+    if is_partitioned(connection):
+        return None
+    old = f"{TABLE}_unpartitioned"
+    connection.execute(text(f"LOCK TABLE {TABLE} IN EXCLUSIVE MODE"))
+    sequence = connection.execute(text("SELECT pg_get_serial_sequence(:table, 'id')"), {"table": TABLE}).scalar()
+    connection.execute(text(f"ALTER TABLE {TABLE} RENAME TO {old}"))
+    for index in connection.execute(text("SELECT indexname FROM pg_indexes WHERE tablename = :old"), {"old": old}).scalars().all():
+        connection.execute(text(f'ALTER INDEX "{index}" RENAME TO "{index}_unpartitioned"'))
+    if sequence:
+        connection.execute(text(f"ALTER SEQUENCE {sequence} RENAME TO {old}_id_seq"))
+
+    create_partitioned_table(connection)
+    first, last = connection.execute(text(f"SELECT min(timestamp), max(timestamp) FROM {old}")).one()
+    if first is not None:
+        month = _month_of(first)
+        while month <= _month_of(last):
+            create_partition(connection, month)
+            month = _add_months(month, 1)
+    ensure_partitions(connection, months_ahead)
+
+    columns = ", ".join(COLUMNS)
+    copied = connection.execute(
+        text(f"INSERT INTO {TABLE} ({columns}) OVERRIDING SYSTEM VALUE SELECT {columns} FROM {old}")
+    ).rowcount
+    connection.execute(
+        text(f"SELECT setval(pg_get_serial_sequence('{TABLE}', 'id'), (SELECT coalesce(max(id), 0) + 1 FROM {old}), false)")
+    )
+    logger.info("Copied %d transactions into the partitioned table; the old table is %s", copied, old)
+    return old
+
+
+def _pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError:
+        raise RuntimeError("Archiving partitions requires pyarrow (pip install pyarrow)")
+    return pyarrow, pyarrow.parquet
+
+
+def archive_partition(connection: Connection, name: str, archive_dir: str, drop: bool = False) -> Tuple[str, int]:
+    """
+    Export partition `name` to `archive_dir`/`name`.parquet, index its tx_ids
+    in `archivedtransactions` and detach it (drop it with `drop`), all in the
+    caller's database transaction. Returns the file path and the row count.
+
+    The partition is share-locked for the export, so the file, the index and
+    the detached rows match. A failure before commit leaves the partition
+    attached, and a rerun replaces the file and the index entries.
+    """
+    _require_postgresql(connection)
+    pa, pq = _pyarrow()
+    schema = pa.schema(
+        [
+            ("id", pa.int64()),
+            ("tx_id", pa.string()),
+            ("sender", pa.string()),
+            ("receiver", pa.string()),
+            ("amount", pa.float64()),
+            ("timestamp", pa.timestamp("us", tz="UTC")),
+        ]
+    )
+
+    os.makedirs(archive_dir, exist_ok=True)
+    path = os.path.abspath(os.path.join(archive_dir, f"{name}.parquet"))
+    partial = f"{path}.partial"
+    connection.execute(text(f"LOCK TABLE {name} IN SHARE MODE"))
+
+    rows = 0
+    result = connection.execution_options(stream_results=True).execute(
+        text(f"SELECT {', '.join(COLUMNS)} FROM {name} ORDER BY timestamp, id")
+    )
+    try:
+        with pq.ParquetWriter(partial, schema, compression="zstd") as writer:
+            for chunk in result.partitions(ARCHIVE_ROW_GROUP_SIZE):
+                writer.write_table(
+                    pa.Table.from_pydict({column: [row[i] for row in chunk] for i, column in enumerate(COLUMNS)}, schema),
+                    row_group_size=ARCHIVE_ROW_GROUP_SIZE,
+                )
+                rows += len(chunk)
+    except BaseException:
+        if os.path.exists(partial):
+            os.remove(partial)
+        raise
+    finally:
+        result.close()
+    written = pq.ParquetFile(partial).metadata.num_rows
+    if written != rows:
+        os.remove(partial)
+        raise RuntimeError(f"Archive of {name} has {written} rows, expected {rows}")
+    os.replace(partial, path)
+
+    # Row groups follow the export order, so row_number() locates each tx_id without reading the file back
+    connection.execute(text("DELETE FROM archivedtransactions WHERE partition = :name"), {"name": name})
+    indexed = connection.execute(
+        text(
+            "INSERT INTO archivedtransactions (tx_id, partition, path, row_group) "
+            "SELECT tx_id, :name, :path, (row_number() OVER (ORDER BY timestamp, id) - 1) / :group_size "
+            f"FROM {name} WHERE tx_id IS NOT NULL"
+        ),
+        {"name": name, "path": path, "group_size": ARCHIVE_ROW_GROUP_SIZE},
+    ).rowcount
+    connection.execute(text(f"ALTER TABLE {TABLE} DETACH PARTITION {name}"))
+    if drop:
+        connection.execute(text(f"DROP TABLE {name}"))
+    logger.info("Archived %s: %d rows (%d indexed) to %s%s", name, rows, indexed, path, ", dropped" if drop else "")
+    return path, rows
+
+
+def archive_expired(
+    bind: Engine,
+    retention_months: Optional[int] = None,
+    archive_dir: Optional[str] = None,
+    drop: bool = False,
+    now: Optional[datetime] = None,
+) -> Dict[str, int]:
+    """
+    Archive every partition whose month ended more than `retention_months`
+    months before the current one, one database transaction per partition.
+    Returns the archived row count per partition.
+    """
+    retention_months = settings.TRANSACTION_RETENTION_MONTHS if retention_months is None else retention_months
+    archive_dir = archive_dir or settings.TRANSACTION_ARCHIVE_DIR
+    cutoff = _add_months(_month_of(now or datetime.now(timezone.utc)), -retention_months)
+    with bind.connect() as connection:
+        _require_postgresql(connection)
+        expired = [name for month, name in partitions(connection).items() if month < cutoff]
+    archived = {}
+    for name in expired:
+        with bind.begin() as connection:
+            archived[name] = archive_partition(connection, name, archive_dir, drop=drop)[1]
+    return archived
+
+
+def ensure_transaction_partitions(bind: Engine = default_engine) -> None:
+    """
+    Create the coming months' partitions when `transactions` is partitioned.
+    A no-op on other databases.
+    """
+    if bind.dialect.name != "postgresql":
+        return
+    with bind.begin() as connection:
+        if is_partitioned(connection):
+            ensure_partitions(connection)
+
+
+class PartitionMaintainer:
+    """
+    Runs ensure_transaction_partitions every `interval` seconds, so a
+    long-running API keeps TRANSACTION_PARTITIONS_AHEAD months of partitions
+    ahead of the clock without a restart or cron. Failures are logged and
+    retried on the next run.
+    """
+
+    def __init__(self, interval: float, bind: Engine = default_engine):
+        self.interval = interval
+        self.bind = bind
+        self._task: Optional[asyncio.Task] = None
+
+    async def check(self) -> None:
+        try:
+            await asyncio.get_running_loop().run_in_executor(None, ensure_transaction_partitions, self.bind)
+        except Exception:
+            logger.exception("Could not create upcoming transaction partitions")
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            await self.check()
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.ensure_future(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+partition_maintainer = PartitionMaintainer(interval=settings.TRANSACTION_PARTITION_CHECK_INTERVAL)
+
+
+def main() -> None:
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("migrate", help="partition an existing plain transactions table")
+    commands.add_parser("ensure", help="create partitions up to TRANSACTION_PARTITIONS_AHEAD months ahead")
+    archive = commands.add_parser("archive", help="archive partitions older than the retention window")
+    archive.add_argument("--retention-months", type=int, default=settings.TRANSACTION_RETENTION_MONTHS)
+    archive.add_argument("--archive-dir", default=settings.TRANSACTION_ARCHIVE_DIR)
+    archive.add_argument("--drop", action="store_true", help="drop detached partitions instead of keeping them")
+    args = parser.parse_args()
+
+    if args.command == "archive":
+        archived = archive_expired(default_engine, args.retention_months, args.archive_dir, drop=args.drop)
+        logger.info("Archived partitions: %s", archived or "none")
+        return
+    with default_engine.begin() as connection:
+        if args.command == "migrate":
+            old = migrate(connection)
+            logger.info("transactions is partitioned" + (f"; drop {old} once checked" if old else " already"))
+        else:
+            logger.info("Partitions ready: %s", ", ".join(ensure_partitions(connection)))
+
+
+if __name__ == "__main__":
+    main()
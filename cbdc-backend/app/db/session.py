@@ -1,17 +1,308 @@
-from sqlalchemy import create_engine
+"""
+Database engines, sessions and the FastAPI session dependencies.
+
+Writes go to the primary (DATABASE_URL / ASYNC_DATABASE_URL). Read-only
+endpoints use get_read_db / get_async_read_db. These route to the read
+replica (DATABASE_READ_URL / ASYNC_DATABASE_READ_URL) when one is configured,
+its measured lag is within REPLICA_MAX_LAG_SECONDS and the client has not
+written recently. Read-write dependencies set a cookie with the time of the
+client's last write. Reads that arrive within REPLICA_READ_AFTER_WRITE_SECONDS
+of it (or within the current lag, if larger) go to the primary, so clients
+read their own writes. Without a replica configured, reads use the primary
+engines.
+
+Every pool reports how long checkouts wait for a connection and how long
+connections stay checked out (db_pool_* metrics), to size the pools from data.
+"""
+import asyncio
+import logging
+import time
+from typing import Optional
+
+from fastapi import Request, Response
+from sqlalchemy import create_engine, event, exc, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
 
 from app.core.config import settings
+from app.core.metrics import Counter, Gauge, Histogram
+
+logger = logging.getLogger(__name__)
+
+POOL_WAIT = Histogram("db_pool_wait_seconds", "Time spent waiting for a pooled connection", labelnames=("pool",))
+POOL_CHECKOUT = Histogram(
+    "db_pool_checkout_seconds", "Time a connection stays checked out of the pool", labelnames=("pool",)
+)
+POOL_CHECKED_OUT = Gauge("db_pool_checked_out", "Connections currently checked out", labelnames=("pool",))
+POOL_TIMEOUTS = Counter("db_pool_timeouts_total", "Checkouts that gave up after DB_POOL_TIMEOUT", labelnames=("pool",))
+READ_ROUTES = Counter(
+    "db_read_routes_total", "Read-only sessions by target and routing reason", labelnames=("target", "reason")
+)
+REPLICA_LAG = Gauge("db_replica_lag_seconds", "Last measured replication lag of the read replica")
+
+# Cookie holding the Unix time of the client's last write
+LAST_WRITE_COOKIE = "db_last_write"
+
+# Seconds since the standby last replayed WAL, 0 when it has replayed all it received
+REPLICA_LAG_QUERY = text(
+    "SELECT CASE WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+    "ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()) END"
+)
+
+
+class _TimedPool:
+    """
+    Pool mixin timing how long `_do_get` waits for a connection.
+    """
+
+    metrics_label = ""
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            POOL_TIMEOUTS.labels(self.metrics_label).inc()
+            raise
+        finally:
+            POOL_WAIT.labels(self.metrics_label).observe(time.perf_counter() - started)
+
+
+def _timed_pool_class(base: type, label: str) -> type:
+    # A class per pool, so the label survives pool.recreate() on dispose
+    return type(f"Timed{base.__name__}", (_TimedPool, base), {"metrics_label": label})
+
+
+def _instrument(engine: Engine, label: str) -> None:
+    checked_out = POOL_CHECKED_OUT.labels(label)
+    checkout_time = POOL_CHECKOUT.labels(label)
+
+    @event.listens_for(engine, "checkout")
+    def _on_checkout(dbapi_connection, record, proxy):
+        record.info["checked_out_at"] = time.perf_counter()
+        checked_out.inc()
+
+    @event.listens_for(engine, "checkin")
+    def _on_checkin(dbapi_connection, record):
+        started = record.info.pop("checked_out_at", None)
+        if started is not None:
+            checkout_time.observe(time.perf_counter() - started)
+            checked_out.dec()
 
-engine = create_engine(settings.DATABASE_URL, pool_pre_ping=True)
+
+def _engine_options(url: str, label: str, pool_size: int, max_overflow: int, is_async: bool) -> dict:
+    options = {"pool_pre_ping": True}
+    if url.startswith("sqlite"):
+        # SQLite (local runs, benchmarks) uses SQLAlchemy's unpooled default; a
+        # request's sync session may be opened and closed on different threadpool threads
+        if not is_async:
+            options["connect_args"] = {"check_same_thread": False}
+        return options
+    options.update(
+        poolclass=_timed_pool_class(AsyncAdaptedQueuePool if is_async else QueuePool, label),
+        pool_size=pool_size,
+        max_overflow=max_overflow,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+        pool_recycle=settings.DB_POOL_RECYCLE,
+    )
+    return options
+
+
+def _create_engine(url: str, label: str, pool_size: int, max_overflow: int) -> Engine:
+    engine = create_engine(url, **_engine_options(url, label, pool_size, max_overflow, is_async=False))
+    _instrument(engine, label)
+    return engine
+
+
+def _create_async_engine(url: str, label: str, pool_size: int, max_overflow: int):
+    engine = create_async_engine(url, **_engine_options(url, label, pool_size, max_overflow, is_async=True))
+    _instrument(engine.sync_engine, label)
+    return engine
+
+
+engine = _create_engine(settings.DATABASE_URL, "primary", settings.DB_POOL_SIZE, settings.DB_MAX_OVERFLOW)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
-def get_db():
+async_engine = _create_async_engine(
+    settings.ASYNC_DATABASE_URL, "async_primary", settings.DB_POOL_SIZE, settings.DB_MAX_OVERFLOW
+)
+AsyncSessionLocal = sessionmaker(
+    bind=async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False
+)
+
+# Reader engines; the primary's when no replica is configured
+read_engine = engine
+ReadSessionLocal = SessionLocal
+if settings.DATABASE_READ_URL:
+    read_engine = _create_engine(
+        settings.DATABASE_READ_URL, "replica", settings.DB_READ_POOL_SIZE, settings.DB_READ_MAX_OVERFLOW
+    )
+    ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=read_engine)
+
+async_read_engine = async_engine
+AsyncReadSessionLocal = AsyncSessionLocal
+if settings.ASYNC_DATABASE_READ_URL:
+    async_read_engine = _create_async_engine(
+        settings.ASYNC_DATABASE_READ_URL, "async_replica", settings.DB_READ_POOL_SIZE, settings.DB_READ_MAX_OVERFLOW
+    )
+    AsyncReadSessionLocal = sessionmaker(
+        bind=async_read_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False
+    )
+
+
+class ReplicaLagMonitor:
     """
-    FastAPI dependency that provides a SQLAlchemy database session.
+    Measures the replica's replication lag every `interval` seconds.
+
+    The replica is used only while the last measurement succeeded and was
+    within `max_lag`; until the first check, and after a failed one, reads
+    go to the primary.
     """
+
+    def __init__(self, max_lag: float, interval: float):
+        self.max_lag = max_lag
+        self.interval = interval
+        self.lag: Optional[float] = None
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def healthy(self) -> bool:
+        return self.lag is not None and self.lag <= self.max_lag
+
+    def _measure(self, target: Engine) -> float:
+        if target.dialect.name != "postgresql":
+            return 0.0
+        with target.connect() as connection:
+            return float(connection.execute(REPLICA_LAG_QUERY).scalar() or 0.0)
+
+    async def check(self) -> Optional[float]:
+        try:
+            if async_read_engine is not async_engine:
+                self.lag = await self._measure_async()
+            else:
+                self.lag = await asyncio.get_running_loop().run_in_executor(None, self._measure, read_engine)
+        except Exception as e:
+            logger.warning("Replica lag check failed, reading from the primary: %s", e)
+            self.lag = None
+        else:
+            REPLICA_LAG.set(self.lag)
+            if not self.healthy:
+                logger.warning("Replica lag %.1fs exceeds %.1fs, reading from the primary", self.lag, self.max_lag)
+        return self.lag
+
+    async def _measure_async(self) -> float:
+        if async_read_engine.dialect.name != "postgresql":
+            return 0.0
+        async with async_read_engine.connect() as connection:
+            return float((await connection.execute(REPLICA_LAG_QUERY)).scalar() or 0.0)
+
+    async def _run(self) -> None:
+        while True:
+            await self.check()
+            await asyncio.sleep(self.interval)
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.ensure_future(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def status(self) -> dict:
+        return {"replica_configured": True, "replica_lag_seconds": self.lag, "replica_healthy": self.healthy, "max_lag_seconds": self.max_lag}
+
+
+replica_monitor: Optional[ReplicaLagMonitor] = None
+if read_engine is not engine or async_read_engine is not async_engine:
+    replica_monitor = ReplicaLagMonitor(
+        max_lag=settings.REPLICA_MAX_LAG_SECONDS, interval=settings.REPLICA_LAG_CHECK_INTERVAL
+    )
+
+
+def use_replica(request: Request) -> bool:
+    """
+    Whether this request's reads may go to the replica.
+    """
+    if replica_monitor is None:
+        return False
+    if not replica_monitor.healthy:
+        READ_ROUTES.labels("primary", "lag").inc()
+        return False
+    try:
+        last_write = float(request.cookies.get(LAST_WRITE_COOKIE, "0"))
+    except ValueError:
+        last_write = 0.0
+    if time.time() - last_write < max(settings.REPLICA_READ_AFTER_WRITE_SECONDS, replica_monitor.lag):
+        READ_ROUTES.labels("primary", "recent_write").inc()
+        return False
+    READ_ROUTES.labels("replica", "ok").inc()
+    return True
+
+
+def mark_write(response: Response) -> None:
+    """
+    Pin the client's reads to the primary for the read-after-write window.
+    """
+    response.set_cookie(LAST_WRITE_COOKIE, f"{time.time():.3f}", httponly=True, samesite="lax")
+
+
+def get_db(response: Response):
+    """
+    FastAPI dependency that provides a read-write SQLAlchemy database session (primary).
+    """
+    mark_write(response)
     db = SessionLocal()
     try:
         yield db
     finally:
-        db.close() 
\ No newline at end of file
+        db.close()
+
+async def get_async_db(response: Response):
+    """
+    FastAPI dependency that provides a read-write async SQLAlchemy database session (primary).
+    """
+    mark_write(response)
+    async with AsyncSessionLocal() as db:
+        yield db
+
+def get_read_db(request: Request):
+    """
+    FastAPI dependency that provides a read-only SQLAlchemy database session,
+    on the replica when it is safe to read from.
+    """
+    db = (ReadSessionLocal if use_replica(request) else SessionLocal)()
+    try:
+        yield db
+    finally:
+        db.close()
+
+async def get_async_read_db(request: Request):
+    """
+    FastAPI dependency that provides a read-only async SQLAlchemy database
+    session, on the replica when it is safe to read from.
+    """
+    async with async_read_sessionmaker(request)() as db:
+        yield db
+
+def async_read_sessionmaker(request: Request) -> sessionmaker:
+    """
+    The async session factory for this request's reads, for sessions opened
+    outside a dependency (e.g. page by page while streaming).
+    """
+    return AsyncReadSessionLocal if use_replica(request) else AsyncSessionLocal
+
+async def dispose_engines() -> None:
+    await async_engine.dispose()
+    if async_read_engine is not async_engine:
+        await async_read_engine.dispose()
+    engine.dispose()
+    if read_engine is not engine:
+        read_engine.dispose()
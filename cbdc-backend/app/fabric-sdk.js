@@ -44,56 +44,124 @@ async function evaluateTransaction(functionName, args) {
     return result.toString();
 }
 
+// Shape chaincode output the same way for the CLI and the worker
+async function runFunction(functionName, args, contract) {
+    let result;
+    if (functionName === 'Transfer') {
+        return contract ? (await contract.submitTransaction(functionName, ...args)).toString()
+                        : await submitTransaction(functionName, args);
+    } else if (functionName === 'InitLedger') {
+        // No args
+        return contract ? (await contract.submitTransaction(functionName)).toString()
+                        : await submitTransaction(functionName, []);
+    } else if (['QueryBalance', 'QueryHistory', 'QueryHistoryPage', 'QueryAccount'].includes(functionName)) {
+        result = contract ? (await contract.evaluateTransaction(functionName, ...args)).toString()
+                          : await evaluateTransaction(functionName, args);
+    } else {
+        const err = new Error('Unsupported function: ' + functionName);
+        err.unsupported = true;
+        throw err;
+    }
+    if (functionName === 'QueryHistory') {
+        try {
+            return JSON.stringify(JSON.parse(result));
+        } catch (e) {
+            return '[]';
+        }
+    }
+    if (functionName === 'QueryHistoryPage') {
+        try {
+            return JSON.stringify(JSON.parse(result));
+        } catch (e) {
+            return JSON.stringify({ records: [], bookmark: '' });
+        }
+    }
+    if (functionName === 'QueryAccount') {
+        try {
+            return JSON.stringify(JSON.parse(result));
+        } catch (e) {
+            // If not valid JSON, return as string
+            return JSON.stringify({ raw: result });
+        }
+    }
+    return result;
+}
+
+// Long-lived worker for the FastAPI gateway pool (app/services/ledger_gateway.py).
+// Holds one gateway connection and speaks JSON lines on stdin/stdout:
+//   request:  {"id": 1, "method": "QueryBalance", "args": ["BankA"]}
+//   response: {"id": 1, "result": "1000000"} or {"id": 1, "error": "..."}
+// Requests are handled concurrently, so responses may arrive out of order.
+async function serve() {
+    const walletPath = path.join(process.cwd(), 'wallet');
+    const wallet = await Wallets.newFileSystemWallet(walletPath);
+
+    const gateway = new Gateway();
+    await gateway.connect(ccp, {
+        wallet,
+        identity: 'appUser',
+        discovery: { enabled: true, asLocalhost: true }
+    });
+    const network = await gateway.getNetwork('fintrust-channel');
+    const contract = network.getContract('cbdc');
+
+    const reply = (message) => process.stdout.write(JSON.stringify(message) + '\n');
+    const rl = require('readline').createInterface({ input: process.stdin });
+    rl.on('line', async (line) => {
+        let request;
+        try {
+            request = JSON.parse(line);
+        } catch (e) {
+            return reply({ id: null, error: 'Malformed request: ' + e.message });
+        }
+        try {
+            const result = request.method === 'Ping'
+                ? 'pong'
+                : await runFunction(request.method, request.args || [], contract);
+            reply({ id: request.id, result });
+        } catch (err) {
+            reply({ id: request.id, error: err.message });
+        }
+    });
+    rl.on('close', async () => {
+        await gateway.disconnect();
+        process.exit(0);
+    });
+}
+
 // CLI handler for subprocess calls from FastAPI
 if (require.main === module) {
     const [,, functionName, ...args] = process.argv;
     (async () => {
+        if (functionName === '--worker') {
+            try {
+                await serve();
+            } catch (err) {
+                console.error(JSON.stringify({ error: err.message }));
+                process.exit(1);
+            }
+            return;
+        }
         try {
-            let result;
-            if (functionName === 'Transfer') {
-                result = await submitTransaction(functionName, args);
-                console.log(result);
-            } else if (functionName === 'QueryBalance') {
-                result = await evaluateTransaction(functionName, args);
-                console.log(result);
-            } else if (functionName === 'QueryHistory') {
-                result = await evaluateTransaction(functionName, args);
-                try {
-                    const parsed = JSON.parse(result);
-                    console.log(JSON.stringify(parsed));
-                } catch (e) {
-                    console.log('[]');
-                }
-            } else if (functionName === 'InitLedger') {
-                // No args
-                result = await submitTransaction(functionName, []);
-                console.log(result);
-            } else if (functionName === 'QueryAccount') {
-                // args: [account]
-                result = await evaluateTransaction(functionName, args);
-                try {
-                    const parsed = JSON.parse(result);
-                    console.log(JSON.stringify(parsed));
-                } catch (e) {
-                    // If not valid JSON, print as string
-                    console.log(JSON.stringify({ raw: result }));
-                }
-            } else {
+            console.log(await runFunction(functionName, args));
+        } catch (err) {
+            if (err.unsupported) {
                 // Print usage/help message
                 console.error(JSON.stringify({
-                    error: 'Unsupported function: ' + functionName,
-                    usage: 'node fabric-sdk.js [Transfer|QueryBalance|QueryHistory|InitLedger|QueryAccount] ...args',
+                    error: err.message,
+                    usage: 'node fabric-sdk.js [--worker|Transfer|QueryBalance|QueryHistory|QueryHistoryPage|InitLedger|QueryAccount] ...args',
                     examples: [
+                        'node fabric-sdk.js --worker',
                         'node fabric-sdk.js Transfer BankA BankB 1000',
                         'node fabric-sdk.js QueryBalance BankA',
                         'node fabric-sdk.js QueryHistory BankA',
+                        'node fabric-sdk.js QueryHistoryPage BankA 500 ""',
                         'node fabric-sdk.js InitLedger',
                         'node fabric-sdk.js QueryAccount BankA'
                     ]
                 }));
                 process.exit(2);
             }
-        } catch (err) {
             // Print error as JSON to stderr
             console.error(JSON.stringify({ error: err.message }));
             process.exit(1);
@@ -101,4 +169,4 @@ if (require.main === module) {
     })();
 }
 
-module.exports = { submitTransaction, evaluateTransaction };
\ No newline at end of file
+module.exports = { submitTransaction, evaluateTransaction, runFunction };
\ No newline at end of file
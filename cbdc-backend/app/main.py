@@ -1,16 +1,173 @@
 # cbdc-backend/app/main.py
-from fastapi import FastAPI
+import logging
+
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import JSONResponse, PlainTextResponse
 from app.api.api import api_router
+from app.core import metrics
+from app.core.auth import jwks_cache
+from app.core.config import settings
+from app.core.profiling import slow_request_profiler
+from app.core.tracing import RequestMetricsMiddleware
+from app.db.partitions import partition_maintainer
+from app.db.mongo_client import async_mongodb, fraud_log_writer
+from app.db.session import SessionLocal, dispose_engines, replica_monitor
 from app.mbridge import router as mbridge_router
+from app.services.compliance import report_renderer, watchlist_screener
+from app.services.feature_store import feature_store
+from app.services.fraud_detection import fraud_batcher, get_model
+from app.services.fraud_model import FraudModelError
+from app.services.ledger_gateway import ledger_gateway
+
+logger = logging.getLogger(__name__)
 
 app = FastAPI(title="FinTrust CBDC Backend", version="1.0.0")
 
+# Scoring without a loaded model is a service outage, not a request error
+@app.exception_handler(FraudModelError)
+async def fraud_model_unavailable(request: Request, exc: FraudModelError):
+    return JSONResponse(status_code=503, content={"detail": f"Fraud scoring is unavailable: {exc}"})
+
+# Per-route request count, latency, in-flight and error metrics, plus the
+# optional slow-request profiler (SLOW_REQUEST_THRESHOLD_MS)
+app.add_middleware(RequestMetricsMiddleware, profiler=slow_request_profiler)
+
+@app.on_event("startup")
+def load_fraud_model():
+    # Report a missing model artifact at startup rather than on the first transfer.
+    # The API keeps serving: fraud-scored endpoints answer 503 until the artifact
+    # is in place, since get_model() retries the load on every call until it succeeds.
+    try:
+        get_model()
+    except FraudModelError:
+        logger.critical("Fraud model %s could not be loaded; build it with `python train_model.py`", settings.FRAUD_MODEL_PATH)
+
+@app.on_event("startup")
+def start_ledger_gateway():
+    ledger_gateway.start()
+
+@app.on_event("shutdown")
+def stop_ledger_gateway():
+    ledger_gateway.stop()
+
+@app.on_event("startup")
+def start_jwks_refresh():
+    jwks_cache.start()
+
+@app.on_event("shutdown")
+def stop_jwks_refresh():
+    jwks_cache.stop()
+
+@app.on_event("startup")
+async def start_partition_maintainer():
+    await partition_maintainer.check()
+    partition_maintainer.start()
+
+@app.on_event("shutdown")
+async def stop_partition_maintainer():
+    await partition_maintainer.stop()
+
+@app.on_event("startup")
+def warm_feature_store():
+    db = SessionLocal()
+    try:
+        logger.info("Warmed velocity features from %d recent transactions", feature_store.warm_start(db))
+    except Exception:
+        logger.exception("Could not warm the velocity feature store; starting cold")
+    finally:
+        db.close()
+
+@app.on_event("startup")
+async def start_fraud_batcher():
+    await fraud_batcher.start()
+
+@app.on_event("shutdown")
+async def stop_fraud_batcher():
+    await fraud_batcher.stop()
+
+@app.on_event("startup")
+def start_report_renderer():
+    report_renderer.start()
+
+@app.on_event("shutdown")
+def stop_report_renderer():
+    report_renderer.stop()
+
+@app.on_event("startup")
+def start_watchlist_screener():
+    watchlist_screener.start()
+
+@app.on_event("shutdown")
+def stop_watchlist_screener():
+    watchlist_screener.stop()
+
+@app.on_event("startup")
+async def start_fraud_log_writer():
+    await fraud_log_writer.start()
+
+@app.on_event("shutdown")
+async def stop_fraud_log_writer():
+    await fraud_log_writer.stop()
+
+@app.on_event("startup")
+def start_slow_request_profiler():
+    if slow_request_profiler is not None:
+        slow_request_profiler.start()
+
+@app.on_event("shutdown")
+def stop_slow_request_profiler():
+    if slow_request_profiler is not None:
+        slow_request_profiler.stop()
+
+@app.on_event("startup")
+async def start_replica_monitor():
+    if replica_monitor is not None:
+        await replica_monitor.check()
+        replica_monitor.start()
+
+@app.on_event("shutdown")
+async def stop_replica_monitor():
+    if replica_monitor is not None:
+        await replica_monitor.stop()
+
+@app.on_event("shutdown")
+async def close_async_clients():
+    await dispose_engines()
+    async_mongodb.close()
+
 # Root health check endpoint
 def health_check():
     return {"status": "ok", "message": "FinTrust CBDC Backend is running"}
 
 app.add_api_route("/", health_check, methods=["GET"], tags=["health"])
 
+# Prometheus scrape endpoint
+def prometheus_metrics():
+    return PlainTextResponse(metrics.render_prometheus(), media_type="text/plain; version=0.0.4")
+
+app.add_api_route("/metrics", prometheus_metrics, methods=["GET"], tags=["health"], include_in_schema=False)
+
+# Stacks captured for the most recent slow requests
+def slow_requests():
+    if slow_request_profiler is None:
+        raise HTTPException(status_code=404, detail="Slow-request profiling is disabled")
+    return slow_request_profiler.recent()
+
+app.add_api_route("/metrics/slow-requests", slow_requests, methods=["GET"], tags=["health"])
+
+# Connection pool wait/checkout metrics, read routing and replica lag
+def db_metrics():
+    status = replica_monitor.status() if replica_monitor is not None else {"replica_configured": False}
+    return {**metrics.snapshot(prefix="db_"), **status}
+
+app.add_api_route("/metrics/db", db_metrics, methods=["GET"], tags=["health"])
+
+# Loaded watchlist version and size, reload outcomes and screening latency
+def watchlist_metrics():
+    return {**metrics.snapshot(prefix="watchlist_"), **watchlist_screener.status()}
+
+app.add_api_route("/metrics/watchlist", watchlist_metrics, methods=["GET"], tags=["health"])
+
 # Include main API routers (transactions, fraud_alerts, compliance)
 app.include_router(api_router, prefix="/api/v1")
 
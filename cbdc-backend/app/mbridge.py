@@ -1,9 +1,28 @@
 # cbdc-backend/backend/mbridge.py
-from fastapi import APIRouter
+import logging
+from fastapi import APIRouter, Depends, HTTPException
 from pydantic import BaseModel
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+from typing import List, Sequence
+
+from app.crud import crud_rollup
+from app.db.session import get_db
+from app.services.fx import UnsupportedCurrency, fx_table
+from app.services.netting import netting_engine
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
+def _record_corridors(db: Session, volumes: Sequence[dict]) -> None:
+    # Settlement has already happened; a rollup write failure must not fail the response
+    try:
+        crud_rollup.record_corridors(db, volumes)
+    except SQLAlchemyError:
+        db.rollback()
+        logger.exception("Could not record mBridge corridor rollups for %d corridors", len(volumes))
+
 class CrossBorderRequest(BaseModel):
     tx_id: str
     from_currency: str
@@ -12,18 +31,108 @@ class CrossBorderRequest(BaseModel):
     sender: str
     receiver: str
 
+def _netting_payment(req: CrossBorderRequest) -> dict:
+    return {
+        "tx_id": req.tx_id,
+        "sender": req.sender,
+        "receiver": req.receiver,
+        "from_currency": req.from_currency,
+        "to_currency": req.to_currency,
+        "amount": req.amount,
+    }
+
 @router.post("/mbridge")
-def mbridge_settlement(req: CrossBorderRequest):
-    # Simulate cedi-naira settlement
-    if req.from_currency == "GHS" and req.to_currency == "NGN":
-        # Mock conversion rate
-        naira_amount = req.amount * 70
-        return {
-            "tx_id": req.tx_id,
-            "from_currency": req.from_currency,
-            "to_currency": req.to_currency,
-            "original_amount": req.amount,
-            "settled_amount": naira_amount,
-            "status": "settled"
-        }
-    return {"status": "unsupported currency pair"}
\ No newline at end of file
+def mbridge_settlement(req: CrossBorderRequest, db: Session = Depends(get_db)):
+    """
+    Settle one cross-border payment gross, at the configured FX rate.
+    """
+    try:
+        rate = fx_table.rate(req.from_currency, req.to_currency)
+    except UnsupportedCurrency:
+        return {"status": "unsupported currency pair"}
+    _record_corridors(db, [{
+        "from_currency": req.from_currency,
+        "to_currency": req.to_currency,
+        "count": 1,
+        "amount": req.amount,
+        "settled_amount": req.amount * rate,
+    }])
+    return {
+        "tx_id": req.tx_id,
+        "from_currency": req.from_currency,
+        "to_currency": req.to_currency,
+        "original_amount": req.amount,
+        "settled_amount": req.amount * rate,
+        "status": "settled"
+    }
+
+@router.get("/mbridge/rates")
+def get_fx_rates():
+    """
+    The FX table: units of each currency per unit of the base currency.
+    """
+    base = fx_table.code(fx_table.base)
+    return {
+        "base": fx_table.base,
+        "rates": {currency: float(fx_table.matrix[base, code]) for currency, code in fx_table.codes.items()},
+    }
+
+@router.post("/mbridge/window")
+def queue_for_netting(req: CrossBorderRequest, db: Session = Depends(get_db)):
+    """
+    Queue a cross-border payment in the open settlement window.
+
+    It is settled as part of the window's net transfers when the window closes.
+    """
+    try:
+        queued = netting_engine.submit(db, [_netting_payment(req)])
+    except UnsupportedCurrency:
+        return {"status": "unsupported currency pair"}
+    return {
+        "tx_id": req.tx_id,
+        "from_currency": req.from_currency,
+        "to_currency": req.to_currency,
+        "original_amount": req.amount,
+        "settled_amount": queued["settled_amounts"][0],
+        "window_id": queued["window_id"],
+        "status": "queued"
+    }
+
+@router.post("/mbridge/window/batch")
+def queue_batch_for_netting(reqs: List[CrossBorderRequest], db: Session = Depends(get_db)):
+    """
+    Queue many cross-border payments in the open settlement window.
+
+    All currencies are checked before any payment is queued, and the
+    payments are queued in one database transaction.
+    """
+    if not reqs:
+        return {"queued": 0, "window_id": None, "status": "queued"}
+    try:
+        queued = netting_engine.submit(db, [_netting_payment(req) for req in reqs])
+    except UnsupportedCurrency as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"queued": len(reqs), "window_id": queued["window_id"], "status": "queued"}
+
+@router.get("/mbridge/window")
+def get_settlement_window(db: Session = Depends(get_db)):
+    """
+    Size of the open settlement window.
+    """
+    return netting_engine.status(db)
+
+@router.post("/mbridge/window/close")
+def close_settlement_window(db: Session = Depends(get_db)):
+    """
+    Close the open settlement window and return its multilateral net transfers.
+
+    The window's gross volumes are added to the corridor rollups. If a
+    queued currency is no longer in the FX table, the window stays open and
+    409 is returned.
+    """
+    try:
+        settlement = netting_engine.close(db)
+    except UnsupportedCurrency as e:
+        raise HTTPException(status_code=409, detail=f"Settlement window not closed: {e}")
+    _record_corridors(db, settlement["corridor_volumes"])
+    return settlement
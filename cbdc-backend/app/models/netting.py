@@ -0,0 +1,34 @@
+from sqlalchemy import Boolean, Column, DateTime, Float, Index, Integer, String
+from sqlalchemy.sql import func
+
+from app.db.base import Base
+
+# Settlement windows and their queued mBridge payments are shared by every API
+# process through these tables; app/crud/crud_netting.py handles the locking.
+
+class NettingWindow(Base):
+    """
+    A settlement window; its id is the window_id returned to clients.
+    """
+    id = Column(Integer, primary_key=True)
+    # True while the window is open, NULL once closed: the unique constraint allows one open window
+    is_open = Column(Boolean, unique=True, nullable=True, default=True)
+    opened_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+    closed_at = Column(DateTime(timezone=True), nullable=True)
+
+class NettingPayment(Base):
+    """
+    A cross-border payment queued for netting in window `window_id`.
+    """
+    __table_args__ = (
+        Index("ix_nettingpayments_window_id_id", "window_id", "id"),
+    )
+
+    id = Column(Integer, primary_key=True)
+    window_id = Column(Integer, nullable=False)
+    tx_id = Column(String, nullable=False, index=True)
+    sender = Column(String, nullable=False)
+    receiver = Column(String, nullable=False)
+    from_currency = Column(String, nullable=False)
+    to_currency = Column(String, nullable=False)
+    amount = Column(Float, nullable=False)
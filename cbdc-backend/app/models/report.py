@@ -0,0 +1,43 @@
+from sqlalchemy import Column, Integer, String, DateTime, Index, Text
+
+from app.db.base import Base
+from app.models.transaction import generate_uuid, utcnow
+
+class ReportJob(Base):
+    """
+    A bulk AML report covering every transaction matching a filter.
+    """
+    __mapper_args__ = {"eager_defaults": True}
+
+    id = Column(Integer, primary_key=True, index=True)
+    job_id = Column(String, unique=True, index=True, default=generate_uuid)
+    # Filter: transactions sent or received by `account` within [start, end)
+    account = Column(String, nullable=True)
+    start = Column(DateTime(timezone=True), nullable=True)
+    end = Column(DateTime(timezone=True), nullable=True)
+    status = Column(String, nullable=False, default="pending")  # pending, running, completed, failed
+    transaction_count = Column(Integer, nullable=True)
+    path = Column(String, nullable=True)
+    size_bytes = Column(Integer, nullable=True)
+    error = Column(Text, nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=utcnow())
+    completed_at = Column(DateTime(timezone=True), nullable=True)
+
+class ReportCatalog(Base):
+    """
+    One row per report PDF on disk, so listing never has to scan the directory.
+    """
+    __mapper_args__ = {"eager_defaults": True}
+    # Keyset pagination, newest first
+    __table_args__ = (
+        Index("ix_reportcatalogs_created_at_id", "created_at", "id"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    # Set for single-transaction reports
+    tx_id = Column(String, nullable=True, index=True)
+    # Set for bulk job reports
+    job_id = Column(String, nullable=True, index=True)
+    path = Column(String, unique=True, nullable=False)
+    size_bytes = Column(Integer, nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=utcnow())
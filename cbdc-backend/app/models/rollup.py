@@ -0,0 +1,56 @@
+from sqlalchemy import Column, Date, DateTime, Float, Integer, String, UniqueConstraint
+
+from app.db.base import Base
+
+# Rollups are maintained incrementally by app/crud/crud_rollup.py in the same
+# database transaction as the rows they summarize. Their unique keys are the
+# upsert targets and also serve the range reads of the aggregate endpoints.
+
+class AccountDailyRollup(Base):
+    """
+    Per account and UTC day: transfers sent and received, by count and amount.
+    """
+    __table_args__ = (
+        UniqueConstraint("account", "day", name="uq_accountdailyrollups_account_day"),
+    )
+
+    id = Column(Integer, primary_key=True)
+    account = Column(String, nullable=False)
+    day = Column(Date, nullable=False)
+    sent_count = Column(Integer, nullable=False, default=0)
+    sent_amount = Column(Float, nullable=False, default=0.0)
+    received_count = Column(Integer, nullable=False, default=0)
+    received_amount = Column(Float, nullable=False, default=0.0)
+
+class CounterpartyDailyRollup(Base):
+    """
+    Per account, UTC day and counterparty: transfers in either direction.
+    """
+    __table_args__ = (
+        UniqueConstraint("account", "day", "counterparty", name="uq_counterpartydailyrollups_account_day_counterparty"),
+    )
+
+    id = Column(Integer, primary_key=True)
+    account = Column(String, nullable=False)
+    day = Column(Date, nullable=False)
+    counterparty = Column(String, nullable=False)
+    count = Column(Integer, nullable=False, default=0)
+    amount = Column(Float, nullable=False, default=0.0)
+
+class CorridorHourlyRollup(Base):
+    """
+    Per mBridge currency corridor and UTC hour: settled cross-border payments.
+
+    `amount` is in the source currency, `settled_amount` in the target currency.
+    """
+    __table_args__ = (
+        UniqueConstraint("from_currency", "to_currency", "hour", name="uq_corridorhourlyrollups_corridor_hour"),
+    )
+
+    id = Column(Integer, primary_key=True)
+    from_currency = Column(String, nullable=False)
+    to_currency = Column(String, nullable=False)
+    hour = Column(DateTime(timezone=True), nullable=False)
+    count = Column(Integer, nullable=False, default=0)
+    amount = Column(Float, nullable=False, default=0.0)
+    settled_amount = Column(Float, nullable=False, default=0.0)
@@ -1,5 +1,7 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime
+from sqlalchemy import Column, Integer, String, Float, DateTime, Index
+from sqlalchemy.ext.compiler import compiles
 from sqlalchemy.sql import func
+from sqlalchemy.sql.functions import FunctionElement
 import uuid
 
 from app.db.base import Base
@@ -7,10 +9,52 @@ from app.db.base import Base
 def generate_uuid():
     return str(uuid.uuid4())
 
+class utcnow(FunctionElement):
+    """
+    The current time as a server default, func.now() everywhere but SQLite.
+
+    SQLite stores datetimes as text. CURRENT_TIMESTAMP has whole seconds
+    ('2024-05-01 12:00:32') while SQLAlchemy binds datetimes with
+    microseconds ('2024-05-01 12:00:32.000000'), so a keyset comparison
+    against a bound timestamp would compare mismatched strings.
+    """
+    type = DateTime(timezone=True)
+    inherit_cache = True
+
+@compiles(utcnow)
+def _compile_utcnow(element, compiler, **kw):
+    return compiler.process(func.now(), **kw)
+
+@compiles(utcnow, "sqlite")
+def _compile_utcnow_sqlite(element, compiler, **kw):
+    # %f is SS.SSS; pad it to SQLAlchemy's six fractional digits
+    return "strftime('%Y-%m-%d %H:%M:%f000', 'now')"
+
 class Transaction(Base):
+    # Fetch server defaults (timestamp) as part of the INSERT instead of a later SELECT
+    __mapper_args__ = {"eager_defaults": True}
+    # Composite indexes back keyset pagination on (timestamp, id), optionally per account.
+    # They also cover plain sender/receiver lookups, so those need no index of their own.
+    __table_args__ = (
+        Index("ix_transactions_timestamp_id", "timestamp", "id"),
+        Index("ix_transactions_sender_timestamp_id", "sender", "timestamp", "id"),
+        Index("ix_transactions_receiver_timestamp_id", "receiver", "timestamp", "id"),
+    )
+
     id = Column(Integer, primary_key=True, index=True)
     tx_id = Column(String, unique=True, index=True, default=generate_uuid)
-    sender = Column(String, index=True, nullable=False)
-    receiver = Column(String, index=True, nullable=False)
+    sender = Column(String, nullable=False)
+    receiver = Column(String, nullable=False)
     amount = Column(Float, nullable=False)
-    timestamp = Column(DateTime(timezone=True), server_default=func.now()) 
\ No newline at end of file
+    timestamp = Column(DateTime(timezone=True), server_default=utcnow())
+
+class ArchivedTransaction(Base):
+    """
+    Where an archived transaction lives: the Parquet file of its detached
+    monthly partition and the row group holding it (see app/db/partitions.py).
+    """
+    id = Column(Integer, primary_key=True)
+    tx_id = Column(String, unique=True, index=True, nullable=False)
+    partition = Column(String, nullable=False)
+    path = Column(String, nullable=False)
+    row_group = Column(Integer, nullable=False)
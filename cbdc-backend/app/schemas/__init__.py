@@ -1 +1,9 @@
- 
\ No newline at end of file
+from .transaction import (
+    Transaction,
+    TransactionBatchCreate,
+    TransactionBatchItem,
+    TransactionBatchResult,
+    TransactionCreate,
+)
+from .report import ReportCatalogEntry, ReportJob, ReportJobCreate
+from .rollup import AccountDay, AccountVolume, CorridorHour, CounterpartyVolume
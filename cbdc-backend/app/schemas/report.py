@@ -0,0 +1,42 @@
+from pydantic import BaseModel, root_validator
+from datetime import datetime
+from typing import Optional
+
+# Properties to receive on report job submission
+class ReportJobCreate(BaseModel):
+    account: Optional[str] = None
+    start: Optional[datetime] = None
+    end: Optional[datetime] = None
+
+    @root_validator(skip_on_failure=True)
+    def check_range(cls, values):
+        start, end = values.get("start"), values.get("end")
+        if start is not None and end is not None and start >= end:
+            raise ValueError("start must be before end")
+        return values
+
+# Properties to return to client
+class ReportJob(BaseModel):
+    job_id: str
+    account: Optional[str] = None
+    start: Optional[datetime] = None
+    end: Optional[datetime] = None
+    status: str
+    transaction_count: Optional[int] = None
+    size_bytes: Optional[int] = None
+    error: Optional[str] = None
+    created_at: datetime
+    completed_at: Optional[datetime] = None
+
+    class Config:
+        orm_mode = True
+
+class ReportCatalogEntry(BaseModel):
+    tx_id: Optional[str] = None
+    job_id: Optional[str] = None
+    path: str
+    size_bytes: int
+    created_at: datetime
+
+    class Config:
+        orm_mode = True
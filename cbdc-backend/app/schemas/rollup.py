@@ -0,0 +1,44 @@
+from pydantic import BaseModel
+from datetime import date, datetime
+from typing import List
+
+# Per-account daily volumes
+class AccountDay(BaseModel):
+    day: date
+    sent_count: int
+    sent_amount: float
+    received_count: int
+    received_amount: float
+
+    class Config:
+        orm_mode = True
+
+class AccountVolume(BaseModel):
+    account: str
+    start: date
+    end: date
+    sent_count: int
+    sent_amount: float
+    received_count: int
+    received_amount: float
+    days: List[AccountDay]
+
+class CounterpartyVolume(BaseModel):
+    counterparty: str
+    count: int
+    amount: float
+
+    class Config:
+        orm_mode = True
+
+# mBridge corridor hourly volumes
+class CorridorHour(BaseModel):
+    from_currency: str
+    to_currency: str
+    hour: datetime
+    count: int
+    amount: float
+    settled_amount: float
+
+    class Config:
+        orm_mode = True
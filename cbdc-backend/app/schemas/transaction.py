@@ -1,6 +1,8 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, conlist
 from datetime import datetime
-from typing import Optional
+from typing import List, Optional
+
+from app.core.config import settings
 
 # Shared properties
 class TransactionBase(BaseModel):
@@ -10,7 +12,9 @@ class TransactionBase(BaseModel):
 
 # Properties to receive on transaction creation
 class TransactionCreate(TransactionBase):
-    pass
+    # Fraud model inputs that are not stored with the transaction
+    device_id: Optional[str] = None
+    is_foreign: bool = False
 
 # Properties to return to client
 class Transaction(TransactionBase):
@@ -19,4 +23,21 @@ class Transaction(TransactionBase):
     timestamp: datetime
 
     class Config:
-        orm_mode = True 
\ No newline at end of file
+        orm_mode = True
+
+# Bulk ingestion
+class TransactionBatchCreate(BaseModel):
+    transactions: conlist(TransactionCreate, min_items=1, max_items=settings.TRANSACTION_BATCH_MAX_SIZE)
+
+class TransactionBatchItem(BaseModel):
+    index: int
+    status: str  # "accepted", "flagged" or "failed"
+    transaction: Optional[Transaction] = None
+    fraud_score: Optional[float] = None
+    error: Optional[str] = None
+
+class TransactionBatchResult(BaseModel):
+    accepted: int
+    flagged: int
+    failed: int
+    results: List[TransactionBatchItem]
@@ -0,0 +1,136 @@
+"""
+In-process pub/sub for real-time fraud alerts.
+
+The scoring path publishes flagged transactions; each WebSocket client holds
+a Subscription with its own bounded queue and server-side filters. Alerts are
+serialized once per publish and the same text is queued for every matching
+subscriber, so fan-out cost is one dict lookup and one queue put each.
+"""
+import asyncio
+import json
+import logging
+from typing import Dict, Optional, Set
+
+from app.core.config import settings
+from app.core.metrics import Counter, Gauge
+
+logger = logging.getLogger(__name__)
+
+SLOW_CONSUMER_POLICIES = ("drop_oldest", "drop_newest", "disconnect")
+
+SUBSCRIBERS = Gauge("alert_subscribers", "Connected fraud alert subscribers")
+PUBLISHED = Counter("alert_published_total", "Fraud alerts published")
+DELIVERED = Counter("alert_delivered_total", "Fraud alerts queued for a subscriber")
+DROPPED = Counter("alert_dropped_total", "Fraud alerts dropped because a subscriber queue was full")
+DISCONNECTED = Counter("alert_slow_consumer_disconnects_total", "Subscribers disconnected for falling behind")
+
+
+class Subscription:
+    """
+    One subscriber's queue of serialized alerts and its filters.
+
+    `account` limits alerts to transactions sent or received by that account;
+    `min_score` drops alerts scored below it. A None item on the queue means
+    the broker closed the subscription (see `close_reason`).
+    """
+
+    __slots__ = ("queue", "account", "min_score", "dropped", "close_reason")
+
+    def __init__(self, queue_size: int, account: Optional[str], min_score: float):
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self.account = account
+        self.min_score = min_score
+        self.dropped = 0
+        self.close_reason: Optional[str] = None
+
+    def _close(self, reason: str) -> None:
+        self.close_reason = reason
+        while not self.queue.empty():
+            self.queue.get_nowait()
+        self.queue.put_nowait(None)
+
+
+class AlertBroker:
+    """
+    Fans published alerts out to subscriber queues without ever blocking the publisher.
+
+    When a subscriber's queue is full, `policy` decides what happens:
+    drop_oldest evicts its oldest queued alert, drop_newest discards the new
+    one, and disconnect closes the subscription.
+    """
+
+    def __init__(self, queue_size: int, policy: str):
+        if policy not in SLOW_CONSUMER_POLICIES:
+            raise ValueError(f"Unknown slow consumer policy {policy!r}; expected one of {SLOW_CONSUMER_POLICIES}")
+        self.queue_size = queue_size
+        self.policy = policy
+        # Subscribers without an account filter, and the rest indexed by account
+        self._unfiltered: Set[Subscription] = set()
+        self._by_account: Dict[str, Set[Subscription]] = {}
+
+    def __len__(self) -> int:
+        return len(self._unfiltered) + sum(len(subs) for subs in self._by_account.values())
+
+    def subscribe(self, account: Optional[str] = None, min_score: float = 0.0) -> Subscription:
+        subscription = Subscription(self.queue_size, account, min_score)
+        if account is None:
+            self._unfiltered.add(subscription)
+        else:
+            self._by_account.setdefault(account, set()).add(subscription)
+        SUBSCRIBERS.inc()
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        if subscription.account is None:
+            subscribers = self._unfiltered
+        else:
+            subscribers = self._by_account.get(subscription.account, set())
+        if subscription in subscribers:
+            subscribers.discard(subscription)
+            SUBSCRIBERS.dec()
+            if subscription.account is not None and not subscribers:
+                del self._by_account[subscription.account]
+
+    def publish(self, alert: dict) -> int:
+        """
+        Queue `alert` for every matching subscriber; returns how many received it.
+
+        Must be called from the event loop thread.
+        """
+        PUBLISHED.inc()
+        targets = list(self._unfiltered)
+        for account in {alert.get("sender"), alert.get("receiver")}:
+            targets.extend(self._by_account.get(account, ()))
+        if not targets:
+            return 0
+
+        message = json.dumps(alert, default=str)
+        score = alert.get("fraud_score", 0.0)
+        delivered = dropped = 0
+        for subscription in targets:
+            if score < subscription.min_score or subscription.close_reason is not None:
+                continue
+            queue = subscription.queue
+            if queue.full():
+                if self.policy == "disconnect":
+                    subscription._close("slow consumer")
+                    self.unsubscribe(subscription)
+                    DISCONNECTED.inc()
+                    continue
+                subscription.dropped += 1
+                dropped += 1
+                if self.policy == "drop_newest":
+                    continue
+                queue.get_nowait()
+            queue.put_nowait(message)
+            delivered += 1
+        DELIVERED.inc(delivered)
+        if dropped:
+            DROPPED.inc(dropped)
+        return delivered
+
+
+alert_broker = AlertBroker(
+    queue_size=settings.ALERT_SUBSCRIBER_QUEUE_SIZE,
+    policy=settings.ALERT_SLOW_CONSUMER_POLICY,
+)
@@ -0,0 +1,90 @@
+"""
+Bounded LRU + TTL cache for async loaders, with single-flight misses.
+"""
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Tuple
+
+from app.core.metrics import Counter, Gauge
+
+CACHE_REQUESTS = Counter("cache_requests_total", "Cache lookups by outcome (hit, miss, coalesced)", labelnames=("cache", "result"))
+CACHE_EVICTIONS = Counter("cache_evictions_total", "Entries evicted to stay within max_entries", labelnames=("cache",))
+CACHE_ENTRIES = Gauge("cache_entries", "Entries currently cached", labelnames=("cache",))
+
+
+class AsyncTTLCache:
+    """
+    Read-through cache in front of an async loader.
+
+    Entries expire `ttl_seconds` after they were loaded; the least recently
+    used entry is evicted once `max_entries` is exceeded. Concurrent misses for
+    the same key share a single loader call. Errors are never cached.
+    """
+
+    def __init__(self, name: str, max_entries: int, ttl_seconds: float):
+        self.name = name
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self._inflight: Dict[Hashable, asyncio.Future] = {}
+        self._hits = CACHE_REQUESTS.labels(name, "hit")
+        self._misses = CACHE_REQUESTS.labels(name, "miss")
+        self._coalesced = CACHE_REQUESTS.labels(name, "coalesced")
+        self._evictions = CACHE_EVICTIONS.labels(name)
+        self._size = CACHE_ENTRIES.labels(name)
+
+    async def get_or_load(self, key: Hashable, loader: Callable[[], Awaitable[Any]]) -> Any:
+        entry = self._entries.get(key)
+        if entry is not None:
+            expires_at, value = entry
+            if expires_at > time.monotonic():
+                self._entries.move_to_end(key)
+                self._hits.inc()
+                return value
+            del self._entries[key]
+
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            self._coalesced.inc()
+            # Shield so one waiter being cancelled does not cancel the shared load
+            return await asyncio.shield(inflight)
+
+        self._misses.inc()
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            value = await loader()
+        except BaseException as e:
+            future.set_exception(e)
+            # Mark retrieved so an error nobody else awaited is not reported as unhandled
+            future.exception()
+            raise
+        else:
+            future.set_result(value)
+            # Skip storing if the key was invalidated while loading
+            if self._inflight.get(key) is future:
+                self._store(key, value)
+            return value
+        finally:
+            if self._inflight.get(key) is future:
+                del self._inflight[key]
+
+    def _store(self, key: Hashable, value: Any) -> None:
+        self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self._evictions.inc()
+        self._size.set(len(self._entries))
+
+    def invalidate(self, *keys: Hashable) -> None:
+        for key in keys:
+            self._entries.pop(key, None)
+            self._inflight.pop(key, None)
+        self._size.set(len(self._entries))
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._inflight.clear()
+        self._size.set(0)
@@ -1,41 +1,801 @@
+import asyncio
+import csv
+import hashlib
+import json
+import logging
+import math
+import multiprocessing
+import os
+import re
+import threading
+import time
+import unicodedata
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+from xml.sax.saxutils import escape
+
+import numpy as np
+from reportlab.lib.pagesizes import A4
+from reportlab.pdfgen import canvas
 from reportlab.platypus import SimpleDocTemplate, Paragraph
 from reportlab.lib.styles import getSampleStyleSheet
-import os
+
+from app.core.config import settings
+from app.core.metrics import Counter, Gauge, Histogram
+from app.crud import crud_report
+from app.db.session import AsyncSessionLocal, SessionLocal
 from app.models.transaction import Transaction
+from app.services.cache import CACHE_EVICTIONS, CACHE_REQUESTS
 
-def generate_aml_report(transaction: Transaction) -> str:
+logger = logging.getLogger(__name__)
+
+# Bump when the report layout changes so cached PDFs are re-rendered
+REPORT_TEMPLATE_VERSION = 2
+
+# Longest the report renderer trusts its running cache size before rescanning the directory
+CACHE_RESCAN_SECONDS = 60.0
+
+SCREENINGS = Counter("watchlist_screenings_total", "Names screened against the watchlist, by status", labelnames=("status",))
+SCREENING_TIME = Histogram("watchlist_screening_seconds", "Time to screen one name, cache misses only")
+WATCHLIST_NAMES = Gauge("watchlist_names", "Names (including aliases) in the loaded watchlist")
+WATCHLIST_RELOADS = Counter("watchlist_reloads_total", "Watchlist loads by outcome", labelnames=("outcome",))
+
+# Screening outcomes, most severe last
+AML_STATUSES = ("unscreened", "clear", "potential_match", "match")
+
+# Words that do not identify a party
+_NAME_STOPWORDS = frozenset(
+    {"the", "and", "of", "co", "company", "corp", "corporation", "inc", "llc", "ltd", "limited", "plc", "sa", "ag", "gmbh"}
+)
+_NAME_TOKEN = re.compile(r"[^\W_]+")
+
+
+def normalize_name(name: str) -> Tuple[str, ...]:
     """
-    Generates a PDF AML report for a given transaction.
-    
-    Returns the file path of the generated report.
-    """
-    # Create a reports directory if it doesn't exist
-    reports_dir = "temp_reports"
-    if not os.path.exists(reports_dir):
-        os.makedirs(reports_dir)
-        
-    file_path = os.path.join(reports_dir, f"report_{transaction.tx_id}.pdf")
-    
-    doc = SimpleDocTemplate(file_path)
-    styles = getSampleStyleSheet()
-    
+    Casefolded, accent-free word tokens of a name, without legal-form stopwords.
+    """
+    decomposed = unicodedata.normalize("NFKD", name)
+    folded = "".join(ch for ch in decomposed if not unicodedata.combining(ch)).casefold()
+    tokens = _NAME_TOKEN.findall(folded)
+    return tuple(token for token in tokens if token not in _NAME_STOPWORDS) or tuple(tokens)
+
+
+def name_trigrams(tokens: Iterable[str]) -> Set[str]:
+    """
+    Character trigrams of each padded token, so word order does not matter.
+    """
+    grams = set()
+    for token in tokens:
+        padded = f"  {token} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+class WatchlistIndex:
+    """
+    An immutable, compiled watchlist.
+
+    Exact matching uses a hash of each name's sorted normalized tokens, so
+    word order, case, accents and legal forms do not matter. Fuzzy matching
+    scores names by the Dice coefficient of their trigram sets, using an
+    inverted index of sorted row-id arrays. A name reaching `threshold` must
+    share one of the query's rarest trigrams (prefix filtering), so only
+    those postings are merged into candidates. The candidates are then
+    filtered by size and counted against the remaining postings by binary
+    search. Results are memoized per name, up to `cache_size` names; a
+    reload builds a new index and therefore a fresh memo.
+    """
+
+    def __init__(self, rows: Iterable[Tuple[str, str, str]], threshold: float, cache_size: int, version: str = ""):
+        self.threshold = threshold
+        self.cache_size = cache_size
+        self.version = version
+        self.entries: List[Tuple[str, str, str]] = []
+        self._exact: Dict[str, List[int]] = {}
+        self._gram_ids: Dict[str, int] = {}
+        postings: List[array] = []
+        sizes = array("H")
+        self._cache: Dict[str, Tuple[dict, ...]] = {}
+        for entry_id, list_name, name in rows:
+            tokens = normalize_name(name)
+            if not tokens:
+                continue
+            row = len(self.entries)
+            self.entries.append((entry_id, list_name, name))
+            self._exact.setdefault(" ".join(sorted(tokens)), []).append(row)
+            grams = name_trigrams(tokens)
+            for gram in grams:
+                gram_id = self._gram_ids.get(gram)
+                if gram_id is None:
+                    gram_id = self._gram_ids[gram] = len(postings)
+                    postings.append(array("I"))
+                postings[gram_id].append(row)
+            sizes.append(min(len(grams), 0xFFFF))
+        # Rows are appended in order, so every posting list is sorted
+        self._postings = [np.frombuffer(posting, dtype=np.uint32) for posting in postings]
+        self._sizes = np.array(sizes, dtype=np.int64)
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def _match(self, row: int, score: float, kind: str) -> dict:
+        entry_id, list_name, name = self.entries[row]
+        return {"entry_id": entry_id, "list": list_name, "name": name, "score": round(score, 3), "match": kind}
+
+    def _search(self, name: str) -> Tuple[dict, ...]:
+        tokens = normalize_name(name)
+        if not tokens:
+            return ()
+        exact = self._exact.get(" ".join(sorted(tokens)), [])
+        matches = [self._match(row, 1.0, "exact") for row in exact]
+
+        trigrams = name_trigrams(tokens)
+        # Trigrams absent from the index still count towards the query's size
+        n = len(trigrams)
+        known = sorted(
+            (self._postings[self._gram_ids[gram]] for gram in trigrams if gram in self._gram_ids), key=len
+        )
+        # Smallest overlap, and name sizes, that can still reach the threshold
+        least = self.threshold * n / (2 - self.threshold)
+        min_overlap = max(1, math.ceil(least - 1e-9))
+        max_size = (2 - self.threshold) * n / self.threshold
+        prefix = len(known) - min_overlap + 1
+        if prefix > 0:
+            rows, shared = np.unique(np.concatenate(known[:prefix]), return_counts=True)
+            sizes = self._sizes[rows]
+            keep = (sizes >= least) & (sizes <= max_size)
+            if exact:
+                keep &= ~np.isin(rows, exact)
+            rows, shared = rows[keep], shared[keep]
+            # Shared trigrams each candidate needs; drop those that can no longer get there
+            needed = np.ceil(self.threshold * (n + sizes[keep]) / 2 - 1e-9)
+            rest = known[prefix:]
+            for counted, posting in enumerate(rest):
+                keep = shared + (len(rest) - counted) >= needed
+                rows, shared, needed = rows[keep], shared[keep], needed[keep]
+                if not len(rows):
+                    break
+                found = np.minimum(np.searchsorted(posting, rows), len(posting) - 1)
+                shared += posting[found] == rows
+            scores = 2 * shared / (n + self._sizes[rows])
+            hits = scores >= self.threshold
+            rows, scores = rows[hits], scores[hits]
+            order = np.lexsort((rows, -scores))[:settings.WATCHLIST_MAX_MATCHES]
+            matches.extend(self._match(int(rows[i]), float(scores[i]), "fuzzy") for i in order)
+        return tuple(matches[:settings.WATCHLIST_MAX_MATCHES])
+
+    def search(self, name: str) -> Tuple[dict, ...]:
+        """
+        Watchlist names matching `name`: exact matches first, then fuzzy ones
+        by descending score. The returned dicts are shared; do not modify them.
+        """
+        matches = self._cache.get(name)
+        if matches is None:
+            started = time.perf_counter()
+            matches = self._search(name)
+            SCREENING_TIME.observe(time.perf_counter() - started)
+            if len(self._cache) >= self.cache_size:
+                self._cache.clear()
+            self._cache[name] = matches
+        return matches
+
+
+def read_watchlist(path: str) -> Tuple[List[Tuple[str, str, str]], str]:
+    """
+    Rows (entry_id, list, name) of a watchlist CSV, and a content hash as its version.
+
+    The CSV has a header with `entry_id`, `list` and `name` columns; aliases
+    are further rows with the same entry_id.
+    """
+    with open(path, "rb") as f:
+        content = f.read()
+    reader = csv.DictReader(content.decode("utf-8-sig").splitlines())
+    missing = {"entry_id", "list", "name"} - set(reader.fieldnames or ())
+    if missing:
+        raise ValueError(f"Watchlist {path} lacks columns: {', '.join(sorted(missing))}")
+    rows = [(row["entry_id"], row["list"], row["name"]) for row in reader if row["name"]]
+    return rows, hashlib.sha256(content).hexdigest()[:16]
+
+
+class WatchlistScreener:
+    """
+    Screens account names against the sanctions/watchlist file at `path`.
+
+    A background thread checks the file every `reload_interval` seconds and,
+    when it changed, compiles a new WatchlistIndex and swaps it in. Screening
+    keeps using the previous index while the new one is built, and also when
+    a reload fails. Without a loaded watchlist every name is "unscreened".
+    """
+
+    def __init__(self, path: str, reload_interval: float, threshold: float, cache_size: int):
+        self.path = path
+        self.reload_interval = reload_interval
+        self.threshold = threshold
+        self.cache_size = cache_size
+        self._index: Optional[WatchlistIndex] = None
+        self._signature: Optional[Tuple[int, int]] = None
+        self._loaded_at: Optional[datetime] = None
+        self._reload_lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _stat(self) -> Optional[Tuple[int, int]]:
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def reload_if_changed(self) -> bool:
+        """
+        Load the watchlist if the file changed since the last load. Returns
+        whether a new index was swapped in.
+        """
+        if not self.path:
+            return False
+        with self._reload_lock:
+            signature = self._stat()
+            if signature is None:
+                if self._index is None or self._signature is not None:
+                    logger.warning("Watchlist %s is not readable", self.path)
+                    WATCHLIST_RELOADS.labels("failed").inc()
+                    self._signature = None
+                return False
+            if signature == self._signature:
+                return False
+            started = time.perf_counter()
+            try:
+                rows, version = read_watchlist(self.path)
+                index = WatchlistIndex(rows, self.threshold, self.cache_size, version)
+            except Exception:
+                logger.exception("Could not load watchlist %s; keeping the previous one", self.path)
+                WATCHLIST_RELOADS.labels("failed").inc()
+                self._signature = signature
+                return False
+            # Readers take self._index once per screening, so the swap is atomic for them
+            self._index = index
+            self._signature = signature
+            self._loaded_at = datetime.now(timezone.utc)
+            WATCHLIST_NAMES.set(len(index))
+            WATCHLIST_RELOADS.labels("loaded").inc()
+            logger.info(
+                "Loaded watchlist %s (%d names, version %s) in %.2fs",
+                self.path, len(index), version, time.perf_counter() - started,
+            )
+            return True
+
+    def screen(self, name: str) -> dict:
+        """
+        AML status and watchlist matches for one account name.
+        """
+        index = self._index
+        if index is None:
+            SCREENINGS.labels("unscreened").inc()
+            return {"aml_status": "unscreened", "matches": [], "watchlist_version": None}
+        matches = index.search(name)
+        if any(match["match"] == "exact" for match in matches):
+            status = "match"
+        elif matches:
+            status = "potential_match"
+        else:
+            status = "clear"
+        SCREENINGS.labels(status).inc()
+        return {"aml_status": status, "matches": list(matches), "watchlist_version": index.version}
+
+    def screen_transaction(self, sender: str, receiver: str) -> dict:
+        """
+        Screen both parties; the transaction's status is the more severe of the two.
+        """
+        parties = {"sender": self.screen(sender), "receiver": self.screen(receiver)}
+        status = max((party["aml_status"] for party in parties.values()), key=AML_STATUSES.index)
+        return {"aml_status": status, **parties}
+
+    def status(self) -> dict:
+        index = self._index
+        return {
+            "path": self.path,
+            "names": len(index) if index is not None else 0,
+            "version": index.version if index is not None else None,
+            "loaded_at": self._loaded_at.isoformat() if self._loaded_at else None,
+        }
+
+    def start(self) -> None:
+        if not self.path or (self._thread is not None and self._thread.is_alive()):
+            return
+        self._stopped.clear()
+        self._thread = threading.Thread(target=self._reload_loop, daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _reload_loop(self) -> None:
+        while not self._stopped.is_set():
+            self.reload_if_changed()
+            self._stopped.wait(self.reload_interval)
+
+
+watchlist_screener = WatchlistScreener(
+    path=settings.WATCHLIST_PATH,
+    reload_interval=settings.WATCHLIST_RELOAD_INTERVAL,
+    threshold=settings.WATCHLIST_FUZZY_THRESHOLD,
+    cache_size=settings.WATCHLIST_CACHE_MAX_ENTRIES,
+)
+
+# Built once per process (by the pool initializer in render workers)
+_styles = None
+
+
+def _get_styles():
+    global _styles
+    if _styles is None:
+        _styles = getSampleStyleSheet()
+    return _styles
+
+
+def _init_render_worker() -> None:
+    """
+    Pool initializer for render workers: build the styles and load the
+    watchlist once per worker, before its first job. The worker's own reload
+    thread then keeps the watchlist current, so jobs never rebuild it.
+    """
+    _get_styles()
+    watchlist_screener.reload_if_changed()
+    watchlist_screener.start()
+
+
+def report_fields(transaction: Transaction) -> Dict[str, str]:
+    """
+    The transaction fields and watchlist screening a report is rendered
+    from, as plain picklable data. A new watchlist version changes the
+    fields, so reports are re-screened after a reload.
+    """
+    screening = watchlist_screener.screen_transaction(transaction.sender, transaction.receiver)
+    return {
+        "tx_id": transaction.tx_id,
+        "sender": transaction.sender,
+        "receiver": transaction.receiver,
+        "amount": str(transaction.amount),
+        "timestamp": transaction.timestamp.isoformat(),
+        "aml_status": screening["aml_status"],
+        "aml_screening": json.dumps(
+            {
+                "watchlist_version": screening["sender"]["watchlist_version"],
+                "sender": screening["sender"]["matches"],
+                "receiver": screening["receiver"]["matches"],
+            },
+            sort_keys=True,
+        ),
+    }
+
+
+def describe_match(match: dict) -> str:
+    return f"{match['name']} ({match['list']} {match['entry_id']}, {match['match']}, score {match['score']:.2f})"
+
+
+def report_digest(fields: Dict[str, str]) -> str:
+    """
+    Content hash of a report: equal digests render byte-for-byte equivalent PDFs.
+    """
+    payload = json.dumps({"template": REPORT_TEMPLATE_VERSION, **fields}, sort_keys=True)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def report_path(fields: Dict[str, str], digest: str, reports_dir: str = settings.REPORTS_DIR) -> str:
+    return os.path.join(reports_dir, f"report_{fields['tx_id']}.{digest[:16]}.pdf")
+
+
+def render_report(fields: Dict[str, str], file_path: str) -> str:
+    """
+    Render the AML report PDF for `fields` to `file_path`.
+
+    Writes to a temporary file first so readers never see a partial PDF.
+    """
+    styles = _get_styles()
+    tmp_path = f"{file_path}.{os.getpid()}.tmp"
+    doc = SimpleDocTemplate(tmp_path)
+
     story = []
-    
+
     # Title
     story.append(Paragraph(f"AML Compliance Report", styles['h1']))
-    story.append(Paragraph(f"<br/>Transaction ID: {transaction.tx_id}", styles['Normal']))
-    
+    story.append(Paragraph(f"<br/>Transaction ID: {fields['tx_id']}", styles['Normal']))
+
     # Transaction Details
     story.append(Paragraph("<br/><br/><b>Transaction Details:</b>", styles['h3']))
-    story.append(Paragraph(f"Sender: {transaction.sender}", styles['Normal']))
-    story.append(Paragraph(f"Receiver: {transaction.receiver}", styles['Normal']))
-    story.append(Paragraph(f"Amount: {transaction.amount}", styles['Normal']))
-    story.append(Paragraph(f"Timestamp: {transaction.timestamp.isoformat()}", styles['Normal']))
-    
-    # Placeholder for AML check results
-    story.append(Paragraph("<br/><br/><b>AML Check (Placeholder):</b>", styles['h3']))
-    story.append(Paragraph("No risks detected based on placeholder analysis.", styles['Normal']))
-    
+    story.append(Paragraph(f"Sender: {fields['sender']}", styles['Normal']))
+    story.append(Paragraph(f"Receiver: {fields['receiver']}", styles['Normal']))
+    story.append(Paragraph(f"Amount: {fields['amount']}", styles['Normal']))
+    story.append(Paragraph(f"Timestamp: {fields['timestamp']}", styles['Normal']))
+
+    # Watchlist screening of both parties
+    screening = json.loads(fields["aml_screening"])
+    story.append(Paragraph("<br/><br/><b>AML Watchlist Screening:</b>", styles['h3']))
+    story.append(Paragraph(f"Status: {fields['aml_status']}", styles['Normal']))
+    if screening["watchlist_version"] is None:
+        story.append(Paragraph("No watchlist is loaded; the parties were not screened.", styles['Normal']))
+    else:
+        story.append(Paragraph(f"Watchlist version: {screening['watchlist_version']}", styles['Normal']))
+        for party in ("sender", "receiver"):
+            matches = screening[party]
+            summary = "; ".join(escape(describe_match(match)) for match in matches) or "no matches"
+            story.append(Paragraph(f"{party.capitalize()} {escape(fields[party])}: {summary}", styles['Normal']))
+
     doc.build(story)
-    
-    return file_path 
\ No newline at end of file
+    os.replace(tmp_path, file_path)
+
+    return file_path
+
+
+def _remove_stale_versions(stale: Iterable[Tuple[str, int]]) -> int:
+    """
+    Delete earlier renders of a transaction, given as (path, size) from the
+    report catalog. Returns the bytes freed; files already gone free nothing.
+    """
+    freed = 0
+    for path, size in stale:
+        try:
+            os.remove(path)
+        except OSError:
+            continue
+        freed += size
+    return freed
+
+
+def enforce_cache_limit(reports_dir: str, max_bytes: int, keep: Optional[str] = None) -> List[str]:
+    """
+    Delete least recently served reports until the directory fits in `max_bytes`.
+
+    Only single-transaction reports at the top of `reports_dir` count; job
+    reports live in a subdirectory and are kept. Returns the removed paths.
+    `keep` is never removed.
+    """
+    return _trim_cache(reports_dir, max_bytes, keep)[0]
+
+
+def _trim_cache(reports_dir: str, max_bytes: int, keep: Optional[str] = None) -> Tuple[List[str], int]:
+    """
+    enforce_cache_limit, also returning the size of the reports left afterwards.
+    """
+    entries = []
+    total = 0
+    with os.scandir(reports_dir) as it:
+        for entry in it:
+            if not entry.name.endswith(".pdf"):
+                continue
+            try:
+                stat = entry.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, entry.path))
+            total += stat.st_size
+    removed = []
+    for _, size, path in sorted(entries):
+        if total <= max_bytes:
+            break
+        if path == keep:
+            continue
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        else:
+            removed.append(path)
+        total -= size
+    return removed, total
+
+
+def generate_aml_report(transaction: Transaction) -> str:
+    """
+    Generates a PDF AML report for a given transaction.
+
+    Returns the file path of the generated report. Renders in the calling
+    process and reuses the cached file when the transaction is unchanged;
+    request handlers should go through `report_renderer` instead.
+    """
+    os.makedirs(settings.REPORTS_DIR, exist_ok=True)
+    fields = report_fields(transaction)
+    file_path = report_path(fields, report_digest(fields))
+    if not os.path.exists(file_path):
+        render_report(fields, file_path)
+        db = SessionLocal()
+        try:
+            stale = crud_report.get_stale_reports(db, tx_id=fields["tx_id"], keep=file_path)
+            _remove_stale_versions(stale)
+            crud_report.remove_catalog_entries(db, paths=[path for path, _ in stale])
+            crud_report.add_catalog_entry(
+                db, path=file_path, size_bytes=os.path.getsize(file_path), tx_id=fields["tx_id"]
+            )
+        finally:
+            db.close()
+    return file_path
+
+
+def job_report_path(job_id: str, reports_dir: str = settings.REPORTS_DIR) -> str:
+    return os.path.join(reports_dir, "jobs", f"job_{job_id}.pdf")
+
+
+# Bulk report layout: one line per transaction on A4
+_JOB_COLUMNS = (("Timestamp", 40), ("Transaction ID", 160), ("Sender", 330), ("Receiver", 420), ("Amount", 555))
+_JOB_LINE_HEIGHT = 12
+_JOB_MARGIN = 40
+# Marker for transactions with watchlist matches, between timestamp and tx_id
+_JOB_FLAG_X = 150
+# Flagged accounts listed individually in the summary
+_JOB_MAX_FLAGGED_ACCOUNTS = 50
+
+
+def _job_page_header(pdf: canvas.Canvas, title: str, page: int) -> float:
+    width, height = A4
+    y = height - _JOB_MARGIN
+    pdf.setFont("Helvetica-Bold", 12)
+    pdf.drawString(_JOB_MARGIN, y, title)
+    pdf.setFont("Helvetica", 8)
+    pdf.drawRightString(width - _JOB_MARGIN, y, f"Page {page}")
+    y -= 2 * _JOB_LINE_HEIGHT
+    pdf.setFont("Helvetica-Bold", 8)
+    for label, x in _JOB_COLUMNS:
+        if label == "Amount":
+            pdf.drawRightString(x, y, label)
+        else:
+            pdf.drawString(x, y, label)
+    pdf.setFont("Helvetica", 8)
+    return y - _JOB_LINE_HEIGHT
+
+
+def render_job_report(job_id: str) -> None:
+    """
+    Render the multi-page PDF for a bulk report job. Runs in a render worker.
+
+    Rows are streamed from the database `REPORT_JOB_CHUNK_SIZE` at a time and
+    drawn straight onto the page canvas, so memory does not grow with the
+    number of transactions. Progress and the outcome are written back to the
+    job row; the finished PDF is added to the report catalog.
+    """
+    db = SessionLocal()
+    try:
+        job = crud_report.get_job(db, job_id=job_id)
+        if job is None:
+            return
+        job.status = "running"
+        db.commit()
+
+        file_path = job_report_path(job_id)
+        os.makedirs(os.path.dirname(file_path), exist_ok=True)
+        tmp_path = f"{file_path}.{os.getpid()}.tmp"
+        title = f"AML Compliance Report - {job.account or 'all accounts'}"
+        if job.start is not None or job.end is not None:
+            title += f" ({job.start.isoformat() if job.start else '...'} to {job.end.isoformat() if job.end else '...'})"
+
+        flagged: Dict[str, dict] = {}
+
+        pdf = canvas.Canvas(tmp_path, pagesize=A4)
+        page = 1
+        y = _job_page_header(pdf, title, page)
+        count, total, flagged_count = 0, 0.0, 0
+        rows = db.execute(
+            crud_report.job_transactions_query(job).execution_options(yield_per=settings.REPORT_JOB_CHUNK_SIZE)
+        )
+        for transaction in rows:
+            if y < _JOB_MARGIN:
+                pdf.showPage()
+                page += 1
+                y = _job_page_header(pdf, title, page)
+            pdf.drawString(_JOB_COLUMNS[0][1], y, transaction.timestamp.strftime("%Y-%m-%d %H:%M:%S"))
+            pdf.drawString(_JOB_COLUMNS[1][1], y, transaction.tx_id)
+            pdf.drawString(_JOB_COLUMNS[2][1], y, transaction.sender[:16])
+            pdf.drawString(_JOB_COLUMNS[3][1], y, transaction.receiver[:16])
+            pdf.drawRightString(_JOB_COLUMNS[4][1], y, f"{transaction.amount:,.2f}")
+            # The watchlist is loaded by the worker's initializer (_init_render_worker)
+            screening = watchlist_screener.screen_transaction(transaction.sender, transaction.receiver)
+            if screening["aml_status"] in ("match", "potential_match"):
+                pdf.drawString(_JOB_FLAG_X, y, "*")
+                flagged_count += 1
+                for party in ("sender", "receiver"):
+                    if screening[party]["matches"]:
+                        flagged.setdefault(getattr(transaction, party), screening[party])
+            y -= _JOB_LINE_HEIGHT
+            count += 1
+            total += transaction.amount
+
+        summary = [f"Transactions: {count:,}    Total amount: {total:,.2f}"]
+        version = watchlist_screener.status()["version"]
+        if version is None:
+            summary.append("AML Watchlist Screening: no watchlist loaded; transactions were not screened.")
+        else:
+            summary.append(
+                f"AML Watchlist Screening (version {version}): {flagged_count:,} transactions (marked *) "
+                f"involve {len(flagged):,} accounts with watchlist matches."
+            )
+            for account, screening in sorted(flagged.items())[:_JOB_MAX_FLAGGED_ACCOUNTS]:
+                top = screening["matches"][0]
+                summary.append(f"{account} [{screening['aml_status']}]: {describe_match(top)}")
+            if len(flagged) > _JOB_MAX_FLAGGED_ACCOUNTS:
+                summary.append(f"... and {len(flagged) - _JOB_MAX_FLAGGED_ACCOUNTS:,} more accounts")
+        y -= _JOB_LINE_HEIGHT
+        pdf.setFont("Helvetica-Bold", 9)
+        for line in summary:
+            if y < _JOB_MARGIN:
+                pdf.showPage()
+                page += 1
+                y = _job_page_header(pdf, title, page)
+                pdf.setFont("Helvetica-Bold", 9)
+            pdf.drawString(_JOB_MARGIN, y, line)
+            y -= _JOB_LINE_HEIGHT
+        pdf.save()
+        os.replace(tmp_path, file_path)
+
+        size_bytes = os.path.getsize(file_path)
+        job = crud_report.get_job(db, job_id=job_id)
+        job.status = "completed"
+        job.transaction_count = count
+        job.path = file_path
+        job.size_bytes = size_bytes
+        job.completed_at = datetime.now(timezone.utc)
+        db.commit()
+        crud_report.add_catalog_entry(db, path=file_path, size_bytes=size_bytes, job_id=job_id)
+    except Exception as e:
+        db.rollback()
+        job = crud_report.get_job(db, job_id=job_id)
+        if job is not None:
+            job.status = "failed"
+            job.error = str(e)
+            job.completed_at = datetime.now(timezone.utc)
+            db.commit()
+        raise
+    finally:
+        db.close()
+
+
+class ReportRenderer:
+    """
+    Renders AML reports in a process pool, backed by a content-addressed disk cache.
+
+    Reports are stored under a name derived from a hash of the transaction's
+    content, so an unchanged transaction is served from disk without
+    rendering, and the hash doubles as the HTTP ETag. Concurrent requests for
+    the same missing report share one render. Earlier renders of the same
+    transaction are looked up in the report catalog and deleted. The
+    directory is trimmed to `max_bytes` by deleting the least recently
+    served files.
+
+    The cache size is tracked as reports are written and removed, so the
+    directory is only scanned when the count goes over `max_bytes`, or
+    when it is older than CACHE_RESCAN_SECONDS and may have drifted
+    (another process sharing the directory, files removed by hand).
+    """
+
+    def __init__(self, reports_dir: str, workers: int, max_bytes: int):
+        self.reports_dir = reports_dir
+        self.workers = workers
+        self.max_bytes = max_bytes
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._pool_lock = threading.Lock()
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._jobs: Set[asyncio.Task] = set()
+        # Bytes of cached reports as of the last scan plus changes made since; None before the first scan
+        self._cache_bytes: Optional[int] = None
+        self._scanned_at = 0.0
+        self._cache_lock = threading.Lock()
+        self._hits = CACHE_REQUESTS.labels("reports", "hit")
+        self._misses = CACHE_REQUESTS.labels("reports", "miss")
+        self._coalesced = CACHE_REQUESTS.labels("reports", "coalesced")
+        self._evictions = CACHE_EVICTIONS.labels("reports")
+
+    def start(self) -> None:
+        with self._pool_lock:
+            if self._pool is None:
+                os.makedirs(self.reports_dir, exist_ok=True)
+                # spawn, not fork: the parent runs gateway reader threads
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=_init_render_worker,
+                )
+
+    def stop(self) -> None:
+        with self._pool_lock:
+            if self._pool is not None:
+                self._pool.shutdown(wait=True, cancel_futures=True)
+                self._pool = None
+
+    async def render(self, transaction: Transaction) -> Tuple[str, str]:
+        """
+        Return (file path, ETag) of the report for `transaction`, rendering it if needed.
+        """
+        fields = report_fields(transaction)
+        digest = report_digest(fields)
+        file_path = report_path(fields, digest, self.reports_dir)
+
+        if os.path.exists(file_path):
+            self._hits.inc()
+            try:
+                # mtime tracks last use for eviction
+                os.utime(file_path)
+            except FileNotFoundError:
+                pass
+            else:
+                return file_path, digest
+
+        inflight = self._inflight.get(digest)
+        if inflight is not None:
+            self._coalesced.inc()
+            return await asyncio.shield(inflight), digest
+
+        self._misses.inc()
+        self.start()
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._inflight[digest] = future
+        try:
+            await loop.run_in_executor(self._pool, render_report, fields, file_path)
+            async with AsyncSessionLocal() as db:
+                stale = await crud_report.get_stale_reports_async(db, tx_id=fields["tx_id"], keep=file_path)
+                removed = await loop.run_in_executor(None, self._after_render, file_path, stale)
+                await crud_report.remove_catalog_entries_async(db, paths=removed)
+                await crud_report.add_catalog_entry_async(
+                    db, path=file_path, size_bytes=os.path.getsize(file_path), tx_id=fields["tx_id"]
+                )
+        except BaseException as e:
+            future.set_exception(e)
+            future.exception()
+            raise
+        else:
+            future.set_result(file_path)
+            return file_path, digest
+        finally:
+            del self._inflight[digest]
+
+    def _after_render(self, file_path: str, stale: List[Tuple[str, int]]) -> List[str]:
+        freed = _remove_stale_versions(stale)
+        removed = [path for path, _ in stale]
+        with self._cache_lock:
+            if self._cache_bytes is not None:
+                self._cache_bytes += os.path.getsize(file_path) - freed
+                if self._cache_bytes <= self.max_bytes and time.monotonic() - self._scanned_at < CACHE_RESCAN_SECONDS:
+                    return removed
+            try:
+                evicted, self._cache_bytes = _trim_cache(self.reports_dir, self.max_bytes, keep=file_path)
+            except OSError:
+                logger.exception("Could not trim the report cache in %s", self.reports_dir)
+                self._cache_bytes = None
+            else:
+                self._scanned_at = time.monotonic()
+                self._evictions.inc(len(evicted))
+                removed.extend(evicted)
+        return removed
+
+    def submit_job(self, job_id: str) -> None:
+        """
+        Queue a bulk report job on the render pool; its status is tracked on the job row.
+        """
+        self.start()
+        task = asyncio.ensure_future(self._run_job(job_id))
+        self._jobs.add(task)
+        task.add_done_callback(self._jobs.discard)
+
+    async def _run_job(self, job_id: str) -> None:
+        try:
+            await asyncio.get_running_loop().run_in_executor(self._pool, render_job_report, job_id)
+        except Exception as e:
+            logger.exception("Report job %s failed", job_id)
+            # The worker records its own failures; this covers a worker that died mid-job
+            async with AsyncSessionLocal() as db:
+                job = await crud_report.get_job_async(db, job_id=job_id)
+                if job is not None and job.status in ("pending", "running"):
+                    job.status = "failed"
+                    job.error = str(e) or type(e).__name__
+                    job.completed_at = datetime.now(timezone.utc)
+                    await db.commit()
+
+
+report_renderer = ReportRenderer(
+    reports_dir=settings.REPORTS_DIR,
+    workers=settings.REPORT_RENDER_WORKERS,
+    max_bytes=settings.REPORT_CACHE_MAX_BYTES,
+)
@@ -0,0 +1,133 @@
+"""
+Local stand-in for the Fabric gateway worker.
+
+Speaks the same JSON-lines protocol as `node app/fabric-sdk.js --worker` and
+mirrors the behaviour of blockchain/chaincode/cbdc.go, so the gateway pool can
+be exercised without a Fabric network:
+
+    LEDGER_WORKER_COMMAND="python -m app.services.fake_ledger" uvicorn app.main:app
+
+State lives in a SQLite file (FAKE_LEDGER_PATH, default fake_ledger.sqlite3)
+so every worker in the pool, including respawned ones, sees the same ledger.
+"""
+import json
+import os
+import sqlite3
+import sys
+import uuid
+from datetime import datetime, timezone
+
+
+class FakeLedger:
+    def __init__(self, path: str):
+        self._conn = sqlite3.connect(path, timeout=30, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS accounts (name TEXT PRIMARY KEY, balance REAL NOT NULL)")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS transactions ("
+            "tx_id TEXT PRIMARY KEY, sender TEXT, receiver TEXT, amount REAL, timestamp TEXT)"
+        )
+
+    def _account(self, name: str) -> dict:
+        row = self._conn.execute("SELECT name, balance FROM accounts WHERE name = ?", (name,)).fetchone()
+        if row is None:
+            raise ValueError("account not found")
+        return {"name": row[0], "balance": row[1]}
+
+    def InitLedger(self) -> str:
+        self._conn.executemany(
+            "INSERT OR REPLACE INTO accounts (name, balance) VALUES (?, ?)",
+            [("BankA", 1000000.0), ("BankB", 500000.0)],
+        )
+        return ""
+
+    def Transfer(self, sender: str, receiver: str, amount_str: str) -> str:
+        try:
+            amount = float(amount_str)
+        except ValueError:
+            raise ValueError("invalid amount")
+        if amount <= 0:
+            raise ValueError("invalid amount")
+
+        self._conn.execute("BEGIN IMMEDIATE")
+        try:
+            try:
+                sender_acc = self._account(sender)
+            except ValueError as e:
+                raise ValueError(f"sender account error: {e}")
+            try:
+                self._account(receiver)
+            except ValueError as e:
+                raise ValueError(f"receiver account error: {e}")
+            if sender_acc["balance"] < amount:
+                raise ValueError("insufficient balance")
+
+            self._conn.execute("UPDATE accounts SET balance = balance - ? WHERE name = ?", (amount, sender))
+            self._conn.execute("UPDATE accounts SET balance = balance + ? WHERE name = ?", (amount, receiver))
+            self._conn.execute(
+                "INSERT INTO transactions VALUES (?, ?, ?, ?, ?)",
+                (uuid.uuid4().hex, sender, receiver, amount,
+                 datetime.now(timezone.utc).isoformat(timespec="seconds")),
+            )
+        except Exception:
+            self._conn.execute("ROLLBACK")
+            raise
+        self._conn.execute("COMMIT")
+        return ""
+
+    def QueryAccount(self, account: str) -> str:
+        return json.dumps(self._account(account))
+
+    def QueryBalance(self, account: str) -> str:
+        return json.dumps(self._account(account)["balance"])
+
+    def QueryHistory(self, account: str) -> str:
+        rows = self._conn.execute(
+            "SELECT tx_id, sender, receiver, amount, timestamp FROM transactions "
+            "WHERE sender = ? OR receiver = ? ORDER BY rowid",
+            (account, account),
+        )
+        keys = ("tx_id", "sender", "receiver", "amount", "timestamp")
+        return json.dumps([dict(zip(keys, row)) for row in rows])
+
+    def QueryHistoryPage(self, account: str, page_size: str, bookmark: str) -> str:
+        page_size = int(page_size)
+        if page_size <= 0:
+            raise ValueError("invalid page size")
+        rows = self._conn.execute(
+            "SELECT rowid, tx_id, sender, receiver, amount, timestamp FROM transactions "
+            "WHERE rowid > ? ORDER BY rowid LIMIT ?",
+            (int(bookmark or 0), page_size),
+        ).fetchall()
+        keys = ("tx_id", "sender", "receiver", "amount", "timestamp")
+        records = [dict(zip(keys, row[1:])) for row in rows if account in (row[2], row[3])]
+        next_bookmark = str(rows[-1][0]) if len(rows) == page_size else ""
+        return json.dumps({"records": records, "bookmark": next_bookmark})
+
+    def Ping(self) -> str:
+        return "pong"
+
+
+def serve(stdin=sys.stdin, stdout=sys.stdout) -> None:
+    ledger = FakeLedger(os.environ.get("FAKE_LEDGER_PATH", "fake_ledger.sqlite3"))
+    for line in stdin:
+        try:
+            request = json.loads(line)
+        except ValueError as e:
+            response = {"id": None, "error": f"Malformed request: {e}"}
+        else:
+            name = request.get("method") or ""
+            method = None if name.startswith("_") else getattr(ledger, name, None)
+            if method is None:
+                response = {"id": request.get("id"), "error": f"Unsupported function: {name}"}
+            else:
+                try:
+                    response = {"id": request.get("id"), "result": method(*request.get("args", []))}
+                except Exception as e:
+                    response = {"id": request.get("id"), "error": str(e)}
+        stdout.write(json.dumps(response) + "\n")
+        stdout.flush()
+
+
+if __name__ == "__main__":
+    serve()
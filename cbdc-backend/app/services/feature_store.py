@@ -0,0 +1,141 @@
+"""
+In-memory velocity features for the fraud model.
+
+Keeps a sliding one-hour window per sender as a ring of one-minute buckets,
+so reads and updates are O(1) regardless of transaction volume. Accounts are
+kept in LRU order and the coldest are evicted once `max_accounts` is reached.
+"""
+import logging
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from typing import Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.transaction import Transaction
+
+logger = logging.getLogger(__name__)
+
+
+class _AccountWindow:
+    __slots__ = ("counts", "last_minute", "total", "devices")
+
+    def __init__(self, size: int):
+        self.counts = [0] * size
+        self.last_minute: Optional[int] = None
+        self.total = 0
+        # device_id -> minute it was last used, oldest first
+        self.devices: "OrderedDict[str, int]" = OrderedDict()
+
+
+class VelocityFeatureStore:
+    """
+    Per-sender sliding-window counters behind the model's velocity features.
+
+    - tx_per_hour: accepted transactions sent in the window.
+    - device_id_freq: distinct devices the sender used in the window.
+    """
+
+    def __init__(self, window_minutes: int, max_accounts: int, max_devices_per_account: int = 32):
+        self.window_minutes = window_minutes
+        self.max_accounts = max_accounts
+        self.max_devices_per_account = max_devices_per_account
+        self._accounts: "OrderedDict[str, _AccountWindow]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._accounts)
+
+    def _advance(self, window: _AccountWindow, minute: int) -> None:
+        """
+        Move the window forward to `minute`, clearing buckets that fell out of it.
+        """
+        if window.last_minute is None:
+            window.last_minute = minute
+            return
+        gap = minute - window.last_minute
+        if gap <= 0:
+            return
+        if gap >= self.window_minutes:
+            window.counts = [0] * self.window_minutes
+            window.total = 0
+        else:
+            for expired in range(window.last_minute + 1, minute + 1):
+                slot = expired % self.window_minutes
+                window.total -= window.counts[slot]
+                window.counts[slot] = 0
+        window.last_minute = minute
+
+    def record(self, sender: str, device_id: Optional[str] = None, at: Optional[float] = None) -> None:
+        """
+        Count an accepted transaction; `at` is a Unix timestamp (defaults to now).
+        """
+        minute = int((time.time() if at is None else at) // 60)
+        with self._lock:
+            window = self._accounts.get(sender)
+            if window is None:
+                window = self._accounts[sender] = _AccountWindow(self.window_minutes)
+                if len(self._accounts) > self.max_accounts:
+                    self._accounts.popitem(last=False)
+            else:
+                self._accounts.move_to_end(sender)
+            self._advance(window, minute)
+            if minute <= window.last_minute - self.window_minutes:
+                return  # Older than the window
+            window.counts[minute % self.window_minutes] += 1
+            window.total += 1
+            if device_id is not None:
+                window.devices[device_id] = max(minute, window.devices.get(device_id, minute))
+                window.devices.move_to_end(device_id)
+                if len(window.devices) > self.max_devices_per_account:
+                    window.devices.popitem(last=False)
+
+    def features(self, sender: str, device_id: Optional[str] = None, at: Optional[float] = None) -> Tuple[int, int]:
+        """
+        Return (tx_per_hour, device_id_freq) for `sender` as of `at` (defaults to now).
+
+        The device being used now counts towards device_id_freq even if unseen.
+        """
+        minute = int((time.time() if at is None else at) // 60)
+        with self._lock:
+            window = self._accounts.get(sender)
+            if window is None:
+                return 0, int(device_id is not None)
+            self._accounts.move_to_end(sender)
+            self._advance(window, minute)
+            oldest = minute - self.window_minutes
+            devices = sum(1 for last_used in window.devices.values() if last_used > oldest)
+            if device_id is not None and window.devices.get(device_id, oldest) <= oldest:
+                devices += 1
+            return window.total, devices
+
+    def warm_start(self, db: Session, chunk_size: int = 10000) -> int:
+        """
+        Replay the last window of transactions from the RDS mirror.
+
+        Device ids are not stored there, so only tx_per_hour is restored.
+        Returns the number of rows replayed.
+        """
+        since = datetime.now(timezone.utc) - timedelta(minutes=self.window_minutes)
+        rows = (
+            db.query(Transaction.sender, Transaction.timestamp)
+            .filter(Transaction.timestamp >= since)
+            .order_by(Transaction.timestamp)
+            .yield_per(chunk_size)
+        )
+        replayed = 0
+        for sender, timestamp in rows:
+            if timestamp.tzinfo is None:
+                timestamp = timestamp.replace(tzinfo=timezone.utc)
+            self.record(sender, at=timestamp.timestamp())
+            replayed += 1
+        return replayed
+
+
+feature_store = VelocityFeatureStore(
+    window_minutes=settings.FEATURE_STORE_WINDOW_MINUTES,
+    max_accounts=settings.FEATURE_STORE_MAX_ACCOUNTS,
+)
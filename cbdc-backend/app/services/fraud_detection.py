@@ -1,17 +1,179 @@
-import random
+import asyncio
+import logging
+import threading
+from typing import List, Optional, Sequence
 
-def get_fraud_score(tx_id: str) -> dict:
+import numpy as np
+
+from app.core.config import settings
+from app.core.metrics import Histogram
+from app.services.fraud_model import FraudModel
+
+logger = logging.getLogger(__name__)
+
+# Loaded once per process on first use
+_model: Optional[FraudModel] = None
+_model_lock = threading.Lock()
+
+def get_model() -> FraudModel:
+    global _model
+    if _model is None:
+        with _model_lock:
+            if _model is None:
+                _model = FraudModel.load(settings.FRAUD_MODEL_PATH)
+    return _model
+
+def get_fraud_score(
+    tx_id: str,
+    amount: float = 0.0,
+    tx_per_hour: float = 0,
+    device_id_freq: float = 0,
+    is_foreign: float = 0,
+) -> dict:
     """
     Analyzes a transaction and returns a fraud score.
-    
-    This is a placeholder function. In a real system, this would
-    call the deployed TensorFlow model on AWS SageMaker or Lambda.
+
+    Runs the exported TensorFlow model in-process with NumPy
+    (see app/services/fraud_model.py).
     """
-    # Simulate a model prediction
-    score = random.uniform(0.0, 1.0)
-    
+    score = get_model().predict_one((amount, tx_per_hour, device_id_freq, is_foreign))
+
     return {
         "tx_id": tx_id,
         "fraud_score": score,
         "alert": score > 0.8  # Trigger an alert if score is high
-    } 
\ No newline at end of file
+    }
+
+
+def get_fraud_scores(tx_ids: List[str], features: Sequence[Sequence[float]]) -> List[dict]:
+    """
+    Scores a batch of transactions in one vectorized call.
+
+    `features` holds one (amount, tx_per_hour, device_id_freq, is_foreign)
+    row per transaction; results are returned in input order.
+    """
+    scores = get_model().predict(np.asarray(features, dtype=np.float64).reshape(len(tx_ids), -1))
+
+    return [
+        {"tx_id": tx_id, "fraud_score": score, "alert": score > 0.8}
+        for tx_id, score in zip(tx_ids, scores.tolist())
+    ]
+
+
+BATCH_SIZE = Histogram(
+    "fraud_batch_size",
+    "Transactions scored per micro-batch",
+    buckets=(1, 2, 4, 8, 16, 32, 64, 128, 256, 512, 1024),
+)
+QUEUE_WAIT = Histogram(
+    "fraud_batch_queue_wait_seconds",
+    "Time a score request waited in the micro-batch queue",
+    buckets=(0.0001, 0.00025, 0.0005, 0.001, 0.002, 0.005, 0.01, 0.025, 0.05, 0.1),
+)
+
+
+class FraudScoreBatcher:
+    """
+    Coalesces concurrent score requests into vectorized model calls.
+
+    Requests are queued until `max_batch_size` are pending or the oldest has
+    waited `max_wait_ms`, then scored with one get_fraud_scores call. The queue
+    holds at most `max_queue_depth` requests; beyond that callers wait for room.
+    """
+
+    def __init__(self, max_batch_size: int, max_wait_ms: float, max_queue_depth: int):
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.max_queue_depth = max_queue_depth
+        self._queue: Optional[asyncio.Queue] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        # Requests taken off the queue but not yet resolved
+        self._batch: list = []
+
+    async def start(self) -> None:
+        if self._task is not None and not self._task.done():
+            return
+        self._queue = asyncio.Queue(maxsize=self.max_queue_depth)
+        self._wakeup = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        pending, self._batch = self._batch, []
+        while not self._queue.empty():
+            pending.append(self._queue.get_nowait())
+        for _, _, future, _ in pending:
+            if not future.done():
+                future.set_exception(RuntimeError("Fraud scoring is shutting down"))
+
+    async def score(
+        self,
+        tx_id: str,
+        amount: float = 0.0,
+        tx_per_hour: float = 0,
+        device_id_freq: float = 0,
+        is_foreign: float = 0,
+    ) -> dict:
+        """
+        Same result as get_fraud_score, computed as part of a micro-batch.
+        """
+        await self.start()
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        await self._queue.put((tx_id, (amount, tx_per_hour, device_id_freq, is_foreign), future, loop.time()))
+        self._wakeup.set()
+        return await future
+
+    async def _collect(self) -> list:
+        loop = asyncio.get_running_loop()
+        batch = self._batch = [await self._queue.get()]
+        deadline = batch[0][3] + self.max_wait
+        while len(batch) < self.max_batch_size:
+            while len(batch) < self.max_batch_size and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+            remaining = deadline - loop.time()
+            if len(batch) >= self.max_batch_size or remaining <= 0:
+                break
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), remaining)
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = await self._collect()
+            now = loop.time()
+            BATCH_SIZE.observe(len(batch))
+            for _, _, _, enqueued_at in batch:
+                QUEUE_WAIT.observe(now - enqueued_at)
+            try:
+                results = get_fraud_scores([item[0] for item in batch], [item[1] for item in batch])
+            except Exception as e:
+                logger.exception("Fraud scoring batch of %d failed", len(batch))
+                for _, _, future, _ in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                self._batch = []
+                continue
+            for (_, _, future, _), result in zip(batch, results):
+                if not future.done():
+                    future.set_result(result)
+            self._batch = []
+
+
+fraud_batcher = FraudScoreBatcher(
+    max_batch_size=settings.FRAUD_BATCH_MAX_SIZE,
+    max_wait_ms=settings.FRAUD_BATCH_MAX_WAIT_MS,
+    max_queue_depth=settings.FRAUD_BATCH_MAX_QUEUE_DEPTH,
+)
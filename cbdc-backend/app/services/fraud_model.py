@@ -0,0 +1,129 @@
+"""
+Pure-NumPy inference for the fraud model trained in train_model.py.
+
+The model is exported as a compact .npz artifact holding the dense-layer
+weights and the StandardScaler parameters, so scoring needs no TensorFlow.
+"""
+import hashlib
+from typing import List, Sequence, Tuple
+
+import numpy as np
+
+FORMAT_VERSION = 1
+FEATURES = ("amount", "tx_per_hour", "device_id_freq", "is_foreign")
+ACTIVATIONS = ("relu", "sigmoid", "linear")
+
+
+class FraudModelError(Exception):
+    """
+    Raised when a model artifact is missing, corrupt or incompatible.
+    """
+
+
+def _digest(arrays: dict) -> str:
+    """
+    SHA-256 over every array's name, dtype, shape and raw bytes, in name order.
+    """
+    digest = hashlib.sha256()
+    for name in sorted(arrays):
+        array = np.ascontiguousarray(arrays[name])
+        digest.update(name.encode())
+        digest.update(array.dtype.str.encode())
+        digest.update(repr(array.shape).encode())
+        digest.update(array.tobytes())
+    return digest.hexdigest()
+
+
+def save_artifact(
+    path: str,
+    layers: Sequence[Tuple[np.ndarray, np.ndarray, str]],
+    scaler_mean: np.ndarray,
+    scaler_scale: np.ndarray,
+) -> None:
+    """
+    Write a model artifact.
+
+    `layers` is a list of (kernel, bias, activation) tuples for the dense
+    layers in order; dropout and other inference no-ops are left out.
+    """
+    arrays = {
+        "format_version": np.array(FORMAT_VERSION),
+        "features": np.array(FEATURES),
+        "scaler_mean": np.asarray(scaler_mean, dtype=np.float64),
+        "scaler_scale": np.asarray(scaler_scale, dtype=np.float64),
+        "activations": np.array([activation for _, _, activation in layers]),
+    }
+    for index, (kernel, bias, _) in enumerate(layers):
+        arrays[f"kernel_{index}"] = np.asarray(kernel, dtype=np.float64)
+        arrays[f"bias_{index}"] = np.asarray(bias, dtype=np.float64)
+    arrays["checksum"] = np.array(_digest(arrays))
+    with open(path, "wb") as f:
+        np.savez_compressed(f, **arrays)
+
+
+class FraudModel:
+    """
+    Dense feed-forward network evaluated with NumPy.
+
+    The scaler is folded into the first layer at load time, so a forward pass
+    is just one matrix product and activation per layer.
+    """
+
+    def __init__(self, layers: List[Tuple[np.ndarray, np.ndarray, str]], scaler_mean: np.ndarray, scaler_scale: np.ndarray):
+        (kernel, bias, activation), rest = layers[0], list(layers[1:])
+        # ((x - mean) / scale) @ W + b  ==  x @ (W / scale[:, None]) + (b - (mean / scale) @ W)
+        folded_kernel = kernel / scaler_scale[:, None]
+        folded_bias = bias - (scaler_mean / scaler_scale) @ kernel
+        self.layers = [(folded_kernel, folded_bias, activation)] + rest
+        self.n_features = kernel.shape[0]
+
+    @classmethod
+    def load(cls, path: str) -> "FraudModel":
+        try:
+            with np.load(path, allow_pickle=False) as artifact:
+                arrays = {name: artifact[name] for name in artifact.files}
+        except (OSError, ValueError) as e:
+            raise FraudModelError(f"Cannot read fraud model artifact {path}: {e}")
+
+        if "format_version" not in arrays or int(arrays["format_version"]) != FORMAT_VERSION:
+            raise FraudModelError(
+                f"Unsupported fraud model artifact version {arrays.get('format_version')}, expected {FORMAT_VERSION}"
+            )
+        checksum = str(arrays.pop("checksum", ""))
+        if checksum != _digest(arrays):
+            raise FraudModelError(f"Fraud model artifact {path} failed its integrity check")
+        if tuple(arrays["features"]) != FEATURES:
+            raise FraudModelError(f"Fraud model expects features {tuple(arrays['features'])}, backend provides {FEATURES}")
+
+        layers = []
+        n_inputs = len(FEATURES)
+        for index, activation in enumerate(arrays["activations"]):
+            kernel, bias = arrays[f"kernel_{index}"], arrays[f"bias_{index}"]
+            if activation not in ACTIVATIONS or kernel.shape != (n_inputs, bias.shape[0]):
+                raise FraudModelError(f"Fraud model layer {index} is malformed")
+            layers.append((kernel, bias, str(activation)))
+            n_inputs = bias.shape[0]
+        if n_inputs != 1:
+            raise FraudModelError("Fraud model must have a single output")
+        return cls(layers, arrays["scaler_mean"], arrays["scaler_scale"])
+
+    def predict(self, features: np.ndarray) -> np.ndarray:
+        """
+        Score a (n, len(FEATURES)) feature matrix; returns n fraud probabilities.
+        """
+        x = np.asarray(features, dtype=np.float64)
+        for kernel, bias, activation in self.layers:
+            x = x @ kernel
+            x += bias
+            if activation == "relu":
+                np.maximum(x, 0.0, out=x)
+            elif activation == "sigmoid":
+                # Numerically stable logistic: exp(-logaddexp(0, -x)) == 1 / (1 + exp(-x))
+                x = np.exp(-np.logaddexp(0.0, -x))
+        return x[:, 0]
+
+    def predict_one(self, features: Sequence[float]) -> float:
+        """
+        Score a single feature vector.
+        """
+        return float(self.predict(np.asarray(features, dtype=np.float64).reshape(1, -1))[0])
@@ -0,0 +1,97 @@
+"""
+FX rate table for mBridge settlement.
+
+Rates are configured as units of each currency per one unit of a base
+currency, plus optional directly quoted pairs that override the cross rate.
+They are expanded into a dense currency x currency matrix, so a lookup is one
+array index. Currencies are interned to integer codes so vectorized
+settlement code can index the matrix directly.
+"""
+import json
+from typing import Dict, Optional
+
+import numpy as np
+
+from app.core.config import settings
+
+# Units per USD; GHS/NGN is quoted directly at the rate mBridge has always used
+DEFAULT_RATES = {
+    "base": "USD",
+    "rates": {
+        "USD": 1.0,
+        "EUR": 0.92,
+        "GBP": 0.79,
+        "CNY": 7.24,
+        "HKD": 7.82,
+        "THB": 36.5,
+        "AED": 3.6725,
+        "SAR": 3.75,
+        "GHS": 15.0,
+        "NGN": 1050.0,
+        "KES": 129.0,
+        "ZAR": 18.2,
+        "XOF": 603.0,
+        "EGP": 48.5,
+        "INR": 83.4,
+    },
+    "pairs": {
+        "GHS/NGN": 70.0,
+    },
+}
+
+
+class UnsupportedCurrency(ValueError):
+    pass
+
+
+class FXRateTable:
+    def __init__(self, base: str, rates: Dict[str, float], pairs: Optional[Dict[str, float]] = None):
+        if rates.get(base) != 1.0:
+            raise ValueError(f"Base currency {base} must have rate 1.0")
+        self.base = base
+        self.currencies = list(rates)
+        self.codes = {currency: code for code, currency in enumerate(self.currencies)}
+        units_per_base = np.array([rates[currency] for currency in self.currencies], dtype=np.float64)
+        # matrix[from, to] = units of `to` per unit of `from`
+        self.matrix = units_per_base[np.newaxis, :] / units_per_base[:, np.newaxis]
+        for pair, rate in (pairs or {}).items():
+            from_currency, to_currency = pair.split("/")
+            from_code, to_code = self.code(from_currency), self.code(to_currency)
+            self.matrix[from_code, to_code] = rate
+            self.matrix[to_code, from_code] = 1 / rate
+
+    @classmethod
+    def from_file(cls, path: str) -> "FXRateTable":
+        with open(path) as f:
+            return cls.from_dict(json.load(f))
+
+    @classmethod
+    def from_dict(cls, table: dict) -> "FXRateTable":
+        return cls(table["base"], table["rates"], table.get("pairs"))
+
+    def code(self, currency: str) -> int:
+        try:
+            return self.codes[currency]
+        except KeyError:
+            raise UnsupportedCurrency(f"Unsupported currency {currency}")
+
+    def rate(self, from_currency: str, to_currency: str) -> float:
+        """
+        Units of `to_currency` per unit of `from_currency`.
+        """
+        return float(self.matrix[self.code(from_currency), self.code(to_currency)])
+
+    def convert(self, amounts: np.ndarray, from_codes: np.ndarray, to_codes: np.ndarray) -> np.ndarray:
+        """
+        Vectorized conversion of `amounts` between currency codes.
+        """
+        return amounts * self.matrix[from_codes, to_codes]
+
+
+def load_fx_table() -> FXRateTable:
+    if settings.FX_RATES_PATH:
+        return FXRateTable.from_file(settings.FX_RATES_PATH)
+    return FXRateTable.from_dict(DEFAULT_RATES)
+
+
+fx_table = load_fx_table()
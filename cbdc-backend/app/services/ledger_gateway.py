@@ -0,0 +1,281 @@
+import asyncio
+import itertools
+import json
+import logging
+import queue
+import shlex
+import subprocess
+import threading
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from typing import Callable, Dict, List, Optional
+
+from app.core.config import settings
+from app.services.cache import AsyncTTLCache
+
+logger = logging.getLogger(__name__)
+
+# Minimum pause after respawning a worker
+RESPAWN_BACKOFF_SECONDS = 1.0
+
+
+class LedgerError(Exception):
+    """
+    Raised when a ledger call fails or its worker dies.
+    """
+
+
+class LedgerTimeout(LedgerError):
+    """
+    Raised when a ledger call does not complete within its timeout.
+    """
+
+
+class _Worker:
+    """
+    One long-lived gateway process speaking JSON lines on stdin/stdout.
+
+    Requests are tagged with an id so many calls can be in flight on the
+    same process. A writer thread feeds stdin, so submitting never blocks on
+    the pipe, and a reader thread matches responses back to their futures.
+    `on_exit` is called once the process's output ends.
+    """
+
+    def __init__(self, command: List[str], on_exit: Optional[Callable[[], None]] = None):
+        self.process = subprocess.Popen(
+            command,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            text=True,
+            bufsize=1,
+        )
+        self.pending: Dict[int, Future] = {}
+        self._ids = itertools.count(1)
+        # Guards pending and _closed only; never held across pipe I/O
+        self._lock = threading.Lock()
+        self._closed = False
+        self._on_exit = on_exit
+        self._writes: queue.SimpleQueue = queue.SimpleQueue()
+        self._writer = threading.Thread(target=self._write_loop, daemon=True)
+        self._writer.start()
+        self._reader = threading.Thread(target=self._read_loop, daemon=True)
+        self._reader.start()
+
+    @property
+    def alive(self) -> bool:
+        return self.process.poll() is None
+
+    def submit(self, method: str, args: List[str]) -> Future:
+        future: Future = Future()
+        with self._lock:
+            if self._closed:
+                future.set_exception(LedgerError("Ledger worker unavailable"))
+                return future
+            request_id = next(self._ids)
+            future.request_id = request_id
+            self.pending[request_id] = future
+        self._writes.put((request_id, json.dumps({"id": request_id, "method": method, "args": args}) + "\n"))
+        return future
+
+    def forget(self, future: Future) -> None:
+        with self._lock:
+            self.pending.pop(getattr(future, "request_id", None), None)
+
+    def stop(self) -> None:
+        # The writer closes stdin once the requests queued so far are written
+        self._writes.put(None)
+        try:
+            self.process.wait(timeout=5)
+        except subprocess.TimeoutExpired:
+            self.process.kill()
+        self._fail_pending("Ledger worker stopped")
+
+    def kill(self) -> None:
+        self.process.kill()
+        self._writes.put(None)
+        self._fail_pending("Ledger worker killed")
+
+    def _write_loop(self) -> None:
+        while True:
+            item = self._writes.get()
+            if item is None:
+                break
+            request_id, line = item
+            try:
+                self.process.stdin.write(line)
+                self.process.stdin.flush()
+            except (OSError, ValueError) as e:
+                with self._lock:
+                    future = self.pending.pop(request_id, None)
+                if future is not None and not future.done():
+                    future.set_exception(LedgerError(f"Ledger worker unavailable: {e}"))
+        try:
+            self.process.stdin.close()
+        except (OSError, ValueError):
+            pass
+
+    def _read_loop(self) -> None:
+        for line in self.process.stdout:
+            try:
+                response = json.loads(line)
+            except ValueError:
+                logger.warning("Ignoring malformed ledger worker output: %r", line)
+                continue
+            with self._lock:
+                future = self.pending.pop(response.get("id"), None)
+            if future is None or future.done():
+                continue
+            if "error" in response:
+                future.set_exception(LedgerError(response["error"]))
+            else:
+                future.set_result(response.get("result", ""))
+        self._fail_pending("Ledger worker exited")
+        self._writes.put(None)
+        if self._on_exit is not None:
+            self._on_exit()
+
+    def _fail_pending(self, reason: str) -> None:
+        with self._lock:
+            self._closed = True
+            pending, self.pending = self.pending, {}
+        for future in pending.values():
+            if not future.done():
+                future.set_exception(LedgerError(reason))
+
+
+class LedgerGateway:
+    """
+    Pool of persistent ledger workers.
+
+    Calls go to the least-loaded live worker. A background thread pings
+    every worker periodically and respawns any that stopped answering; a
+    worker that exits wakes it so the replacement is spawned right away.
+    """
+
+    def __init__(
+        self,
+        command: str,
+        size: int,
+        timeout: float,
+        health_check_interval: float,
+    ):
+        self.command = shlex.split(command)
+        self.size = size
+        self.timeout = timeout
+        self.health_check_interval = health_check_interval
+        self._workers: List[_Worker] = []
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._wakeup = threading.Event()
+        self._health_thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        with self._lock:
+            if self._workers:
+                return
+            self._stopped.clear()
+            self._workers = [self._spawn() for _ in range(self.size)]
+            self._health_thread = threading.Thread(target=self._health_loop, daemon=True)
+            self._health_thread.start()
+
+    def stop(self) -> None:
+        self._stopped.set()
+        self._wakeup.set()
+        with self._lock:
+            workers, self._workers = self._workers, []
+        for worker in workers:
+            worker.stop()
+
+    def call(self, method: str, *args: str, timeout: Optional[float] = None) -> str:
+        """
+        Invoke a chaincode function and block until its result string arrives.
+        """
+        worker = self._pick_worker()
+        future = worker.submit(method, list(args))
+        try:
+            return future.result(timeout=timeout or self.timeout)
+        except FutureTimeoutError:
+            worker.forget(future)
+            raise LedgerTimeout(f"Ledger call {method} timed out")
+
+    async def acall(self, method: str, *args: str, timeout: Optional[float] = None) -> str:
+        """
+        Invoke a chaincode function without blocking the event loop.
+        """
+        worker = self._pick_worker()
+        future = worker.submit(method, list(args))
+        try:
+            return await asyncio.wait_for(asyncio.wrap_future(future), timeout or self.timeout)
+        except asyncio.TimeoutError:
+            worker.forget(future)
+            raise LedgerTimeout(f"Ledger call {method} timed out")
+
+    def _spawn(self) -> _Worker:
+        return _Worker(self.command, on_exit=self._wakeup.set)
+
+    def _pick_worker(self) -> _Worker:
+        if not self._workers:
+            self.start()
+        with self._lock:
+            # Dead workers are replaced by the health thread; until then a call
+            # on one fails fast with LedgerError
+            live = [worker for worker in self._workers if worker.alive] or self._workers
+            return min(live, key=lambda worker: len(worker.pending))
+
+    def _health_loop(self) -> None:
+        while True:
+            self._wakeup.wait(self.health_check_interval)
+            self._wakeup.clear()
+            if self._stopped.is_set():
+                return
+            with self._lock:
+                workers = list(enumerate(self._workers))
+            for index, worker in workers:
+                healthy = worker.alive
+                if healthy:
+                    future = worker.submit("Ping", [])
+                    try:
+                        future.result(timeout=self.timeout)
+                    except Exception:
+                        worker.forget(future)
+                        healthy = False
+                if healthy:
+                    continue
+                logger.warning("Respawning unhealthy ledger worker (pid %s)", worker.process.pid)
+                worker.kill()
+                try:
+                    replacement = self._spawn()
+                except OSError:
+                    logger.exception("Could not respawn ledger worker")
+                    continue
+                with self._lock:
+                    replaced = index < len(self._workers) and self._workers[index] is worker
+                    if replaced:
+                        self._workers[index] = replacement
+                if not replaced:
+                    replacement.stop()
+                # A worker that dies on startup must not turn this into a spawn loop
+                self._stopped.wait(RESPAWN_BACKOFF_SECONDS)
+
+
+ledger_gateway = LedgerGateway(
+    command=settings.LEDGER_WORKER_COMMAND,
+    size=settings.LEDGER_POOL_SIZE,
+    timeout=settings.LEDGER_CALL_TIMEOUT,
+    health_check_interval=settings.LEDGER_HEALTH_CHECK_INTERVAL,
+)
+
+# Balance and account lookups, keyed by (chaincode function, account)
+ledger_cache = AsyncTTLCache(
+    "ledger",
+    max_entries=settings.LEDGER_CACHE_MAX_ENTRIES,
+    ttl_seconds=settings.LEDGER_CACHE_TTL_SECONDS,
+)
+
+
+def invalidate_accounts(*accounts: str) -> None:
+    """
+    Drop cached ledger reads for accounts whose state just changed.
+    """
+    ledger_cache.invalidate(*(
+        (function, account) for account in accounts for function in ("QueryBalance", "QueryAccount")
+    ))
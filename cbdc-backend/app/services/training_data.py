@@ -0,0 +1,350 @@
+"""
+Streaming feature extraction for out-of-core training of the fraud model.
+
+Transactions are read oldest first in bounded chunks, from Postgres through a
+server-side cursor or from exported Parquet shards. Each chunk passes once
+through the velocity features, has its labels attached and is written to
+disk as a feature shard. The StandardScaler is fitted incrementally along
+the way. Memory therefore stays bounded by the chunk size plus the last
+hour of rows, however large the table is. Training then streams the shards
+(see train_model.py).
+
+The extraction checkpoints after every chunk (stream position, counters,
+scaler and velocity state in one atomically replaced file) and resumes from
+the last checkpoint when run again with the same work directory.
+"""
+import glob
+import json
+import logging
+import os
+import pickle
+import sys
+import time
+from datetime import datetime, timezone
+from typing import Callable, Iterator, List, Optional, Set, Tuple
+
+import numpy as np
+from sklearn.preprocessing import StandardScaler
+from sqlalchemy.engine import Engine
+
+from app.crud.crud_transaction import training_rows_query
+from app.services.feature_store import VelocityFeatureStore
+
+logger = logging.getLogger(__name__)
+
+CHECKPOINT_FILE = "checkpoint.pkl"
+SHARD_DIR = "shards"
+
+
+def fraud_rule(amount, tx_per_hour, is_foreign):
+    """
+    The labelling rule of the synthetic training set, used as weak labels
+    when no confirmed fraud labels are given. Works on arrays and Series.
+    """
+    return ((amount > 1000) & (tx_per_hour > 10)) | ((amount > 500) & (is_foreign == 1))
+
+
+class Chunk:
+    """
+    Columns of consecutive transactions plus the stream position just after them.
+    """
+
+    def __init__(
+        self,
+        tx_ids: np.ndarray,
+        senders: np.ndarray,
+        amounts: np.ndarray,
+        minutes: np.ndarray,
+        position: dict,
+        devices: Optional[np.ndarray] = None,
+        is_foreign: Optional[np.ndarray] = None,
+    ):
+        self.tx_ids = tx_ids
+        self.senders = senders
+        self.amounts = amounts
+        # Unix minute of each transaction, the feature store's time resolution
+        self.minutes = minutes
+        self.position = position
+        self.devices = devices
+        self.is_foreign = is_foreign
+
+    def __len__(self) -> int:
+        return len(self.amounts)
+
+
+def _unix_minute(timestamp: datetime) -> int:
+    if timestamp.tzinfo is None:
+        timestamp = timestamp.replace(tzinfo=timezone.utc)
+    return int(timestamp.timestamp() // 60)
+
+
+def sql_chunks(engine: Engine, chunk_size: int, position: Optional[dict] = None) -> Iterator[Chunk]:
+    """
+    Stream the transactions table oldest first through a server-side cursor.
+
+    Positions are (timestamp, id) keysets, so a resumed run starts with an
+    index seek rather than skipping rows.
+    """
+    after = None
+    if position is not None:
+        after = (datetime.fromisoformat(position["timestamp"]), position["id"])
+    with engine.connect() as connection:
+        result = connection.execution_options(stream_results=True, max_row_buffer=chunk_size).execute(
+            training_rows_query(after)
+        )
+        for rows in result.partitions(chunk_size):
+            tx_ids, senders, amounts, timestamps, _ = zip(*rows)
+            last = rows[-1]
+            yield Chunk(
+                tx_ids=np.array(tx_ids, dtype=object),
+                senders=np.array(senders, dtype=object),
+                amounts=np.array(amounts, dtype=np.float64),
+                minutes=np.fromiter((_unix_minute(ts) for ts in timestamps), dtype=np.int64, count=len(rows)),
+                position={"timestamp": last.timestamp.isoformat(), "id": last.id},
+            )
+
+
+def parquet_chunks(paths: List[str], chunk_size: int, position: Optional[dict] = None) -> Iterator[Chunk]:
+    """
+    Stream exported Parquet shards, in the given order.
+
+    The shards must together be ordered by timestamp. They need tx_id,
+    sender, amount and timestamp columns. device_id and is_foreign are used
+    when present. Requires pyarrow.
+    """
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise RuntimeError("Reading Parquet shards requires pyarrow (pip install pyarrow)")
+
+    start_file, start_row = (position["file"], position["row"]) if position is not None else (0, 0)
+    for file_index in range(start_file, len(paths)):
+        parquet = pq.ParquetFile(paths[file_index])
+        names = parquet.schema_arrow.names
+        columns = [name for name in ("tx_id", "sender", "amount", "timestamp", "device_id", "is_foreign") if name in names]
+        skip = start_row if file_index == start_file else 0
+        offset = 0
+        for batch in parquet.iter_batches(batch_size=chunk_size, columns=columns):
+            offset += batch.num_rows
+            if offset <= skip:
+                continue
+            if offset - batch.num_rows < skip:
+                batch = batch.slice(skip - (offset - batch.num_rows))
+            seconds = batch.column("timestamp").cast(pa.timestamp("s")).cast(pa.int64()).to_numpy()
+            yield Chunk(
+                tx_ids=batch.column("tx_id").to_numpy(zero_copy_only=False).astype(object),
+                senders=batch.column("sender").to_numpy(zero_copy_only=False).astype(object),
+                amounts=batch.column("amount").to_numpy(zero_copy_only=False).astype(np.float64),
+                minutes=seconds // 60,
+                position={"file": file_index, "row": offset},
+                devices=batch.column("device_id").to_numpy(zero_copy_only=False).astype(object) if "device_id" in columns else None,
+                is_foreign=batch.column("is_foreign").to_numpy(zero_copy_only=False).astype(np.float64) if "is_foreign" in columns else None,
+            )
+
+
+def parquet_paths(patterns: List[str]) -> List[str]:
+    paths = sorted(path for pattern in patterns for path in glob.glob(pattern))
+    if not paths:
+        raise FileNotFoundError(f"No Parquet shards match {patterns}")
+    return paths
+
+
+class VelocityFeatures:
+    """
+    tx_per_hour and device_id_freq over a timestamp-ordered stream, exactly as
+    the serving feature store computes them before recording a transaction.
+
+    Without device ids (the transactions table does not store them),
+    tx_per_hour is computed for a whole chunk at once. The rows are sorted by
+    (sender, minute), and each row's count is its distance to the first row of
+    the same sender inside the window. The last window of rows is carried
+    into the next chunk. With device ids, rows go through a
+    VelocityFeatureStore one by one.
+    """
+
+    def __init__(self, window_minutes: int):
+        self.window_minutes = window_minutes
+        self._senders = np.empty(0, dtype=object)
+        self._minutes = np.empty(0, dtype=np.int64)
+        self._devices = np.empty(0, dtype=object)
+        self._store: Optional[VelocityFeatureStore] = None
+
+    def compute(self, chunk: Chunk) -> Tuple[np.ndarray, np.ndarray]:
+        minutes = chunk.minutes
+        if len(minutes) and (
+            np.any(minutes[1:] < minutes[:-1]) or (len(self._minutes) and minutes[0] < self._minutes[-1])
+        ):
+            raise ValueError("Training input must be ordered by timestamp")
+        devices = chunk.devices if chunk.devices is not None else np.full(len(chunk), None, dtype=object)
+        if chunk.devices is None:
+            tx_per_hour = self._count_recent(chunk.senders, minutes)
+            device_id_freq = np.zeros(len(chunk))
+        else:
+            tx_per_hour, device_id_freq = self._replay(chunk.senders, minutes, devices)
+        self._keep_window(chunk.senders, minutes, devices)
+        return tx_per_hour, device_id_freq
+
+    def _count_recent(self, senders: np.ndarray, minutes: np.ndarray) -> np.ndarray:
+        carried = len(self._senders)
+        all_minutes = np.concatenate([self._minutes, minutes])
+        _, codes = np.unique(np.concatenate([self._senders, senders]).astype(str), return_inverse=True)
+        # Stable: same sender and minute keep stream order, so only earlier rows are counted
+        order = np.lexsort((np.arange(len(all_minutes)), all_minutes, codes))
+        keys = (codes[order].astype(np.int64) << 32) | all_minutes[order]
+        first_in_window = np.searchsorted(keys, keys - (self.window_minutes - 1), side="left")
+        counts = np.empty(len(keys), dtype=np.int64)
+        counts[order] = np.arange(len(keys)) - first_in_window
+        return counts[carried:].astype(np.float64)
+
+    def _replay(self, senders: np.ndarray, minutes: np.ndarray, devices: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        if self._store is None:
+            self._store = VelocityFeatureStore(self.window_minutes, max_accounts=sys.maxsize)
+            for sender, minute, device in zip(self._senders, self._minutes, self._devices):
+                self._store.record(sender, device, at=minute * 60)
+        tx_per_hour = np.empty(len(senders))
+        device_id_freq = np.empty(len(senders))
+        for i, (sender, minute, device) in enumerate(zip(senders, minutes.tolist(), devices)):
+            tx_per_hour[i], device_id_freq[i] = self._store.features(sender, device, at=minute * 60)
+            self._store.record(sender, device, at=minute * 60)
+        return tx_per_hour, device_id_freq
+
+    def _keep_window(self, senders: np.ndarray, minutes: np.ndarray, devices: np.ndarray) -> None:
+        all_minutes = np.concatenate([self._minutes, minutes])
+        if not len(all_minutes):
+            return
+        keep = all_minutes > all_minutes[-1] - self.window_minutes
+        self._senders = np.concatenate([self._senders, senders])[keep]
+        self._minutes = all_minutes[keep]
+        self._devices = np.concatenate([self._devices, devices])[keep]
+
+    def state(self) -> dict:
+        return {"senders": self._senders, "minutes": self._minutes, "devices": self._devices}
+
+    def restore(self, state: dict) -> None:
+        self._senders, self._minutes, self._devices = state["senders"], state["minutes"], state["devices"]
+        self._store = None
+
+
+class FeatureExtraction:
+    """
+    One resumable pass from a transaction stream to feature shards and a fitted scaler.
+
+    `labels` is a set of confirmed fraudulent tx_ids. Without it, rows are
+    labelled with `fraud_rule` (weak supervision).
+    """
+
+    def __init__(self, workdir: str, window_minutes: int, labels: Optional[Set[str]] = None):
+        self.workdir = workdir
+        self.labels = labels
+        self.velocity = VelocityFeatures(window_minutes)
+        self.scaler = StandardScaler()
+        self.position: Optional[dict] = None
+        self.rows = 0
+        self.positives = 0
+        self.shard_rows: List[int] = []
+        self.complete = False
+        os.makedirs(os.path.join(workdir, SHARD_DIR), exist_ok=True)
+        self._load()
+
+    @property
+    def checkpoint_path(self) -> str:
+        return os.path.join(self.workdir, CHECKPOINT_FILE)
+
+    def shard_path(self, index: int) -> str:
+        return os.path.join(self.workdir, SHARD_DIR, f"shard_{index:06d}.npz")
+
+    def shard_paths(self) -> List[str]:
+        return [self.shard_path(index) for index in range(len(self.shard_rows))]
+
+    def _load(self) -> None:
+        if not os.path.exists(self.checkpoint_path):
+            return
+        with open(self.checkpoint_path, "rb") as f:
+            state = pickle.load(f)
+        self.position = state["position"]
+        self.rows = state["rows"]
+        self.positives = state["positives"]
+        self.shard_rows = state["shard_rows"]
+        self.complete = state["complete"]
+        self.scaler = state["scaler"]
+        self.velocity.restore(state["velocity"])
+        logger.info("Resuming feature extraction after %d rows in %d shards", self.rows, len(self.shard_rows))
+
+    def _save(self) -> None:
+        state = {
+            "position": self.position,
+            "rows": self.rows,
+            "positives": self.positives,
+            "shard_rows": self.shard_rows,
+            "complete": self.complete,
+            "scaler": self.scaler,
+            "velocity": self.velocity.state(),
+        }
+        tmp_path = self.checkpoint_path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.checkpoint_path)
+
+    def run(self, chunks: Callable[[Optional[dict]], Iterator[Chunk]], max_rows: Optional[int] = None) -> dict:
+        """
+        Consume `chunks(position)` from the last checkpoint to the end (or `max_rows`).
+
+        Returns a summary with the throughput of this run.
+        """
+        started, rows_at_start = time.perf_counter(), self.rows
+        if not self.complete:
+            for chunk in chunks(self.position):
+                self._process(chunk)
+                elapsed = time.perf_counter() - started
+                logger.info(
+                    "Extracted %d rows (%d shards), %.0f rows/sec", self.rows, len(self.shard_rows),
+                    (self.rows - rows_at_start) / elapsed if elapsed else 0.0,
+                )
+                if max_rows is not None and self.rows >= max_rows:
+                    break
+            else:
+                self.complete = True
+                self._save()
+        elapsed = time.perf_counter() - started
+        return {
+            "rows": self.rows,
+            "positives": self.positives,
+            "shards": len(self.shard_rows),
+            "complete": self.complete,
+            "rows_this_run": self.rows - rows_at_start,
+            "rows_per_sec": round((self.rows - rows_at_start) / elapsed, 1) if elapsed else 0.0,
+        }
+
+    def _process(self, chunk: Chunk) -> None:
+        if not len(chunk):
+            return
+        tx_per_hour, device_id_freq = self.velocity.compute(chunk)
+        is_foreign = chunk.is_foreign if chunk.is_foreign is not None else np.zeros(len(chunk))
+        # Column order of fraud_model.FEATURES
+        features = np.column_stack([chunk.amounts, tx_per_hour, device_id_freq, is_foreign]).astype(np.float32)
+        if self.labels is not None:
+            labels = np.fromiter((tx_id in self.labels for tx_id in chunk.tx_ids), dtype=bool, count=len(chunk))
+        else:
+            labels = fraud_rule(chunk.amounts, tx_per_hour, is_foreign)
+        self.scaler.partial_fit(features)
+
+        # Shard first: a crash before the checkpoint only leaves a shard that is rewritten on resume
+        np.savez(self.shard_path(len(self.shard_rows)), features=features, labels=labels.astype(np.float32))
+        self.shard_rows.append(len(chunk))
+        self.rows += len(chunk)
+        self.positives += int(labels.sum())
+        self.position = chunk.position
+        self._save()
+
+
+def load_labels(path: str) -> Set[str]:
+    """
+    Confirmed fraudulent tx_ids, one per line (or a JSON list).
+    """
+    with open(path) as f:
+        if path.endswith(".json"):
+            return set(json.load(f))
+        return {line.strip() for line in f if line.strip()}
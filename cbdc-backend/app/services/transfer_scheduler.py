@@ -0,0 +1,176 @@
+"""
+Conflict-aware scheduling of ledger Transfers.
+
+Transfer is a read-modify-write of both accounts' state, so two concurrent
+transfers sharing an account conflict on the ledger (MVCC read conflict on
+Fabric) and one of them is retried or rejected. The scheduler orders
+transfers per account instead: each transfer waits for the previous transfer
+on its sender and on its receiver, while transfers on disjoint accounts run
+concurrently up to a parallelism limit.
+"""
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Set, Tuple
+
+from app.core.config import settings
+from app.core.metrics import Counter, Gauge, Histogram
+from app.services.ledger_gateway import LedgerGateway, ledger_gateway
+
+SUBMITTED = Counter("transfer_submitted_total", "Transfers submitted to the scheduler")
+CONFLICTS = Counter("transfer_conflicts_total", "Transfers that had to wait for an earlier transfer on the same account")
+COALESCED = Counter("transfer_coalesced_total", "Transfers merged into a queued transfer between the same accounts")
+LEDGER_CALLS = Counter("transfer_ledger_calls_total", "Transfer submissions sent to the ledger", labelnames=("outcome",))
+QUEUE_DEPTH = Gauge("transfer_queue_depth", "Transfers waiting for an account or a dispatch slot")
+IN_FLIGHT = Gauge("transfer_in_flight", "Transfers currently being submitted to the ledger")
+WAIT = Histogram("transfer_wait_seconds", "Time from submission until a transfer was dispatched to the ledger")
+
+# Accounts kept in the per-account wait statistics
+MAX_TRACKED_ACCOUNTS = 1000
+
+
+class _Transfer:
+    __slots__ = ("sender", "receiver", "amount", "done", "enqueued_at", "dispatched")
+
+    def __init__(self, sender: str, receiver: str, amount: float):
+        self.sender = sender
+        self.receiver = receiver
+        self.amount = amount
+        self.done: asyncio.Future = asyncio.get_running_loop().create_future()
+        self.enqueued_at = time.monotonic()
+        self.dispatched = False
+
+
+class TransferScheduler:
+    """
+    Dispatches ledger Transfers in per-account FIFO order.
+
+    Ordering is established at submission: a transfer depends on the latest
+    transfer already queued on each of its two accounts, so dependencies
+    always point to earlier submissions and cannot deadlock.
+
+    With `coalesce`, a transfer whose sender and receiver are both still at a
+    queued, undispatched transfer between the same pair is added to that
+    transfer's amount; all merged callers share its outcome.
+    """
+
+    def __init__(self, gateway: LedgerGateway, max_parallel: int, coalesce: bool = False):
+        self.gateway = gateway
+        self.max_parallel = max_parallel
+        self.coalesce = coalesce
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        # Latest queued or running transfer per account
+        self._tails: Dict[str, _Transfer] = {}
+        self._tasks: Set[asyncio.Task] = set()
+        # Per-account pending count and (transfers, total seconds waited)
+        self._pending: Dict[str, int] = {}
+        self._waits: "OrderedDict[str, Tuple[int, float]]" = OrderedDict()
+
+    async def submit(self, sender: str, receiver: str, amount: float) -> None:
+        """
+        Run Transfer(sender, receiver, amount) on the ledger in account order.
+
+        Raises whatever the ledger call raised.
+        """
+        SUBMITTED.inc()
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_parallel)
+
+        tail = self._tails.get(sender)
+        if (
+            self.coalesce
+            and tail is not None
+            and not tail.dispatched
+            and tail.sender == sender
+            and tail.receiver == receiver
+            and self._tails.get(receiver) is tail
+        ):
+            tail.amount += amount
+            COALESCED.inc()
+            return await asyncio.shield(tail.done)
+
+        transfer = _Transfer(sender, receiver, amount)
+        accounts = (sender,) if sender == receiver else (sender, receiver)
+        previous = [
+            self._tails[account].done
+            for account in accounts
+            if account in self._tails and not self._tails[account].done.done()
+        ]
+        if previous:
+            CONFLICTS.inc()
+        for account in accounts:
+            self._tails[account] = transfer
+            self._pending[account] = self._pending.get(account, 0) + 1
+        QUEUE_DEPTH.inc()
+
+        task = asyncio.ensure_future(self._run(transfer, previous, accounts))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        # Shield so a caller going away does not cancel a transfer others are ordered behind
+        return await asyncio.shield(transfer.done)
+
+    async def _run(self, transfer: _Transfer, previous: List[asyncio.Future], accounts: Tuple[str, ...]) -> None:
+        try:
+            if previous:
+                await asyncio.wait(previous)
+            async with self._semaphore:
+                transfer.dispatched = True
+                waited = time.monotonic() - transfer.enqueued_at
+                QUEUE_DEPTH.dec()
+                WAIT.observe(waited)
+                self._record_wait(accounts, waited)
+                IN_FLIGHT.inc()
+                try:
+                    await self.gateway.acall("Transfer", transfer.sender, transfer.receiver, str(transfer.amount))
+                finally:
+                    IN_FLIGHT.dec()
+        except BaseException as e:
+            LEDGER_CALLS.labels("error").inc()
+            if not transfer.dispatched:
+                QUEUE_DEPTH.dec()
+            transfer.done.set_exception(e)
+            # Callers may all have gone away; do not report the error as unretrieved
+            transfer.done.exception()
+        else:
+            LEDGER_CALLS.labels("ok").inc()
+            transfer.done.set_result(None)
+        finally:
+            for account in accounts:
+                if self._tails.get(account) is transfer:
+                    del self._tails[account]
+                remaining = self._pending.get(account, 1) - 1
+                if remaining:
+                    self._pending[account] = remaining
+                else:
+                    self._pending.pop(account, None)
+
+    def _record_wait(self, accounts: Tuple[str, ...], waited: float) -> None:
+        for account in accounts:
+            count, total = self._waits.pop(account, (0, 0.0))
+            self._waits[account] = (count + 1, total + waited)
+            if len(self._waits) > MAX_TRACKED_ACCOUNTS:
+                self._waits.popitem(last=False)
+
+    def account_stats(self, limit: int = 20) -> dict:
+        """
+        The accounts with the most queued transfers and the highest average wait.
+        """
+        busiest = sorted(self._pending.items(), key=lambda item: item[1], reverse=True)[:limit]
+        slowest = sorted(
+            ((account, total / count, count) for account, (count, total) in self._waits.items()),
+            key=lambda item: item[1],
+            reverse=True,
+        )[:limit]
+        return {
+            "queued_by_account": [{"account": account, "queued": queued} for account, queued in busiest],
+            "wait_by_account": [
+                {"account": account, "avg_wait_seconds": avg, "transfers": count} for account, avg, count in slowest
+            ],
+        }
+
+
+transfer_scheduler = TransferScheduler(
+    ledger_gateway,
+    max_parallel=settings.TRANSFER_MAX_PARALLEL,
+    coalesce=settings.TRANSFER_COALESCE,
+)
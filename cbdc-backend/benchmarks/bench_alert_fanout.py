@@ -0,0 +1,150 @@
+"""
+Fan-out load test of the real-time fraud alert WebSocket.
+
+Starts one uvicorn worker serving the fraud alert router plus a publish hook
+(/bench/publish), opens `--subscribers` WebSocket clients, publishes
+`--alerts` alerts and measures publish-to-receive latency on every client:
+
+    python -m benchmarks.bench_alert_fanout --subscribers 10000 --alerts 20
+
+Client and server share the machine, so run it where `ulimit -n` allows two
+sockets per subscriber.
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import subprocess
+import sys
+import time
+from typing import List
+
+import httpx
+import websockets
+from fastapi import FastAPI
+
+from app.api.v1.endpoints import fraud_alerts
+from app.services.alert_broker import alert_broker
+
+app = FastAPI()
+app.include_router(fraud_alerts.router, prefix="/api/v1/fraud-alerts")
+
+
+@app.post("/bench/publish")
+async def publish(count: int = 1, interval_ms: float = 50.0) -> dict:
+    delivered = 0
+    for i in range(count):
+        delivered += alert_broker.publish({
+            "sender": "BankA",
+            "receiver": "BankB",
+            "amount": 1000.0 + i,
+            "fraud_score": 0.95,
+            "status": "flagged",
+            "published_at": time.time(),
+        })
+        await asyncio.sleep(interval_ms / 1000)
+    return {"published": count, "delivered": delivered, "subscribers": len(alert_broker)}
+
+
+def rss_mb(pid: int) -> float:
+    with open(f"/proc/{pid}/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) / 1024
+    return 0.0
+
+
+async def run(base_url: str, ws_url: str, subscribers: int, alerts: int, server_pid: int) -> dict:
+    latencies: List[float] = []
+    received = [0] * subscribers
+    connected = asyncio.Event()
+    ready = 0
+    gate = asyncio.Semaphore(200)  # Connection attempts in flight
+
+    async def subscriber(index: int) -> None:
+        nonlocal ready
+        async with gate:
+            ws = await websockets.connect(ws_url, open_timeout=120, ping_interval=None, max_queue=None)
+            await ws.recv()  # Greeting
+        ready += 1
+        if ready == subscribers:
+            connected.set()
+        try:
+            while received[index] < alerts:
+                alert = json.loads(await ws.recv())
+                latencies.append(time.time() - alert["published_at"])
+                received[index] += 1
+        finally:
+            await ws.close()
+
+    started = time.perf_counter()
+    clients = [asyncio.ensure_future(subscriber(i)) for i in range(subscribers)]
+    await connected.wait()
+    connect_seconds = time.perf_counter() - started
+    server_rss = rss_mb(server_pid)
+
+    async with httpx.AsyncClient(base_url=base_url, timeout=600) as http:
+        published = time.perf_counter()
+        response = (await http.post("/bench/publish", params={"count": alerts})).json()
+        try:
+            await asyncio.wait_for(asyncio.gather(*clients), timeout=120)
+        except asyncio.TimeoutError:
+            for client in clients:
+                client.cancel()
+        drained = time.perf_counter() - published
+
+    latencies.sort()
+    return {
+        "subscribers": subscribers,
+        "alerts": alerts,
+        "connect_seconds": round(connect_seconds, 2),
+        "server_rss_mb_connected": round(server_rss, 1),
+        "queued_by_broker": response["delivered"],
+        "received": sum(received),
+        "expected": subscribers * alerts,
+        "deliveries_per_sec": round(sum(received) / drained, 1),
+        "latency_p50_ms": round(statistics.median(latencies) * 1000, 1),
+        "latency_p99_ms": round(latencies[int(len(latencies) * 0.99) - 1] * 1000, 1),
+        "latency_max_ms": round(latencies[-1] * 1000, 1),
+    }
+
+
+async def wait_until_up(base_url: str, timeout: float = 30) -> None:
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient(base_url=base_url) as http:
+        while True:
+            try:
+                await http.get("/api/v1/fraud-alerts/stream/metrics")
+                return
+            except httpx.HTTPError:
+                if time.monotonic() > deadline:
+                    raise
+                await asyncio.sleep(0.2)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--subscribers", type=int, default=10000)
+    parser.add_argument("--alerts", type=int, default=20)
+    parser.add_argument("--port", type=int, default=8766)
+    args = parser.parse_args()
+
+    base_url = f"http://127.0.0.1:{args.port}"
+    server = subprocess.Popen([
+        sys.executable, "-m", "uvicorn", "benchmarks.bench_alert_fanout:app",
+        "--port", str(args.port), "--log-level", "warning",
+        "--backlog", str(args.subscribers),
+    ])
+    try:
+        asyncio.run(wait_until_up(base_url))
+        result = asyncio.run(run(
+            base_url, f"ws://127.0.0.1:{args.port}/api/v1/fraud-alerts/ws", args.subscribers, args.alerts, server.pid
+        ))
+    finally:
+        server.terminate()
+        server.wait()
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    main()
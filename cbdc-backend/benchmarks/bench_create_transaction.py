@@ -0,0 +1,153 @@
+"""
+Requests/sec of the async create_transaction pipeline against the previous
+sync endpoint at high client concurrency.
+
+Starts one uvicorn worker serving the real app plus the legacy sync handler
+(mounted at /bench/legacy-transactions) and drives both with the same load.
+Run from cbdc-backend/ with Postgres and Mongo up (docker compose up -d):
+
+    LEDGER_WORKER_COMMAND="python -m app.services.fake_ledger" \\
+        python -m benchmarks.bench_create_transaction --concurrency 1000 --requests 20000
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import subprocess
+import sys
+import time
+from typing import Any, List
+
+import httpx
+from fastapi import Depends, HTTPException
+from sqlalchemy.orm import Session
+
+from app import schemas
+from app.crud import crud_transaction
+from app.db.mongo_client import get_mongo_db
+from app.db.session import get_db
+from app.main import app
+from app.services import fraud_detection
+from app.services.ledger_gateway import ledger_gateway
+
+
+def legacy_create_transaction(
+    *,
+    db: Session = Depends(get_db),
+    transaction_in: schemas.TransactionCreate,
+    mongo_db = Depends(get_mongo_db),
+) -> Any:
+    """
+    The create_transaction flow before the async pipeline: every stage blocks a threadpool thread.
+    """
+    fraud_result = fraud_detection.get_fraud_score("pending-tx", amount=transaction_in.amount)
+    fraud_score = fraud_result.get("fraud_score", 0)
+    if fraud_score > 0.8:
+        mongo_db.fraud_logs.insert_one({
+            "sender": transaction_in.sender,
+            "receiver": transaction_in.receiver,
+            "amount": transaction_in.amount,
+            "fraud_score": fraud_score,
+            "status": "flagged"
+        })
+        raise HTTPException(status_code=400, detail={"status": "flagged", "fraud_score": fraud_score})
+    try:
+        ledger_gateway.call("Transfer", transaction_in.sender, transaction_in.receiver, str(transaction_in.amount))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Fabric SDK error: {str(e)}")
+    return crud_transaction.create(db=db, obj_in=transaction_in)
+
+
+app.add_api_route(
+    "/bench/legacy-transactions",
+    legacy_create_transaction,
+    methods=["POST"],
+    response_model=schemas.Transaction,
+)
+
+
+async def run_load(base_url: str, path: str, concurrency: int, total: int) -> dict:
+    latencies: List[float] = []
+    statuses = {}
+    remaining = iter(range(total))
+    payload = {"sender": "BankA", "receiver": "BankB", "amount": 0.01}
+
+    async def client(http: httpx.AsyncClient) -> None:
+        for _ in remaining:
+            start = time.perf_counter()
+            try:
+                response = await http.post(path, json=payload)
+                status = response.status_code
+            except httpx.HTTPError as e:
+                status = type(e).__name__
+            latencies.append(time.perf_counter() - start)
+            statuses[status] = statuses.get(status, 0) + 1
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=120) as http:
+        started = time.perf_counter()
+        await asyncio.gather(*(client(http) for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "path": path,
+        "concurrency": concurrency,
+        "requests": total,
+        "seconds": round(elapsed, 3),
+        "requests_per_sec": round(total / elapsed, 1),
+        "p50_ms": round(statistics.median(latencies) * 1000, 2),
+        "p99_ms": round(latencies[int(len(latencies) * 0.99) - 1] * 1000, 2),
+        "statuses": {str(k): v for k, v in statuses.items()},
+    }
+
+
+async def wait_until_up(base_url: str, timeout: float = 30) -> None:
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient(base_url=base_url) as http:
+        while True:
+            try:
+                await http.get("/")
+                return
+            except httpx.HTTPError:
+                if time.monotonic() > deadline:
+                    raise
+                await asyncio.sleep(0.2)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", type=int, default=1000)
+    parser.add_argument("--requests", type=int, default=20000)
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    from app.db.initial_data import init_db
+    init_db()
+
+    base_url = f"http://127.0.0.1:{args.port}"
+    server = subprocess.Popen([
+        sys.executable, "-m", "uvicorn", "benchmarks.bench_create_transaction:app",
+        "--port", str(args.port), "--log-level", "warning", "--backlog", str(args.concurrency * 2),
+    ])
+    try:
+        asyncio.run(wait_until_up(base_url))
+        httpx.post(f"{base_url}/api/v1/transactions/init-ledger", timeout=60)
+        results = [
+            asyncio.run(run_load(base_url, path, args.concurrency, args.requests))
+            for path in ("/bench/legacy-transactions", "/api/v1/transactions/")
+        ]
+    finally:
+        server.terminate()
+        server.wait()
+
+    legacy, current = results
+    print(json.dumps({
+        "legacy_sync": legacy,
+        "async": current,
+        "speedup": round(current["requests_per_sec"] / legacy["requests_per_sec"], 2),
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,285 @@
+"""
+End-to-end latency and throughput of every endpoint group, plus
+microbenchmarks of the hot functions, against local stand-ins.
+
+Boots one uvicorn worker serving app.main:app on SQLite, mongomock, the fake
+ledger and a local JWKS (see benchmarks/standins.py), drives each scenario at
+the given concurrency and prints p50/p95/p99 latency and requests/sec as JSON.
+Run from cbdc-backend/:
+
+    python -m benchmarks.bench_endpoints --concurrency 50 --requests 2000 --output bench.json
+    python -m benchmarks.bench_endpoints --baseline bench.json   # after a change
+
+Pass --database-url to run against a throwaway Postgres instead of SQLite.
+With --baseline, each result also gets its ratio to the same result in an
+earlier run, so runs can be compared across commits.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+import httpx
+
+from benchmarks import standins
+
+# Request (method, path, JSON body) for the i-th request of a scenario
+RequestFactory = Callable[[int], Tuple[str, str, Optional[dict]]]
+
+SCENARIOS = ("create", "list", "balance", "history", "report", "fraud_check", "mbridge")
+
+
+def summarize(samples: List[float], scale: float) -> dict:
+    """
+    p50/p95/p99 and mean of `samples` (seconds), multiplied by `scale`.
+    """
+    samples = sorted(samples)
+
+    def percentile(q: float) -> float:
+        return round(samples[min(len(samples) - 1, int(len(samples) * q))] * scale, 3)
+
+    return {
+        "p50": percentile(0.50),
+        "p95": percentile(0.95),
+        "p99": percentile(0.99),
+        "mean": round(sum(samples) / len(samples) * scale, 3),
+    }
+
+
+def scenarios(accounts: List[str], tx_ids: List[str]) -> Dict[str, RequestFactory]:
+    n = len(accounts)
+
+    def pair(i: int) -> Tuple[str, str]:
+        return accounts[i % n], accounts[(i + 1 + i // n) % n]
+
+    def create(i):
+        sender, receiver = pair(i)
+        return "POST", "/api/v1/transactions/", {
+            "sender": sender, "receiver": receiver, "amount": 1.0, "device_id": f"device-{i % 100}",
+        }
+
+    def fraud_check(i):
+        sender, receiver = pair(i)
+        return "POST", "/api/v1/fraud-alerts/check", {
+            "tx_id": f"bench-{i}", "sender": sender, "receiver": receiver, "amount": 10.0 + i % 500,
+        }
+
+    def mbridge(i):
+        sender, receiver = pair(i)
+        return "POST", "/api/v1/mbridge", {
+            "tx_id": f"bench-{i}", "from_currency": "GHS", "to_currency": "NGN",
+            "amount": 100.0, "sender": sender, "receiver": receiver,
+        }
+
+    return {
+        "create": create,
+        "list": lambda i: ("GET", f"/api/v1/transactions/?limit=50&sender={accounts[i % n]}", None),
+        "balance": lambda i: ("GET", f"/api/v1/transactions/balance/{accounts[i % n]}", None),
+        "history": lambda i: ("GET", f"/api/v1/transactions/history/{accounts[i % n]}?limit=50", None),
+        # Cycles through the seeded transactions: the first pass renders, later passes hit the cache
+        "report": lambda i: ("GET", f"/api/v1/compliance/report/{tx_ids[i % len(tx_ids)]}", None),
+        "fraud_check": fraud_check,
+        "mbridge": mbridge,
+    }
+
+
+async def run_load(base_url: str, factory: RequestFactory, concurrency: int, total: int) -> dict:
+    latencies: List[float] = []
+    statuses: Dict[str, int] = {}
+    remaining = iter(range(total))
+
+    async def client(http: httpx.AsyncClient) -> None:
+        for i in remaining:
+            method, path, body = factory(i)
+            start = time.perf_counter()
+            try:
+                response = await http.request(method, path, json=body)
+                status = str(response.status_code)
+            except httpx.HTTPError as e:
+                status = type(e).__name__
+            latencies.append(time.perf_counter() - start)
+            statuses[status] = statuses.get(status, 0) + 1
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=120) as http:
+        started = time.perf_counter()
+        await asyncio.gather(*(client(http) for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    return {
+        "concurrency": concurrency,
+        "requests": total,
+        "seconds": round(elapsed, 3),
+        "requests_per_sec": round(total / elapsed, 1),
+        "latency_ms": summarize(latencies, 1e3),
+        "statuses": statuses,
+    }
+
+
+async def wait_until_up(base_url: str, timeout: float = 60) -> None:
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient(base_url=base_url) as http:
+        while True:
+            try:
+                await http.get("/")
+                return
+            except httpx.HTTPError:
+                if time.monotonic() > deadline:
+                    raise
+                await asyncio.sleep(0.2)
+
+
+def time_calls(fn: Callable[[int], object], number: int) -> dict:
+    samples = []
+    for i in range(number):
+        start = time.perf_counter()
+        fn(i)
+        samples.append(time.perf_counter() - start)
+    return {"calls": number, "latency_us": summarize(samples, 1e6)}
+
+
+def microbenchmarks(workdir: str, tx_ids: List[str], number: int) -> dict:
+    """
+    Per-call latency of the hot functions, in this process.
+    """
+    from app import schemas
+    from app.core import auth
+    from app.core.config import settings
+    from app.crud import crud_transaction
+    from app.db.session import SessionLocal
+    from app.services import compliance, fraud_detection
+    from benchmarks.bench_jwt import make_token
+
+    results = {}
+    fraud_detection.get_model()
+    results["get_fraud_score"] = time_calls(
+        lambda i: fraud_detection.get_fraud_score("bench", amount=10.0 + i % 500, tx_per_hour=i % 7), number * 10
+    )
+
+    db = SessionLocal()
+    try:
+        results["crud_transaction.create"] = time_calls(
+            lambda i: crud_transaction.create(
+                db, obj_in=schemas.TransactionCreate(sender="Bench-A", receiver="Bench-B", amount=1.0)
+            ),
+            number,
+        )
+        transactions = [crud_transaction.get_by_tx_id(db, tx_id=tx_id) for tx_id in tx_ids[:number]]
+        # Drop the server's renders so the first pass really renders
+        shutil.rmtree(settings.REPORTS_DIR, ignore_errors=True)
+        results["generate_aml_report"] = time_calls(lambda i: compliance.generate_aml_report(transactions[i]), len(transactions))
+        results["generate_aml_report_cached"] = time_calls(
+            lambda i: compliance.generate_aml_report(transactions[i]), len(transactions)
+        )
+    finally:
+        db.close()
+
+    with open(os.path.join(workdir, "jwt_private.pem")) as f:
+        private_pem = f.read()
+    auth.jwks_cache.refresh()
+    tokens = [make_token(private_pem, f"user-{i}") for i in range(number)]
+    results["verify_token"] = time_calls(lambda i: auth.verify_token(tokens[i]), number)
+    results["verify_token_cached"] = time_calls(lambda i: auth.verify_token(tokens[i]), number)
+    return results
+
+
+def compare(current: dict, baseline: dict) -> dict:
+    """
+    Ratio of each result to the baseline run (> 1 means higher than before).
+    """
+    changes = {}
+    for name, result in current["endpoints"].items():
+        before = baseline.get("endpoints", {}).get(name)
+        if before:
+            changes[name] = {
+                "requests_per_sec": round(result["requests_per_sec"] / before["requests_per_sec"], 3),
+                "p99_ms": round(result["latency_ms"]["p99"] / before["latency_ms"]["p99"], 3),
+            }
+    for name, result in current["micro"].items():
+        before = baseline.get("micro", {}).get(name)
+        if before:
+            changes[name] = {"p50_us": round(result["latency_us"]["p50"] / before["latency_us"]["p50"], 3)}
+    return {"commit": baseline.get("commit"), "ratios": changes}
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--requests", type=int, default=2000, help="requests per scenario")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS), help="comma-separated subset of " + ", ".join(SCENARIOS))
+    parser.add_argument("--accounts", type=int, default=200)
+    parser.add_argument("--transactions", type=int, default=5000, help="transactions seeded into RDS")
+    parser.add_argument("--micro-calls", type=int, default=200, help="calls per microbenchmark; 0 skips them")
+    parser.add_argument("--database-url", help="sync SQLAlchemy URL to use instead of a fresh SQLite file")
+    parser.add_argument("--port", type=int, default=8766)
+    parser.add_argument("--output", help="also write the results to this JSON file")
+    parser.add_argument("--baseline", help="results JSON of an earlier run to compare against")
+    args = parser.parse_args()
+
+    selected = [name for name in args.scenarios.split(",") if name]
+    unknown = set(selected) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(sorted(unknown))}")
+
+    # app.db.initial_data configures INFO logging; keep per-request client logs out of the output
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+
+    workdir = tempfile.mkdtemp(prefix="cbdc-bench-")
+    env = standins.environment(workdir, args.database_url)
+    os.environ.update(env)
+    accounts, tx_ids = standins.prepare(args.accounts, args.transactions)
+    factories = scenarios(accounts, tx_ids)
+
+    base_url = f"http://127.0.0.1:{args.port}"
+    server = subprocess.Popen([
+        sys.executable, "-m", "uvicorn", "--factory", "benchmarks.standins:create_app",
+        "--port", str(args.port), "--log-level", "warning", "--backlog", str(args.concurrency * 2),
+    ])
+    endpoints = {}
+    try:
+        asyncio.run(wait_until_up(base_url))
+        for name in selected:
+            endpoints[name] = asyncio.run(run_load(base_url, factories[name], args.concurrency, args.requests))
+    finally:
+        server.terminate()
+        server.wait()
+
+    results = {
+        "commit": git_commit(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "python": platform.python_version(),
+        "cpus": os.cpu_count(),
+        "database": env["DATABASE_URL"].split("://", 1)[0],
+        "endpoints": endpoints,
+        "micro": microbenchmarks(workdir, tx_ids, args.micro_calls) if args.micro_calls else {},
+    }
+    if args.baseline:
+        with open(args.baseline) as f:
+            results["baseline"] = compare(results, json.load(f))
+
+    output = json.dumps(results, indent=2)
+    print(output)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+
+
+if __name__ == "__main__":
+    main()
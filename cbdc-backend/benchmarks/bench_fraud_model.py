@@ -0,0 +1,54 @@
+"""
+Per-transaction and batch latency of the NumPy fraud model.
+
+Uses FRAUD_MODEL_PATH if it exists, otherwise a randomly initialised model
+with the same architecture as train_model.py (4-16-8-1):
+
+    python -m benchmarks.bench_fraud_model
+"""
+import json
+import os
+import tempfile
+import timeit
+
+import numpy as np
+
+from app.core.config import settings
+from app.services.fraud_model import FraudModel, save_artifact
+
+
+def random_artifact(path: str) -> None:
+    rng = np.random.default_rng(0)
+    sizes = [4, 16, 8, 1]
+    activations = ["relu", "relu", "sigmoid"]
+    layers = [
+        (rng.normal(size=(n_in, n_out)), rng.normal(size=n_out), activation)
+        for n_in, n_out, activation in zip(sizes, sizes[1:], activations)
+    ]
+    save_artifact(path, layers, scaler_mean=np.array([33.0, 10.0, 2.5, 0.5]), scaler_scale=np.array([45.0, 5.5, 1.1, 0.5]))
+
+
+def per_call_us(fn, number: int) -> float:
+    return min(timeit.repeat(fn, number=number, repeat=5)) / number * 1e6
+
+
+def main() -> None:
+    path = settings.FRAUD_MODEL_PATH
+    if not os.path.exists(path):
+        path = os.path.join(tempfile.mkdtemp(), "fraud_model.npz")
+        random_artifact(path)
+
+    load_ms = min(timeit.repeat(lambda: FraudModel.load(path), number=1, repeat=5)) * 1e3
+    model = FraudModel.load(path)
+    features = (250.0, 3, 1, 0)
+    results = {"artifact": path, "load_ms": round(load_ms, 3), "single_us": round(per_call_us(lambda: model.predict_one(features), 20000), 2)}
+    rng = np.random.default_rng(1)
+    for batch_size in (64, 1024, 10000):
+        batch = rng.random((batch_size, 4)) * [1000, 20, 5, 1]
+        total_us = per_call_us(lambda: model.predict(batch), max(1, 200000 // batch_size))
+        results[f"batch_{batch_size}_us_per_tx"] = round(total_us / batch_size, 3)
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
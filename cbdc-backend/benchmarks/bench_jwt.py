@@ -0,0 +1,81 @@
+"""
+Token verifications/sec of get_current_user's verification path.
+
+Generates a local RSA test key and JWKS file, then compares the previous
+per-request path (construct the key from its JWK, then decode) with the
+cached path (pre-built key by kid, plus the claims cache):
+
+    python -m benchmarks.bench_jwt
+"""
+import json
+import tempfile
+import time
+import timeit
+
+from jose import jwk, jwt
+
+from app.core import auth
+from app.core.config import settings
+from benchmarks.standins import KID, make_key_and_jwks
+
+
+def make_token(private_pem: str, subject: str, ttl: float = 3600) -> str:
+    now = int(time.time())
+    claims = {
+        "sub": subject,
+        "aud": settings.COGNITO_APP_CLIENT_ID,
+        "iss": auth.COGNITO_ISSUER,
+        "iat": now,
+        "exp": now + int(ttl),
+    }
+    return jwt.encode(claims, private_pem, algorithm="RS256", headers={"kid": KID})
+
+
+def per_sec(fn, number: int) -> float:
+    return number / min(timeit.repeat(fn, number=number, repeat=3))
+
+
+def main() -> None:
+    private_pem, jwks_path = make_key_and_jwks(tempfile.mkdtemp())
+    token = make_token(private_pem, "bench-user")
+    with open(jwks_path) as f:
+        jwks = json.load(f)["keys"]
+
+    def legacy():
+        header = jwt.get_unverified_header(token)
+        key = next(k for k in jwks if k["kid"] == header["kid"])
+        jwt.decode(
+            token,
+            jwk.construct(key, "RS256"),
+            algorithms=["RS256"],
+            audience=settings.COGNITO_APP_CLIENT_ID,
+            issuer=auth.COGNITO_ISSUER,
+        )
+
+    auth.jwks_cache.url = f"file://{jwks_path}"
+    auth.jwks_cache.refresh()
+
+    def keyed():
+        auth.claims_cache.clear()
+        auth.verify_token(token)
+
+    def cached():
+        auth.verify_token(token)
+
+    # Distinct tokens per call: every verification misses the claims cache
+    tokens = [make_token(private_pem, f"user-{i}") for i in range(500)]
+    started = time.perf_counter()
+    for t in tokens:
+        auth.verify_token(t)
+    distinct = len(tokens) / (time.perf_counter() - started)
+
+    print(json.dumps({
+        "legacy_construct_per_request": round(per_sec(legacy, 500)),
+        "prebuilt_key_by_kid": round(per_sec(keyed, 500)),
+        "prebuilt_key_distinct_tokens": round(distinct),
+        "claims_cache_hit": round(per_sec(cached, 50000)),
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""
+Cold start, memory footprint and per-batch latency of the fraud Lambda handlers.
+
+Each handler is imported in a fresh interpreter, as on a Lambda cold start;
+the import includes loading the model. Reported per handler: import time,
+peak RSS after import, and handler latency per batch size (JSON body in,
+JSON body out, as API Gateway invokes it):
+
+    python -m benchmarks.bench_lambda
+
+The NumPy handler uses FRAUD_MODEL_PATH if it exists, otherwise a random
+artifact. The TensorFlow handler needs tensorflow installed and the
+SavedModel from train_model.py (--savedmodel-root must contain fraud_model/);
+it is reported as skipped otherwise.
+"""
+import argparse
+import importlib.util
+import json
+import os
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+HANDLERS = {
+    "tensorflow": "lambda_function.py",
+    "numpy": "lambda_function_numpy.py",
+}
+LAMBDA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "ai_lambda")
+BATCH_SIZES = (1, 10, 100, 1000)
+
+
+def event(batch_size: int, seed: int = 0) -> dict:
+    rng = random.Random(seed)
+    transactions = [
+        {
+            "amount": round(rng.lognormvariate(3, 1), 2),
+            "tx_per_hour": rng.randint(1, 19),
+            "device_id_freq": rng.randint(1, 4),
+            "is_foreign": rng.randint(0, 1),
+        }
+        for _ in range(batch_size)
+    ]
+    return {"body": json.dumps({"transactions": transactions})}
+
+
+def run_child(handler: str, repeat: int) -> dict:
+    """
+    Import one handler and time it; runs in its own interpreter.
+    """
+    started = time.perf_counter()
+    spec = importlib.util.spec_from_file_location(f"bench_{handler}_handler", os.path.join(LAMBDA_DIR, HANDLERS[handler]))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    cold_start_ms = (time.perf_counter() - started) * 1000
+    rss_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+    latencies = {}
+    for batch_size in BATCH_SIZES:
+        request = event(batch_size)
+        response = module.lambda_handler(request, None)
+        assert response["statusCode"] == 200, response
+        best = float("inf")
+        for _ in range(repeat):
+            started = time.perf_counter()
+            module.lambda_handler(request, None)
+            best = min(best, time.perf_counter() - started)
+        latencies[str(batch_size)] = round(best * 1000, 3)
+    return {"cold_start_ms": round(cold_start_ms, 1), "peak_rss_mb": round(rss_mb, 1), "batch_latency_ms": latencies}
+
+
+def measure(handler: str, env: dict, repeat: int) -> dict:
+    result = subprocess.run(
+        [sys.executable, "-m", "benchmarks.bench_lambda", "--child", handler, "--repeat", str(repeat)],
+        env={**os.environ, **env},
+        capture_output=True,
+        text=True,
+    )
+    if result.returncode != 0:
+        return {"skipped": result.stderr.strip().splitlines()[-1] if result.stderr.strip() else "failed"}
+    return json.loads(result.stdout)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--savedmodel-root", default=".", help="directory containing the fraud_model/ SavedModel")
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--child", choices=sorted(HANDLERS), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(run_child(args.child, args.repeat)))
+        return
+
+    model_path = os.environ.get("FRAUD_MODEL_PATH", "fraud_model.npz")
+    if not os.path.exists(model_path):
+        from benchmarks.bench_fraud_model import random_artifact
+        model_path = os.path.join(tempfile.mkdtemp(), "fraud_model.npz")
+        random_artifact(model_path)
+
+    results = {
+        "tensorflow": measure("tensorflow", {"LAMBDA_TASK_ROOT": os.path.abspath(args.savedmodel_root)}, args.repeat),
+        "numpy": measure("numpy", {"FRAUD_MODEL_PATH": os.path.abspath(model_path)}, args.repeat),
+    }
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
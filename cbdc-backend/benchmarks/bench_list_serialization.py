@@ -0,0 +1,108 @@
+"""
+GET /transactions serialization: ORM objects through response_model against
+Core rows encoded with orjson.
+
+For each page size, both paths run against the same seeded table. The
+"orm" path is the previous endpoint: get_page, then FastAPI's
+response_model validation and JSONResponse. The "core" path is the current
+one: get_page_rows and orjson. Reported per path: rows/sec for query plus
+encoding, rows/sec for encoding alone, and peak traced allocation per page.
+The two bodies are also checked to decode to the same JSON.
+
+    python -m benchmarks.bench_list_serialization --rows 20000
+"""
+import argparse
+import asyncio
+import json
+import os
+import tempfile
+import time
+import tracemalloc
+
+from benchmarks import standins
+
+PAGE_SIZES = (100, 1000)
+
+
+def best_of(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def peak_bytes(fn) -> int:
+    tracemalloc.start()
+    try:
+        fn()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=20000, help="transactions to seed")
+    parser.add_argument("--database-url", help="defaults to a SQLite file in a temporary directory")
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    os.environ.update(standins.environment(tempfile.mkdtemp(prefix="bench_list_"), args.database_url))
+    standins.prepare(accounts=100, transactions=args.rows)
+
+    import orjson
+    from fastapi.responses import JSONResponse
+    from fastapi.routing import serialize_response
+
+    from app.api.v1.endpoints.transactions import _row_dicts, router
+    from app.crud import crud_transaction
+    from app.db.session import SessionLocal
+
+    route = next(r for r in router.routes if r.path == "/" and "GET" in r.methods)
+    loop = asyncio.new_event_loop()
+
+    def orm_body(objects) -> bytes:
+        content = loop.run_until_complete(serialize_response(field=route.response_field, response_content=objects))
+        return JSONResponse(content).body
+
+    def core_body(rows) -> bytes:
+        return orjson.dumps(_row_dicts(rows))
+
+    results = {}
+    db = SessionLocal()
+    try:
+        for limit in PAGE_SIZES:
+            def orm_page():
+                db.expunge_all()
+                return orm_body(crud_transaction.get_page(db, limit=limit))
+
+            def core_page():
+                return core_body(crud_transaction.get_page_rows(db, limit=limit))
+
+            assert json.loads(orm_page()) == json.loads(core_page()), "response bodies differ"
+            objects = crud_transaction.get_page(db, limit=limit)
+            rows = crud_transaction.get_page_rows(db, limit=limit)
+            results[str(limit)] = {
+                path: {
+                    "rows_per_sec": round(limit / best_of(page, args.repeat)),
+                    "encode_rows_per_sec": round(limit / best_of(lambda: encode(data), args.repeat)),
+                    "peak_alloc_kib": round(peak_bytes(page) / 1024, 1),
+                }
+                for path, page, encode, data in (
+                    ("orm", orm_page, orm_body, objects),
+                    ("core", core_page, core_body, rows),
+                )
+            }
+            results[str(limit)]["speedup"] = round(
+                results[str(limit)]["core"]["rows_per_sec"] / results[str(limit)]["orm"]["rows_per_sec"], 2
+            )
+    finally:
+        db.close()
+        loop.close()
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
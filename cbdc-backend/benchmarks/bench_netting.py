@@ -0,0 +1,103 @@
+"""
+Multilateral netting of one settlement window of mBridge payments.
+
+Generates `--payments` random payments between `--participants` banks across
+every currency in the FX table, then reports netting time and how many
+ledger writes netting avoids compared to gross settlement:
+
+    python -m benchmarks.bench_netting --payments 1000000
+
+The queueing path is measured separately: `--queued` payments are stored in
+batches of `--batch-size` in a throwaway SQLite database, and that window is
+then closed, which reads the payments back before netting them.
+"""
+import argparse
+import json
+import os
+import tempfile
+import time
+from array import array
+
+import numpy as np
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+from app.db.base import Base
+from app.models.netting import NettingPayment, NettingWindow
+from app.services.fx import fx_table
+from app.services.netting import NettingEngine, SettlementWindow
+
+
+def random_window(payments: int, participants: int, seed: int = 0) -> SettlementWindow:
+    rng = np.random.default_rng(seed)
+    currencies = len(fx_table.currencies)
+    window = SettlementWindow(1)
+    for i in range(participants):
+        window.participant(f"Bank{i:04d}")
+    senders = rng.integers(0, participants, payments)
+    receivers = (senders + rng.integers(1, participants, payments)) % participants
+    # Each bank pays out in its home currency
+    home = np.arange(participants) % currencies
+    window.senders = array("q", senders.tolist())
+    window.receivers = array("q", receivers.tolist())
+    window.from_codes = array("q", home[senders].tolist())
+    window.to_codes = array("q", home[receivers].tolist())
+    window.amounts = array("d", np.round(rng.lognormal(6, 1.5, payments), 2).tolist())
+    window.counts = array("q", np.ones(payments, dtype=np.int64).tobytes())
+    return window
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--payments", type=int, default=1_000_000)
+    parser.add_argument("--participants", type=int, default=200)
+    parser.add_argument("--queued", type=int, default=100_000, help="payments queued through the database")
+    parser.add_argument("--batch-size", type=int, default=1000)
+    args = parser.parse_args()
+
+    window = random_window(args.payments, args.participants)
+    engine = NettingEngine(fx_table)
+
+    # Per-payment cost of the queueing path, then closing that window from the database
+    with tempfile.TemporaryDirectory() as workdir:
+        bind = create_engine(f"sqlite:///{os.path.join(workdir, 'netting.db')}")
+        Base.metadata.create_all(bind, tables=[NettingWindow.__table__, NettingPayment.__table__])
+        with Session(bind) as db:
+            started = time.perf_counter()
+            for start in range(0, args.queued, args.batch_size):
+                engine.submit(db, [
+                    {"tx_id": f"tx{i}", "sender": f"Bank{i % 200}", "receiver": f"Bank{(i + 1) % 200}",
+                     "from_currency": "GHS", "to_currency": "NGN", "amount": 10.0}
+                    for i in range(start, min(start + args.batch_size, args.queued))
+                ])
+            submit_us = (time.perf_counter() - started) / args.queued * 1e6
+            started = time.perf_counter()
+            closed = engine.close(db)
+            close_from_db_ms = (time.perf_counter() - started) * 1000
+        bind.dispose()
+
+    netting, closing = [], []
+    for _ in range(3):
+        started = time.perf_counter()
+        result = engine.settle(window)
+        closing.append(time.perf_counter() - started)
+        netting.append(result["netting_ms"])
+
+    print(json.dumps({
+        "payments": result["payments"],
+        "participants": result["participants"],
+        "currencies": len(fx_table.currencies),
+        "corridors": len(result["corridors"]),
+        "ledger_writes_gross": result["ledger_writes_gross"],
+        "ledger_writes_net": result["ledger_writes_net"],
+        "ledger_writes_avoided": result["ledger_writes_avoided"],
+        "netting_ms": min(netting),
+        "close_with_report_ms": round(min(closing) * 1000, 1),
+        "submit_us_per_payment": round(submit_us, 2),
+        "queued_payments_closed": closed["payments"],
+        "close_from_db_ms": round(close_from_db_ms, 1),
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+"""
+Watchlist screening: index build time and per-name screening latency.
+
+Builds a WatchlistIndex over a synthetic list of person and company names
+(with aliases), then screens three kinds of names: exact list names with
+shuffled word order and case, names with one typo, and names not on the
+list. Latency is measured on cache misses (the first screening of a name)
+and on memoized hits. The fuzzy results are checked against a brute-force
+trigram scan of a sample of the list, so the candidate pruning is verified
+to lose no match.
+
+    python -m benchmarks.bench_screening --names 300000
+"""
+import argparse
+import itertools
+import json
+import random
+import statistics
+import string
+import time
+from typing import Tuple
+
+from app.core.config import settings
+from app.services.compliance import WatchlistIndex, name_trigrams, normalize_name
+
+# English letter frequencies (%), for name words with a realistic trigram spread
+LETTERS = "etaoinshrdlcumwfgypbvkjxqz"
+LETTER_WEIGHTS = (12.7, 9.1, 8.2, 7.5, 7.0, 6.7, 6.3, 6.1, 6.0, 4.3, 4.0, 2.8, 2.8, 2.4, 2.4, 2.2, 2.0, 2.0, 1.9, 1.5, 1.0, 0.8, 0.2, 0.2, 0.1, 0.1)
+COMPANY_WORDS = ("Trading", "Holdings", "Shipping", "Capital", "Petroleum", "Logistics", "Industries", "Bank")
+
+
+def vocabulary(size: int, rng: random.Random) -> list:
+    """
+    Name words in Zipf order, so a few words are very common as in real lists.
+    """
+    words = set()
+    while len(words) < size:
+        words.add("".join(rng.choices(LETTERS, LETTER_WEIGHTS, k=rng.randint(4, 9))).capitalize())
+    words = sorted(words)
+    rng.shuffle(words)
+    return words
+
+
+def synthetic_watchlist(count: int, rng: random.Random) -> Tuple[list, list]:
+    words = vocabulary(max(1000, count // 5), rng)
+    weights = list(itertools.accumulate(1 / (rank + 1) for rank in range(len(words))))
+
+    def name(parts: int) -> str:
+        return " ".join(rng.choices(words, cum_weights=weights, k=parts))
+
+    rows = []
+    entry = 0
+    while len(rows) < count:
+        entry += 1
+        if rng.random() < 0.3:
+            listed = f"{name(1)} {rng.choice(COMPANY_WORDS)} {rng.choice(('Ltd', 'LLC', 'SA', 'PLC'))}"
+        else:
+            listed = name(rng.randint(2, 3))
+        rows.append((f"E{entry}", rng.choice(("SDN", "UN", "EU", "PEP")), listed))
+        if rng.random() < 0.2:
+            rows.append((f"E{entry}", rows[-1][1], typo(listed, rng)))
+    return rows[:count], words
+
+
+def typo(name: str, rng: random.Random) -> str:
+    position = rng.randrange(len(name))
+    return name[:position] + rng.choice(string.ascii_lowercase) + name[position + 1:]
+
+
+def shuffled(name: str, rng: random.Random) -> str:
+    words = name.split()
+    rng.shuffle(words)
+    return " ".join(words).upper()
+
+
+def brute_force(listed: list, name: str, threshold: float) -> set:
+    grams = name_trigrams(normalize_name(name))
+    return {
+        i for i, other in enumerate(listed)
+        if grams and other and 2 * len(grams & other) / (len(grams) + len(other)) >= threshold
+    }
+
+
+def latencies(fn, names: list) -> dict:
+    samples = []
+    for name in names:
+        started = time.perf_counter()
+        fn(name)
+        samples.append((time.perf_counter() - started) * 1e6)
+    samples.sort()
+    return {
+        "p50_us": round(statistics.median(samples), 1),
+        "p99_us": round(samples[int(len(samples) * 0.99) - 1], 1),
+        "mean_us": round(statistics.fmean(samples), 1),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--names", type=int, default=300000, help="watchlist names, aliases included")
+    parser.add_argument("--queries", type=int, default=2000, help="names screened per kind")
+    parser.add_argument("--threshold", type=float, default=0.8)
+    parser.add_argument("--verify", type=int, default=50, help="fuzzy results checked by brute force")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    rows, words = synthetic_watchlist(args.names, rng)
+    started = time.perf_counter()
+    index = WatchlistIndex(rows, args.threshold, cache_size=10 * args.queries)
+    build_seconds = time.perf_counter() - started
+
+    listed = [rows[rng.randrange(len(rows))][2] for _ in range(args.queries)]
+    queries = {
+        "exact": [shuffled(name, rng) for name in listed],
+        "typo": [typo(name, rng) for name in listed],
+        "miss": [" ".join(rng.sample(words, 3)) for _ in range(args.queries)],
+    }
+    results = {"names": len(index), "build_seconds": round(build_seconds, 2)}
+    for kind, names in queries.items():
+        found = sum(1 for name in names if index.search(name))
+        index._cache.clear()
+        results[kind] = {
+            "uncached": latencies(index.search, names),
+            "cached": latencies(index.search, names),
+            "with_matches": round(found / len(names), 3),
+        }
+
+    mismatches = 0
+    trigrams = [name_trigrams(normalize_name(name)) for _, _, name in rows]
+    positions = {}
+    for i, (entry_id, _, name) in enumerate(rows):
+        positions.setdefault((entry_id, name), set()).add(i)
+    for name in queries["typo"][:args.verify]:
+        expected = brute_force(trigrams, name, args.threshold)
+        got = set().union(*(positions[match["entry_id"], match["name"]] for match in index.search(name)))
+        # search() returns at most WATCHLIST_MAX_MATCHES; beyond that, only its picks are checked
+        if got != expected if len(expected) <= settings.WATCHLIST_MAX_MATCHES else not got <= expected:
+            mismatches += 1
+    results["brute_force_mismatches"] = f"{mismatches}/{min(args.verify, len(queries['typo']))}"
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+Overhead of the latency instrumentation in app/core/tracing.py.
+
+Times an empty `with span(...)` block against an empty no-op context manager,
+and one request through RequestMetricsMiddleware against the bare ASGI app:
+
+    python -m benchmarks.bench_spans
+"""
+import asyncio
+import contextlib
+import json
+import time
+import timeit
+
+from app.core.tracing import RequestMetricsMiddleware, span
+
+
+def per_call_ns(fn, number: int) -> float:
+    return min(timeit.repeat(fn, number=number, repeat=5)) / number * 1e9
+
+
+async def bare_app(scope, receive, send) -> None:
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": b""})
+
+
+async def per_request_ns(app, number: int) -> float:
+    scope = {"type": "http", "method": "GET", "path": "/bench"}
+
+    async def receive():
+        return {"type": "http.request", "body": b""}
+
+    async def send(message):
+        pass
+
+    best = float("inf")
+    for _ in range(5):
+        started = time.perf_counter()
+        for _ in range(number):
+            await app(scope, receive, send)
+        best = min(best, (time.perf_counter() - started) / number * 1e9)
+    return best
+
+
+def main() -> None:
+    noop = contextlib.nullcontext()
+
+    def with_noop():
+        with noop:
+            pass
+
+    def with_span():
+        with span("bench", "stage"):
+            pass
+
+    def with_error():
+        try:
+            with span("bench", "failing"):
+                raise ValueError
+        except ValueError:
+            pass
+
+    baseline = per_call_ns(with_noop, 200000)
+    results = {
+        "noop_context_ns": round(baseline),
+        "span_ns": round(per_call_ns(with_span, 200000)),
+        "span_overhead_ns": round(per_call_ns(with_span, 200000) - baseline),
+        "span_with_exception_ns": round(per_call_ns(with_error, 100000)),
+    }
+    bare = asyncio.run(per_request_ns(bare_app, 50000))
+    instrumented = asyncio.run(per_request_ns(RequestMetricsMiddleware(bare_app), 50000))
+    results["middleware_overhead_ns_per_request"] = round(instrumented - bare)
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
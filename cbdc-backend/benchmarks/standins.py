@@ -0,0 +1,186 @@
+"""
+Local stand-ins for the services the API depends on, for benchmarks.
+
+Nothing here needs Postgres, MongoDB, Cognito or a Fabric network:
+
+- SQL goes to a SQLite file (or any `--database-url`, e.g. a throwaway Postgres),
+- fraud logs go to an in-memory mongomock database,
+- the ledger is app.services.fake_ledger,
+- JWTs are verified against a locally generated JWKS file.
+
+Settings are read when `app` is first imported, so the order is:
+`os.environ.update(environment(workdir))`, then `prepare(...)`, and the
+server is started with `uvicorn --factory benchmarks.standins:create_app`.
+"""
+import json
+import os
+import random
+import sys
+from typing import List, Optional, Tuple
+
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+from jose import jwk
+
+KID = "bench-key"
+
+
+def make_key_and_jwks(directory: str) -> Tuple[str, str]:
+    """
+    Return (private PEM, path of a JWKS file holding the matching public key).
+    """
+    private_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    private_pem = private_key.private_bytes(
+        serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption()
+    ).decode()
+    public_pem = private_key.public_key().public_bytes(
+        serialization.Encoding.PEM, serialization.PublicFormat.SubjectPublicKeyInfo
+    ).decode()
+    public_jwk = jwk.construct(public_pem, "RS256").to_dict()
+    public_jwk.update({"kid": KID, "use": "sig", "alg": "RS256"})
+    path = os.path.join(directory, "jwks.json")
+    with open(path, "w") as f:
+        json.dump({"keys": [public_jwk]}, f)
+    return private_pem, path
+
+
+def async_database_url(database_url: str) -> str:
+    """
+    The async-driver URL for a sync SQLAlchemy URL (aiosqlite / asyncpg).
+    """
+    scheme, rest = database_url.split("://", 1)
+    driver = {"sqlite": "sqlite+aiosqlite", "postgresql": "postgresql+asyncpg"}.get(scheme.split("+")[0])
+    if driver is None:
+        raise ValueError(f"No async driver known for {database_url}")
+    return f"{driver}://{rest}"
+
+
+def environment(workdir: str, database_url: Optional[str] = None) -> dict:
+    """
+    Settings that point the app at the stand-ins, with state under `workdir`.
+
+    Also writes the JWKS file; its private key is saved next to it as jwt_private.pem.
+    """
+    private_pem, jwks_path = make_key_and_jwks(workdir)
+    with open(os.path.join(workdir, "jwt_private.pem"), "w") as f:
+        f.write(private_pem)
+    # Concurrent writers queue on SQLite's lock instead of failing after the default 5s
+    database_url = database_url or f"sqlite:///{os.path.join(workdir, 'bench.db')}?timeout=30"
+    model_path = os.environ.get("FRAUD_MODEL_PATH", "fraud_model.npz")
+    return {
+        "DATABASE_URL": database_url,
+        "ASYNC_DATABASE_URL": async_database_url(database_url),
+        "LEDGER_WORKER_COMMAND": f"{sys.executable} -m app.services.fake_ledger",
+        "FAKE_LEDGER_PATH": os.path.join(workdir, "fake_ledger.sqlite3"),
+        "COGNITO_JWKS_URL": f"file://{jwks_path}",
+        # Use the trained model when there is one, otherwise write_model() creates a stand-in
+        "FRAUD_MODEL_PATH": os.path.abspath(model_path) if os.path.exists(model_path) else os.path.join(workdir, "fraud_model.npz"),
+        "REPORTS_DIR": os.path.join(workdir, "reports"),
+        "FRAUD_LOG_SPILL_PATH": os.path.join(workdir, "fraud_logs.spill.jsonl"),
+        # Never contacted: the fraud log writer is routed to mongomock by create_app
+        "MONGO_URI": "mongodb://127.0.0.1:1/?serverSelectionTimeoutMS=200",
+    }
+
+
+def write_model(path: str) -> None:
+    """
+    A model artifact with train_model.py's architecture that scores every
+    transaction near zero, so create requests run the full pipeline instead
+    of stopping at the fraud flag.
+    """
+    import numpy as np
+
+    from app.services.fraud_model import save_artifact
+
+    rng = np.random.default_rng(0)
+    sizes = [4, 16, 8, 1]
+    activations = ["relu", "relu", "sigmoid"]
+    layers = [
+        (rng.normal(scale=0.1, size=(n_in, n_out)), np.zeros(n_out), activation)
+        for n_in, n_out, activation in zip(sizes, sizes[1:], activations)
+    ]
+    layers[-1] = (layers[-1][0], np.array([-20.0]), "sigmoid")
+    save_artifact(path, layers, scaler_mean=np.array([33.0, 10.0, 2.5, 0.5]), scaler_scale=np.array([45.0, 5.5, 1.1, 0.5]))
+
+
+def prepare(accounts: int, transactions: int, seed: int = 0) -> Tuple[List[str], List[str]]:
+    """
+    Create the schema, a model artifact if needed, ledger accounts and RDS history.
+
+    Must run after `environment()` has been applied to os.environ.
+    Returns (account names, seeded tx_ids).
+    """
+    from app.core.config import settings
+    from app.db.initial_data import init_db
+    from app.db.session import SessionLocal, engine
+    from app.models.transaction import Transaction
+    from app.services.fake_ledger import FakeLedger
+
+    if not os.path.exists(settings.FRAUD_MODEL_PATH):
+        write_model(settings.FRAUD_MODEL_PATH)
+    init_db()
+    if settings.DATABASE_URL.startswith("sqlite"):
+        # Readers do not block the writer (the setting is stored in the database file)
+        with engine.connect() as connection:
+            connection.exec_driver_sql("PRAGMA journal_mode=WAL")
+
+    names = [f"Bank{i:04d}" for i in range(accounts)]
+    ledger = FakeLedger(os.environ["FAKE_LEDGER_PATH"])
+    ledger.InitLedger()
+    ledger._conn.executemany(
+        "INSERT OR REPLACE INTO accounts (name, balance) VALUES (?, ?)", [(name, 1e12) for name in names]
+    )
+
+    rng = random.Random(seed)
+    rows = []
+    for _ in range(transactions):
+        sender, receiver = rng.sample(names, 2)
+        rows.append(Transaction(sender=sender, receiver=receiver, amount=round(rng.uniform(1, 500), 2)))
+    db = SessionLocal()
+    try:
+        db.add_all(rows)
+        db.commit()
+        tx_ids = [row.tx_id for row in rows]
+    finally:
+        db.close()
+    return names, tx_ids
+
+
+class AsyncCollection:
+    """
+    Awaitable facade over a mongomock collection, for code written against Motor.
+    """
+
+    def __init__(self, collection):
+        self._collection = collection
+
+    def __getattr__(self, name):
+        method = getattr(self._collection, name)
+
+        async def call(*args, **kwargs):
+            return method(*args, **kwargs)
+
+        return call
+
+
+class AsyncDatabase:
+    def __init__(self, database):
+        self._database = database
+
+    def __getattr__(self, name) -> AsyncCollection:
+        return AsyncCollection(self._database[name])
+
+
+def create_app():
+    """
+    uvicorn factory: the real app with the fraud log writer on mongomock.
+    """
+    import mongomock
+
+    from app.core.config import settings
+    from app.db import mongo_client
+    from app.main import app
+
+    database = AsyncDatabase(mongomock.MongoClient()[settings.MONGO_DB_NAME])
+    mongo_client.fraud_log_writer._get_db = lambda: database
+    return app
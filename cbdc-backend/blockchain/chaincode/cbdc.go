@@ -25,6 +25,12 @@ type Transaction struct {
     Timestamp string  `json:"timestamp"`
 }
 
+// HistoryPage is one page of QueryHistoryPage results
+type HistoryPage struct {
+    Records  []Transaction `json:"records"`
+    Bookmark string        `json:"bookmark"`
+}
+
 // SmartContract provides functions for managing CBDC
 type SmartContract struct {
     contractapi.Contract
@@ -138,6 +144,37 @@ func (s *SmartContract) QueryHistory(ctx contractapi.TransactionContextInterface
     return txs, nil
 }
 
+// QueryHistoryPage returns the account's transactions found in one page of the
+// tx_ key range. Pass the returned bookmark to continue; an empty bookmark means
+// the scan is complete. Keeps peer and client memory bounded by the page size.
+func (s *SmartContract) QueryHistoryPage(ctx contractapi.TransactionContextInterface, account string, pageSize int, bookmark string) (*HistoryPage, error) {
+    if pageSize <= 0 {
+        return nil, fmt.Errorf("invalid page size")
+    }
+    resultsIterator, metadata, err := ctx.GetStub().GetStateByRangeWithPagination("tx_", "tx_zzzzzzzzzzzzzzzzzzzzzzzzzzzzzzzz", int32(pageSize), bookmark)
+    if err != nil {
+        return nil, err
+    }
+    defer resultsIterator.Close()
+
+    page := HistoryPage{Records: []Transaction{}}
+    for resultsIterator.HasNext() {
+        queryResponse, err := resultsIterator.Next()
+        if err != nil {
+            return nil, err
+        }
+        var tx Transaction
+        json.Unmarshal(queryResponse.Value, &tx)
+        if tx.Sender == account || tx.Receiver == account {
+            page.Records = append(page.Records, tx)
+        }
+    }
+    if metadata.FetchedRecordsCount == int32(pageSize) {
+        page.Bookmark = metadata.Bookmark
+    }
+    return &page, nil
+}
+
 func main() {
     chaincode, err := contractapi.NewChaincode(new(SmartContract))
     if err != nil {
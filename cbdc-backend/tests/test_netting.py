@@ -0,0 +1,102 @@
+"""
+Multilateral netting against hand-computed net positions.
+
+One EUR is 2 USD. Payments, with positions in USD / EUR:
+
+    A -> B  100 USD              A -100         B +100
+    B -> C   30 USD                             B  -30   C +30
+    C -> A   20 USD as 10 EUR    A  +10 EUR              C -20   FX +20 USD, -10 EUR
+    B -> A   40 USD (2 payments) A  +40         B  -40
+
+    USD: A -60, B +30, C +10, FX +20        EUR: A +10, FX -10
+"""
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+from app.crud import crud_netting
+from app.db.base import Base
+from app.services.fx import FXRateTable, UnsupportedCurrency
+from app.services.netting import FX_PROVIDER, NettingEngine, SettlementWindow
+
+import app.models.netting  # noqa: F401  (registers the netting tables on Base.metadata)
+
+PAYMENTS = [
+    ("A", "B", "USD", "USD", 100.0),
+    ("B", "C", "USD", "USD", 30.0),
+    ("C", "A", "USD", "EUR", 20.0),
+    ("B", "A", "USD", "USD", 15.0),
+    ("B", "A", "USD", "USD", 25.0),
+]
+
+EXPECTED_TRANSFERS = [
+    ("A", "B", "USD", 30.0),
+    ("A", "C", "USD", 10.0),
+    ("A", FX_PROVIDER, "USD", 20.0),
+    (FX_PROVIDER, "A", "EUR", 10.0),
+]
+
+
+@pytest.fixture
+def engine():
+    return NettingEngine(FXRateTable("USD", {"USD": 1.0, "EUR": 0.5}))
+
+
+@pytest.fixture
+def db():
+    db_engine = create_engine("sqlite://")
+    Base.metadata.create_all(db_engine)
+    with Session(db_engine) as session:
+        yield session
+    db_engine.dispose()
+
+
+def transfers(settlement):
+    return sorted(
+        (transfer["payer"], transfer["payee"], transfer["currency"], round(transfer["amount"], 2))
+        for transfer in settlement["net_transfers"]
+    )
+
+
+def test_settle_matches_hand_computed_positions(engine):
+    window = SettlementWindow(1)
+    for sender, receiver, from_currency, to_currency, amount in PAYMENTS[:3]:
+        window.add(sender, receiver, engine.fx.code(from_currency), engine.fx.code(to_currency), amount)
+    # The last two payments share parties and currencies, as grouped by the close query
+    window.add("B", "A", engine.fx.code("USD"), engine.fx.code("USD"), 40.0, count=2)
+
+    settlement = engine.settle(window)
+
+    assert transfers(settlement) == sorted(EXPECTED_TRANSFERS)
+    assert settlement["payments"] == len(window) == len(PAYMENTS)
+    assert settlement["corridors"] == {"USD/USD": 4, "USD/EUR": 1}
+    assert settlement["ledger_writes_net"] == len(EXPECTED_TRANSFERS)
+
+
+def test_close_nets_the_queued_window(engine, db):
+    queued = engine.submit(db, [
+        {"tx_id": f"tx{i}", "sender": sender, "receiver": receiver,
+         "from_currency": from_currency, "to_currency": to_currency, "amount": amount}
+        for i, (sender, receiver, from_currency, to_currency, amount) in enumerate(PAYMENTS)
+    ])
+
+    settlement = engine.close(db)
+
+    assert settlement["window_id"] == queued["window_id"]
+    assert transfers(settlement) == sorted(EXPECTED_TRANSFERS)
+    assert settlement["payments"] == len(PAYMENTS)
+    assert engine.status(db)["payments"] == 0
+
+
+def test_failed_close_leaves_the_window_open(engine, db):
+    queued = engine.submit(db, [
+        {"tx_id": "tx0", "sender": "A", "receiver": "B", "from_currency": "USD", "to_currency": "EUR", "amount": 10.0}
+    ])
+    without_eur = NettingEngine(FXRateTable("USD", {"USD": 1.0}))
+
+    with pytest.raises(UnsupportedCurrency):
+        without_eur.close(db)
+
+    status = engine.status(db)
+    assert (status["window_id"], status["payments"]) == (queued["window_id"], 1)
+    assert crud_netting.window_counts(db, queued["window_id"]) == (1, 2)
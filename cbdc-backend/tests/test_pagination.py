@@ -0,0 +1,70 @@
+"""
+Keyset pagination over transactions and report catalog entries that share a timestamp.
+
+Rows are inserted back to back with the server-side timestamp default, so
+most pages end on a timestamp shared with rows of the next page.
+"""
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+from app.crud import crud_report, crud_transaction
+from app.db.base import Base
+from app.schemas.transaction import TransactionCreate
+
+import app.models.report  # noqa: F401  (registers every table on Base.metadata)
+import app.models.rollup  # noqa: F401
+
+PAGE_SIZE = 3
+TRANSACTIONS = 2 * PAGE_SIZE + 1
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    with Session(engine) as session:
+        for amount in range(1, TRANSACTIONS + 1):
+            crud_transaction.create(session, obj_in=TransactionCreate(sender="BankA", receiver="BankB", amount=amount))
+        yield session
+    engine.dispose()
+
+
+def test_pages_newest_first_without_repeats(db):
+    pages, cursor = [], None
+    while len(pages) <= TRANSACTIONS:
+        page = crud_transaction.get_page(db, limit=PAGE_SIZE, cursor=cursor)
+        pages.append([transaction.id for transaction in page])
+        if len(page) < PAGE_SIZE:
+            break
+        cursor = crud_transaction.encode_cursor(page[-1])
+
+    assert [len(page) for page in pages] == [PAGE_SIZE, PAGE_SIZE, 1]
+    assert sum(pages, []) == list(range(TRANSACTIONS, 0, -1))
+
+
+def test_training_rows_resume_after_keyset(db):
+    ids, after = [], None
+    while len(ids) <= TRANSACTIONS:
+        rows = db.execute(crud_transaction.training_rows_query(after).limit(PAGE_SIZE)).all()
+        ids.extend(row.id for row in rows)
+        if len(rows) < PAGE_SIZE:
+            break
+        after = (rows[-1].timestamp, rows[-1].id)
+
+    assert ids == list(range(1, TRANSACTIONS + 1))
+
+
+def test_catalog_pages_newest_first_without_repeats(db):
+    for i in range(1, TRANSACTIONS + 1):
+        crud_report.add_catalog_entry(db, path=f"report_{i}.pdf", size_bytes=i, tx_id=str(i))
+    pages, cursor = [], None
+    while len(pages) <= TRANSACTIONS:
+        page = db.execute(crud_report.catalog_page_query(limit=PAGE_SIZE, cursor=cursor)).scalars().all()
+        pages.append([entry.size_bytes for entry in page])
+        if len(page) < PAGE_SIZE:
+            break
+        cursor = crud_report.encode_catalog_cursor(page[-1])
+
+    assert [len(page) for page in pages] == [PAGE_SIZE, PAGE_SIZE, 1]
+    assert sum(pages, []) == list(range(TRANSACTIONS, 0, -1))
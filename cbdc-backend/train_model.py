@@ -1,3 +1,7 @@
+import argparse
+import math
+import time
+
 import pandas as pd
 import tensorflow as tf
 from sklearn.model_selection import train_test_split
@@ -5,6 +9,44 @@ from sklearn.preprocessing import StandardScaler
 import numpy as np
 import os
 
+from app.services.fraud_model import FEATURES, save_artifact
+from app.services.training_data import fraud_rule
+
+def build_model(num_features):
+    model = tf.keras.Sequential([
+        tf.keras.layers.Input(shape=(num_features,)),
+        tf.keras.layers.Dense(16, activation='relu'),
+        tf.keras.layers.Dropout(0.2),
+        tf.keras.layers.Dense(8, activation='relu'),
+        tf.keras.layers.Dense(1, activation='sigmoid')
+    ])
+
+    model.compile(optimizer='adam',
+                  loss='binary_crossentropy',
+                  metrics=['accuracy'])
+    return model
+
+def export_model(model, scaler):
+    print("Saving the model...")
+    # Save the entire model to a directory
+    model_dir = 'fraud_model'
+    if not os.path.exists(model_dir):
+        os.makedirs(model_dir)
+    model.save(model_dir)
+    print(f"Model saved successfully in the '{model_dir}' directory.")
+
+    print("Exporting the NumPy inference artifact...")
+    # Dense weights plus the fitted scaler, so the backend can score without TensorFlow
+    artifact_path = 'fraud_model.npz'
+    dense_layers = [layer for layer in model.layers if isinstance(layer, tf.keras.layers.Dense)]
+    save_artifact(
+        artifact_path,
+        layers=[(*layer.get_weights(), layer.activation.__name__) for layer in dense_layers],
+        scaler_mean=scaler.mean_,
+        scaler_scale=scaler.scale_,
+    )
+    print(f"Artifact saved to '{artifact_path}'.")
+
 def create_and_train_model():
     """
     Generates synthetic data, trains a simple neural network for fraud detection,
@@ -23,11 +65,8 @@ def create_and_train_model():
     df = pd.DataFrame(data)
 
     # Create a simple rule for fraud
-    df['is_fraud'] = (
-        (df['amount'] > 1000) & (df['tx_per_hour'] > 10) |
-        (df['amount'] > 500) & (df['is_foreign'] == 1)
-    ).astype(int)
-    
+    df['is_fraud'] = fraud_rule(df['amount'], df['tx_per_hour'], df['is_foreign']).astype(int)
+
     print(f"Generated {len(df)} samples, with {df['is_fraud'].sum()} fraud cases.")
 
     # Define features and target
@@ -36,24 +75,13 @@ def create_and_train_model():
 
     # Split and scale the data
     X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42, stratify=y)
-    
+
     scaler = StandardScaler()
     X_train_scaled = scaler.fit_transform(X_train)
     X_test_scaled = scaler.transform(X_test)
 
     print("2. Building and training the TensorFlow model...")
-    # Define the model
-    model = tf.keras.Sequential([
-        tf.keras.layers.Input(shape=(X_train_scaled.shape[1],)),
-        tf.keras.layers.Dense(16, activation='relu'),
-        tf.keras.layers.Dropout(0.2),
-        tf.keras.layers.Dense(8, activation='relu'),
-        tf.keras.layers.Dense(1, activation='sigmoid')
-    ])
-
-    model.compile(optimizer='adam',
-                  loss='binary_crossentropy',
-                  metrics=['accuracy'])
+    model = build_model(X_train_scaled.shape[1])
 
     # Train the model
     model.fit(X_train_scaled, y_train, epochs=10, batch_size=32, validation_split=0.1, verbose=1)
@@ -62,13 +90,126 @@ def create_and_train_model():
     loss, accuracy = model.evaluate(X_test_scaled, y_test)
     print(f"Test Accuracy: {accuracy:.4f}")
 
-    print("4. Saving the model...")
-    # Save the entire model to a directory
-    model_dir = 'fraud_model'
-    if not os.path.exists(model_dir):
-        os.makedirs(model_dir)
-    model.save(model_dir)
-    print(f"Model saved successfully in the '{model_dir}' directory.")
+    print("4. Exporting...")
+    export_model(model, scaler)
+
+class ThroughputLogger(tf.keras.callbacks.Callback):
+    """
+    Prints training examples/sec per epoch.
+    """
+
+    def __init__(self, examples_per_epoch):
+        super().__init__()
+        self.examples_per_epoch = examples_per_epoch
+
+    def on_epoch_begin(self, epoch, logs=None):
+        self.started = time.perf_counter()
+
+    def on_epoch_end(self, epoch, logs=None):
+        elapsed = time.perf_counter() - self.started
+        print(f"Epoch {epoch + 1}: {self.examples_per_epoch / elapsed:.0f} examples/sec")
+
+def shard_dataset(paths, scaler, batch_size, shuffle):
+    """
+    Minibatches streamed from feature shards, one shard in memory at a time.
+
+    Shard order and rows within a shard are reshuffled on every pass; scaling
+    runs in parallel map calls and batches are prefetched while the model trains.
+    """
+    def batches():
+        rng = np.random.default_rng()
+        for index in (rng.permutation(len(paths)) if shuffle else range(len(paths))):
+            with np.load(paths[index]) as shard:
+                features, labels = shard['features'], shard['labels']
+            order = rng.permutation(len(labels)) if shuffle else np.arange(len(labels))
+            for start in range(0, len(order), batch_size):
+                rows = order[start:start + batch_size]
+                yield features[rows], labels[rows]
+
+    mean = tf.constant(scaler.mean_, dtype=tf.float32)
+    scale = tf.constant(scaler.scale_, dtype=tf.float32)
+    dataset = tf.data.Dataset.from_generator(
+        batches,
+        output_signature=(
+            tf.TensorSpec(shape=(None, len(FEATURES)), dtype=tf.float32),
+            tf.TensorSpec(shape=(None,), dtype=tf.float32),
+        ),
+    )
+    dataset = dataset.map(lambda x, y: ((x - mean) / scale, y), num_parallel_calls=tf.data.AUTOTUNE)
+    return dataset.repeat().prefetch(tf.data.AUTOTUNE)
+
+def train_streaming(args):
+    """
+    Trains on the real transactions table (or Parquet exports) without
+    loading it into memory: features are extracted into shards once, then
+    the model trains from the shards. Both stages resume from `args.workdir`.
+    """
+    from app.core.config import settings
+    from app.services.training_data import (
+        FeatureExtraction, load_labels, parquet_chunks, parquet_paths, sql_chunks,
+    )
+
+    labels = load_labels(args.labels) if args.labels else None
+    if labels is None:
+        print("No --labels given: labelling transactions with the synthetic fraud rule.")
+
+    print("1. Extracting features...")
+    extraction = FeatureExtraction(args.workdir, settings.FEATURE_STORE_WINDOW_MINUTES, labels)
+    if args.source == 'postgres':
+        from sqlalchemy import create_engine
+        engine = create_engine(args.database_url or settings.DATABASE_URL)
+        chunks = lambda position: sql_chunks(engine, args.chunk_size, position)
+    else:
+        paths = parquet_paths(args.parquet)
+        chunks = lambda position: parquet_chunks(paths, args.chunk_size, position)
+    summary = extraction.run(chunks, max_rows=args.max_rows)
+    print(f"Extracted {summary['rows']} rows ({summary['positives']} fraud) into {summary['shards']} shards, "
+          f"{summary['rows_per_sec']:.0f} rows/sec this run.")
+    if not summary['rows']:
+        raise SystemExit("No transactions to train on.")
+
+    # The most recent shards are held out, as the model will score newer traffic than it saw
+    paths = extraction.shard_paths()
+    held_out = max(1, len(paths) // 20) if len(paths) > 1 else 0
+    train_paths, val_paths = paths[:len(paths) - held_out], paths[len(paths) - held_out:]
+    train_rows, val_rows = extraction.shard_rows[:len(train_paths)], extraction.shard_rows[len(train_paths):]
+
+    def steps(rows):
+        return sum(math.ceil(n / args.batch_size) for n in rows)
+
+    print("2. Building and training the TensorFlow model...")
+    model = build_model(len(FEATURES))
+    model.fit(
+        shard_dataset(train_paths, extraction.scaler, args.batch_size, shuffle=True),
+        epochs=args.epochs,
+        steps_per_epoch=steps(train_rows),
+        validation_data=shard_dataset(val_paths, extraction.scaler, args.batch_size, shuffle=False) if val_paths else None,
+        validation_steps=steps(val_rows) if val_paths else None,
+        callbacks=[
+            # Restores weights, optimizer state and epoch after an interrupted run
+            tf.keras.callbacks.BackupAndRestore(backup_dir=os.path.join(args.workdir, 'backup')),
+            ThroughputLogger(sum(train_rows)),
+        ],
+        verbose=1,
+    )
+
+    print("3. Exporting...")
+    export_model(model, extraction.scaler)
 
 if __name__ == "__main__":
-    create_and_train_model() 
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Train the fraud detection model.")
+    parser.add_argument('--source', choices=['synthetic', 'postgres', 'parquet'], default='synthetic')
+    parser.add_argument('--database-url', help="defaults to DATABASE_URL (--source postgres)")
+    parser.add_argument('--parquet', nargs='+', default=[], help="Parquet shard paths or globs, in timestamp order (--source parquet)")
+    parser.add_argument('--labels', help="file of confirmed fraudulent tx_ids, one per line")
+    parser.add_argument('--workdir', default='training_run', help="feature shards and checkpoints")
+    parser.add_argument('--chunk-size', type=int, default=100000)
+    parser.add_argument('--max-rows', type=int, help="stop extraction after about this many rows")
+    parser.add_argument('--batch-size', type=int, default=1024)
+    parser.add_argument('--epochs', type=int, default=10)
+    args = parser.parse_args()
+
+    if args.source == 'synthetic':
+        create_and_train_model()
+    else:
+        train_streaming(args)